@@ -0,0 +1,87 @@
+# Compares the execution backends on the evaluation workload.
+#
+# Run from src/ with:
+#     python -m benchmarks.bench_backends [--db t2s_sample.db] [--repeat 5]
+#
+# Every backend runs the workload once to warm up, then --repeat more times.
+# The results of each query are compared across backends (order-insensitive,
+# floats rounded), so differences in SQL dialect show up next to the timings.
+import time
+import argparse
+import statistics
+
+import pandas as pd
+
+from database.backends import create_db_manager, BACKENDS
+from benchmarks.bench_connection_profiles import DEFAULT_DB, WORKLOAD_CSV, load_workload
+
+
+def _normalize(rows):
+    return sorted(
+        (tuple(round(value, 6) if isinstance(value, float) else value for value in row) for row in rows),
+        key=repr,
+    )
+
+
+def benchmark_backend(db_name, backend, queries, repeat):
+    """
+    Times the workload on one backend.
+
+    Returns:
+        tuple: (load time in seconds, query -> list of seconds, query -> normalized results)
+    """
+    start = time.perf_counter()
+    db_manager = create_db_manager(db_name, backend)
+    if db_manager.connect() is None:
+        raise RuntimeError(f"Could not connect to '{db_name}' with the {backend} backend.")
+    load_time = time.perf_counter() - start
+
+    try:
+        results = {query: _normalize(db_manager.execute_query_with_results(query)) for query in queries}
+        timings = {query: [] for query in queries}
+        for _ in range(repeat):
+            for query in queries:
+                start = time.perf_counter()
+                db_manager.execute_query_with_results(query)
+                timings[query].append(time.perf_counter() - start)
+        return load_time, timings, results
+    finally:
+        db_manager.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the execution backends on the evaluation workload.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database file")
+    parser.add_argument("--csv", default=WORKLOAD_CSV, help="Dataset with generated_sql/golden_sql columns")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs of the workload per backend")
+    args = parser.parse_args()
+
+    queries = load_workload(args.csv)
+    print(f"Benchmarking {len(queries)} queries on '{args.db}', {args.repeat} runs per backend.")
+
+    load_times, timings, results = {}, {}, {}
+    for backend in BACKENDS:
+        load_times[backend], timings[backend], results[backend] = benchmark_backend(
+            args.db, backend, queries, args.repeat
+        )
+
+    rows = []
+    for query in queries:
+        row = {"query": " ".join(query.split())[:60]}
+        for backend in BACKENDS:
+            row[backend] = statistics.median(timings[backend][query]) * 1000
+        row["same results"] = all(results[backend][query] == results[BACKENDS[0]][query] for backend in BACKENDS)
+        rows.append(row)
+    table = pd.DataFrame(rows)
+    total = {"query": "TOTAL", **{backend: table[backend].sum() for backend in BACKENDS},
+             "same results": bool(table["same results"].all())}
+    table = pd.concat([table, pd.DataFrame([total])], ignore_index=True)
+
+    with pd.option_context("display.max_rows", None, "display.width", 160, "display.float_format", "{:.3f}".format):
+        print("\nLoad time (s): " + ", ".join(f"{backend} {load_times[backend]:.2f}" for backend in BACKENDS))
+        print("Median time per query (ms); failing queries return no rows:")
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Compares the connection profiles of DatabaseManager on the employees/salaries workload.
+#
+# Run from src/ with:
+#     python -m benchmarks.bench_connection_profiles [--db t2s_sample.db] [--repeat 5]
+#
+# Every profile runs the workload once to warm up, then --repeat more times.
+# Queries failing on a profile (e.g. a table missing from the database) are
+# reported and left out of the comparison.
+import os
+import time
+import argparse
+import statistics
+
+import pandas as pd
+
+from database.database_connector import DatabaseManager, CONNECTION_PROFILES, EXECUTION_MODES, FILE_MODE
+
+
+DEFAULT_DB = "t2s_sample.db"
+WORKLOAD_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "Test_SQL_Result.csv")
+
+# Heavier queries on the largest table, next to the ones of the sample dataset
+SALARIES_QUERIES = [
+    "SELECT COUNT(*), AVG(salary) FROM salaries;",
+    "SELECT emp_no, MAX(salary) FROM salaries GROUP BY emp_no;",
+    "SELECT strftime('%Y', from_date) AS year, AVG(salary) FROM salaries GROUP BY year ORDER BY year;",
+    "SELECT * FROM salaries WHERE salary > 100000 ORDER BY salary DESC;",
+    "SELECT e.first_name, e.last_name, s.salary FROM employees e "
+    "JOIN salaries s ON e.emp_no = s.emp_no WHERE s.to_date = '9999-01-01';",
+]
+
+
+def load_workload(csv_path: str = WORKLOAD_CSV):
+    """
+    Builds the list of queries to benchmark.
+
+    Parameters:
+        csv_path (str): Evaluation dataset whose generated and golden queries are used.
+
+    Returns:
+        list: Distinct SQL queries.
+    """
+    queries = []
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path, encoding="utf-8-sig")
+        for column in ("generated_sql", "golden_sql"):
+            if column in df.columns:
+                queries.extend(df[column].dropna().astype(str))
+    queries.extend(SALARIES_QUERIES)
+    return list(dict.fromkeys(query.strip() for query in queries))
+
+
+def run_workload(conn, queries):
+    """
+    Runs every query once and fetches all rows.
+
+    Returns:
+        dict: Query -> seconds, or the error message if it failed.
+    """
+    timings = {}
+    for query in queries:
+        start = time.perf_counter()
+        try:
+            conn.execute(query).fetchall()
+            timings[query] = time.perf_counter() - start
+        except Exception as e:
+            timings[query] = str(e)
+    return timings
+
+
+def benchmark_profile(db_name, profile, queries, repeat, execution_mode=FILE_MODE):
+    """
+    Times the workload on a fresh connection opened with the given profile.
+
+    Returns:
+        dict: Query -> list of seconds (one per repetition), or the error message.
+    """
+    db_manager = DatabaseManager(db_name, execution_mode, profile)
+    if db_manager.connect() is None:
+        raise RuntimeError(f"Could not connect to '{db_name}' with the {profile} profile.")
+    try:
+        with db_manager.connection() as conn:
+            results = {query: [] for query in queries}
+            run_workload(conn, queries)  # warm-up
+            for _ in range(repeat):
+                for query, timing in run_workload(conn, queries).items():
+                    if isinstance(timing, str):
+                        results[query] = timing
+                    elif isinstance(results[query], list):
+                        results[query].append(timing)
+        return results
+    finally:
+        db_manager.close_connection()
+
+
+def summarize(results_by_profile):
+    """
+    Builds a table with the median time per query and profile (in ms), limited
+    to the queries that succeeded on every profile, plus a total row.
+    """
+    profiles = list(results_by_profile)
+    queries = [
+        query for query in next(iter(results_by_profile.values()))
+        if all(isinstance(results_by_profile[profile][query], list) for profile in profiles)
+    ]
+    rows = [
+        {"query": " ".join(query.split())[:60], **{profile: statistics.median(results_by_profile[profile][query]) * 1000
+                                  for profile in profiles}}
+        for query in queries
+    ]
+    table = pd.DataFrame(rows, columns=["query"] + profiles)
+    total = {"query": "TOTAL", **{profile: table[profile].sum() for profile in profiles}}
+    return pd.concat([table, pd.DataFrame([total])], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the connection profiles on the evaluation workload.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database file")
+    parser.add_argument("--csv", default=WORKLOAD_CSV, help="Dataset with generated_sql/golden_sql columns")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs of the workload per profile")
+    parser.add_argument("--mode", default=FILE_MODE, choices=EXECUTION_MODES, help="Execution mode")
+    args = parser.parse_args()
+
+    queries = load_workload(args.csv)
+    print(f"Benchmarking {len(queries)} queries on '{args.db}', {args.repeat} runs per profile.")
+
+    results_by_profile = {
+        profile: benchmark_profile(args.db, profile, queries, args.repeat, args.mode)
+        for profile in CONNECTION_PROFILES
+    }
+
+    for profile, results in results_by_profile.items():
+        for query, timing in results.items():
+            if isinstance(timing, str):
+                print(f"[{profile}] skipped '{query[:60]}': {timing}")
+
+    table = summarize(results_by_profile)
+    with pd.option_context("display.max_rows", None, "display.width", 160, "display.float_format", "{:.3f}".format):
+        print("\nMedian time per query (ms):")
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
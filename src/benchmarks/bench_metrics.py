@@ -0,0 +1,280 @@
+# Benchmarks the metric modules and the database layer, offline.
+#
+# Run from src/ with:
+#     python -m benchmarks.bench_metrics [--db t2s_sample.db] [--sizes 1000 10000 100000]
+#                                        [--metrics halstead sql_injection ...] [--compare earlier.json]
+#
+# Every metric runs on datasets of --sizes rows, built by repeating the rows of
+# the evaluation dataset. Each size is run twice: once timed (rows per second)
+# and once under tracemalloc (peak memory of Python allocations; tracemalloc
+# slows Python down, so it is kept out of the timed run). The metrics that
+# execute every query (performance, retrieval accuracy) are only run up to
+# --db-max-size rows, as their time is that of the queries themselves; the
+# query section measures what the database layer adds to them. Metrics that
+# need the watsonx LLM (entity evaluation, SQL equivalence) are not run.
+#
+# Results are written to a JSON file; pass an earlier one with --compare to
+# print the speedups next to the new numbers.
+import os
+import sys
+import json
+import time
+import sqlite3
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+import tracemalloc
+import contextlib
+
+import pandas as pd
+
+from database.database_connector import DatabaseManager, EVALUATION_PROFILE
+from metrics.halstead_scores import compute_and_store_halstead_metrics
+from metrics.check_sql_injection import detect_sql_injection_and_store_metrics
+from metrics.cost_estimator import estimate_query_costs
+from metrics.index_advisor import advise_indexes
+from metrics.query_utilization import calculate_and_store_metrics, monitor_query_utilization
+from metrics.data_retrieval_accuracy import compute_and_return_retrieval_accuracy
+from benchmarks.bench_connection_profiles import DEFAULT_DB, WORKLOAD_CSV, SALARIES_QUERIES
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# Largest dataset the query-executing metrics are run on by default
+DEFAULT_DB_MAX_SIZE = 1_000
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Benchmark -> (function(df, db_manager), whether it executes every query)
+METRIC_BENCHMARKS = {
+    "halstead": (lambda df, db_manager: compute_and_store_halstead_metrics(df), False),
+    "sql_injection": (lambda df, db_manager: detect_sql_injection_and_store_metrics(df), False),
+    "cost_estimate": (lambda df, db_manager: estimate_query_costs(df["generated_sql"].tolist(), db_manager), False),
+    "index_advisor": (lambda df, db_manager: advise_indexes(df, db_manager, retime=False), False),
+    "retrieval_accuracy": (
+        lambda df, db_manager: compute_and_return_retrieval_accuracy(
+            db_manager, df["generated_sql"].tolist(), df["golden_sql"].tolist()
+        ),
+        True,
+    ),
+    "performance": (lambda df, db_manager: calculate_and_store_metrics(df.copy(), db_manager, trials=1), True),
+}
+
+
+def load_dataset(csv_path: str = WORKLOAD_CSV):
+    """
+    Reads the generated/golden query pairs of the evaluation dataset, or uses
+    the salaries queries as both if it is missing.
+
+    Returns:
+        pd.DataFrame: generated_sql and golden_sql columns.
+    """
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path, encoding="utf-8-sig")
+        df = df[["generated_sql", "golden_sql"]].dropna().astype(str)
+        if not df.empty:
+            return df.reset_index(drop=True)
+    return pd.DataFrame({"generated_sql": SALARIES_QUERIES, "golden_sql": SALARIES_QUERIES})
+
+
+def scale_dataset(df, size):
+    """
+    Repeats the rows of df until it has size rows.
+    """
+    repeats = -(-size // len(df))
+    return pd.concat([df] * repeats, ignore_index=True).iloc[:size].reset_index(drop=True)
+
+
+@contextlib.contextmanager
+def _quiet():
+    # The metrics print per query; that output would dominate the timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(function):
+    """
+    Runs function twice: timed, then under tracemalloc.
+
+    Returns:
+        tuple: (seconds, peak traced memory in MB)
+    """
+    with _quiet():
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+
+def benchmark_metrics(dataset, db_manager, metrics, sizes, db_max_size):
+    """
+    Runs every metric on every dataset size.
+
+    Returns:
+        list: One dictionary per metric and size.
+    """
+    results = []
+    for size in sizes:
+        df = scale_dataset(dataset, size)
+        for name in metrics:
+            function, executes_queries = METRIC_BENCHMARKS[name]
+            result = {"benchmark": name, "size": size}
+            if executes_queries and size > db_max_size:
+                result["skipped"] = f"above --db-max-size {db_max_size}"
+                print(f"{name:>20} {size:>8} rows: skipped ({result['skipped']})")
+            else:
+                seconds, peak_mb = measure(lambda: function(df, db_manager))
+                result.update(seconds=seconds, rows_per_second=size / max(seconds, 1e-9), peak_memory_mb=peak_mb)
+                print(f"{name:>20} {size:>8} rows: {result['rows_per_second']:>12,.0f} rows/s, "
+                      f"peak {peak_mb:,.1f} MB")
+            results.append(result)
+    return results
+
+
+def benchmark_queries(db_manager, queries, repeat):
+    """
+    Times every query through the database layer and on a bare connection
+    with the same profile, to show what each layer adds.
+
+    Returns:
+        list: One dictionary per query with the median milliseconds of every path.
+    """
+    results = []
+    # A pooled connection used directly, so it has the same profile; the other
+    # paths check out the pool's remaining connections
+    with db_manager.connection() as bare:
+        paths = {
+            "bare_connection": lambda query: bare.execute(query).fetchall(),
+            "execute_query_with_results": db_manager.execute_query_with_results,
+            "execute_query_columnar": db_manager.execute_query_columnar,
+            "execute_query_with_statistics": db_manager.execute_query_with_statistics,
+            "monitor_query_utilization": lambda query: monitor_query_utilization(
+                lambda: db_manager.execute_query_with_results(query)
+            ),
+        }
+
+        for query in queries:
+            try:
+                bare.execute(query).fetchall()
+            except sqlite3.Error as e:
+                print(f"Skipping '{query[:60]}': {e}")
+                continue
+            timings = {path: [] for path in paths}
+            with _quiet():
+                for path, run in paths.items():
+                    run(query)  # warm-up
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        run(query)
+                        timings[path].append(time.perf_counter() - start)
+            result = {"query": " ".join(query.split())}
+            result.update({path: statistics.median(times) * 1000 for path, times in timings.items()})
+            results.append(result)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, earlier):
+    """
+    Prints the change in rows per second against an earlier results file.
+    """
+    before = {(row["benchmark"], row["size"]): row for row in earlier["metrics"] if "rows_per_second" in row}
+    rows = []
+    for row in results["metrics"]:
+        key = (row["benchmark"], row["size"])
+        if "rows_per_second" in row and key in before:
+            rows.append({
+                "benchmark": row["benchmark"], "size": row["size"],
+                "rows/s before": before[key]["rows_per_second"], "rows/s now": row["rows_per_second"],
+                "speedup": row["rows_per_second"] / max(before[key]["rows_per_second"], 1e-9),
+                "peak MB before": before[key]["peak_memory_mb"], "peak MB now": row["peak_memory_mb"],
+            })
+    if not rows:
+        print("\nNo benchmark in common with the earlier results.")
+        return
+    with pd.option_context("display.width", 160, "display.float_format", "{:,.2f}".format):
+        print(f"\nCompared with {earlier.get('commit') or 'the earlier run'} ({earlier.get('timestamp')}):")
+        print(pd.DataFrame(rows).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the metric modules and the database layer.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database file")
+    parser.add_argument("--csv", default=WORKLOAD_CSV, help="Dataset with generated_sql/golden_sql columns")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Dataset sizes in rows")
+    parser.add_argument("--metrics", nargs="+", default=list(METRIC_BENCHMARKS), choices=list(METRIC_BENCHMARKS),
+                        help="Metrics to benchmark")
+    parser.add_argument("--db-max-size", type=int, default=DEFAULT_DB_MAX_SIZE,
+                        help="Largest size for the metrics that execute every query")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query in the query section")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/metrics_<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"Database '{args.db}' not found; run the app once to create it, or pass --db.")
+
+    dataset = load_dataset(args.csv)
+    db_manager = DatabaseManager(args.db, profile=EVALUATION_PROFILE)
+    with _quiet():
+        connected = db_manager.connect() is not None
+    if not connected:
+        sys.exit(f"Could not connect to '{args.db}'.")
+
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    try:
+        print(f"Benchmarking metrics on {sorted(args.sizes)} rows ({len(dataset)} distinct query pairs).")
+        metric_results = benchmark_metrics(dataset, db_manager, args.metrics, sorted(args.sizes), args.db_max_size)
+
+        queries = list(dict.fromkeys(dataset["generated_sql"].tolist() + dataset["golden_sql"].tolist()))
+        print(f"\nTiming {len(queries)} queries through the database layer, {args.repeat} runs each.")
+        query_results = benchmark_queries(db_manager, queries, args.repeat)
+    finally:
+        db_manager.close_connection()
+
+    query_table = pd.DataFrame(query_results)
+    if not query_table.empty:
+        query_table["query"] = query_table["query"].str[:50]
+        with pd.option_context("display.width", 200, "display.float_format", "{:.3f}".format):
+            print("\nMedian time per query (ms):")
+            print(query_table.to_string(index=False))
+
+    results = {
+        "timestamp": timestamp,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "db": os.path.abspath(args.db),
+        "metrics": metric_results,
+        "queries": query_results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"metrics_{timestamp.replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
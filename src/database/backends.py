@@ -0,0 +1,106 @@
+import abc
+
+
+# Execution backends
+# sqlite: the evaluation database itself, through DatabaseManager
+# duckdb: an embedded DuckDB copy of the same schema, through DuckDBManager; its
+#         columnar engine is much faster for large aggregations
+SQLITE_BACKEND = "sqlite"
+DUCKDB_BACKEND = "duckdb"
+BACKENDS = (SQLITE_BACKEND, DUCKDB_BACKEND)
+
+# SQLite VM instructions between two progress handler calls, i.e. the resolution of "VM Steps"
+VM_STEP_INTERVAL = 10
+
+
+class DatabaseBackend(abc.ABC):
+    """
+    Interface shared by the database managers, so every metric runs on any
+    backend. Query results are lists of tuples, as returned by sqlite3, or
+    Arrow tables from execute_query_columnar.
+    """
+    backend = None
+
+    @abc.abstractmethod
+    def connect(self):
+        ...
+
+    @property
+    @abc.abstractmethod
+    def is_connected(self):
+        ...
+
+    @abc.abstractmethod
+    def close_connection(self):
+        ...
+
+    @abc.abstractmethod
+    def execute_query(self, query: str):
+        ...
+
+    @abc.abstractmethod
+    def execute_query_with_results(self, query: str):
+        ...
+
+    @abc.abstractmethod
+    def execute_query_columnar(self, query: str, batch_size: int = None):
+        ...
+
+    @abc.abstractmethod
+    def execute_query_with_statistics(self, query: str, step_interval: int = VM_STEP_INTERVAL):
+        ...
+
+    @property
+    @abc.abstractmethod
+    def cold_start_available(self):
+        ...
+
+    @abc.abstractmethod
+    def execute_query_cold(self, query: str):
+        ...
+
+    @property
+    @abc.abstractmethod
+    def plan_manager(self):
+        """
+        The SQLite manager used by the plan-based metrics (cost estimate, index
+        advisor), which read SQLite query plans and statistics.
+        """
+
+    @property
+    @abc.abstractmethod
+    def fingerprint(self):
+        """
+        The database and settings query results and timings depend on, as a
+        dictionary of plain values, so cached results of another database or
+        configuration are not reused.
+        """
+
+    def explain_query_plan(self, query: str):
+        return self.plan_manager.explain_query_plan(query)
+
+    def create_scratch_copy(self):
+        return self.plan_manager.create_scratch_copy()
+
+
+def create_db_manager(db_name: str, backend: str = SQLITE_BACKEND, **kwargs):
+    """
+    Creates the database manager of a backend.
+
+    Parameters:
+        db_name (str): The SQLite database file; other backends load their copy from it.
+        backend (str): One of BACKENDS.
+        kwargs: Passed to the manager, e.g. execution_mode and profile.
+
+    Returns:
+        DatabaseBackend: The manager, not yet connected.
+    """
+    if backend == SQLITE_BACKEND:
+        from database.database_connector import DatabaseManager
+        return DatabaseManager(db_name, **kwargs)
+    if backend == DUCKDB_BACKEND:
+        # Imported here so DuckDB is only needed when it is used
+        from database.duckdb_connector import DuckDBManager
+        return DuckDBManager(db_name, **kwargs)
+    raise ValueError(f"Unknown backend '{backend}'. Expected one of {BACKENDS}.")
+
@@ -0,0 +1,65 @@
+import pyarrow as pa
+
+
+# Rows turned into columns per batch, so at most one batch of Python tuples is alive at a time
+COLUMNAR_BATCH_SIZE = 10_000
+
+
+def _to_array(values):
+    """
+    Builds a typed Arrow array from one column of a batch. SQLite columns may
+    mix types (and integers may exceed 64 bits), such columns become strings.
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def _concat_batches(batches):
+    """
+    Concatenates the per-batch tables. Columns whose type could not be
+    unified across batches become strings.
+    """
+    try:
+        return pa.concat_tables(batches, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mixed = {
+            index for index in range(batches[0].num_columns)
+            if len({batch.schema.field(index).type for batch in batches} - {pa.null()}) > 1
+        }
+        batches = [
+            pa.Table.from_arrays(
+                [column.cast(pa.string()) if index in mixed else column for index, column in enumerate(batch.columns)],
+                names=batch.column_names,
+            )
+            for batch in batches
+        ]
+        return pa.concat_tables(batches, promote_options="permissive")
+
+
+def fetch_arrow_table(cursor, batch_size: int = COLUMNAR_BATCH_SIZE):
+    """
+    Fetches the result of an executed DB-API cursor as an Arrow table, one
+    batch of rows at a time.
+
+    Parameters:
+        cursor: A cursor on which a query has been executed.
+        batch_size (int): Rows fetched and converted per batch.
+
+    Returns:
+        pa.Table: The result, with the column names of the query.
+    """
+    names = [column[0] for column in cursor.description or []]
+    batches = []
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = list(zip(*rows))
+        del rows
+        batches.append(pa.Table.from_arrays([_to_array(values) for values in columns], names=names))
+
+    if not batches:
+        return pa.Table.from_arrays([pa.array([], type=pa.null()) for _ in names], names=names)
+    return _concat_batches(batches)
@@ -1,11 +1,29 @@
 import sqlite3
 import os
-from concurrent.futures import ThreadPoolExecutor
-from database.load_data import LOAD_DATA_QUERIES
-from database.load_tables_views import TABLES_VIEWS
+import time
+from database.load_tables_views import TABLES_VIEWS, INDEXES
+from database.seed_data import SEED_DIR, SEED_BATCH_SIZE, has_seed_data, iter_seed_tables
 
 DB_NAME = "t2s_sample.db"
 
+# Settings used while bulk loading a freshly created database. Durability is
+# not needed during the load: if it is interrupted, the database is rebuilt.
+FAST_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MB
+    "PRAGMA foreign_keys = OFF",
+]
+
+# Settings restored once the load has finished
+DEFAULT_PRAGMAS = [
+    "PRAGMA journal_mode = DELETE",
+    "PRAGMA synchronous = FULL",
+    "PRAGMA locking_mode = NORMAL",
+]
+
 def delete_database(db_name: str):
     """
     Deletes the specified SQLite database file.
@@ -111,19 +129,133 @@ def insert_data(con: sqlite3.Connection, data_query_dict: dict):
         con.executemany(insert_query, insert_values)
 
 
-def setup_and_populate_sqllite_db(db_name: str, table_queries: list[str], insert_queries: list[str]):
+def group_data_by_table(data_query_dicts):
+    """
+    Yields the rows of several data dictionaries table by table, checking that
+    a table split across modules (e.g. salaries) has the same columns in each.
+
+    Parameters:
+        data_query_dicts (iterable): Dictionaries of table name -> (column names, data tuples).
+            A generator is consumed one dictionary (module) at a time.
+
+    Yields:
+        tuple: (table name, column names, data tuples)
+    """
+    table_columns = {}
+    for data_query_dict in data_query_dicts:
+        for table_name, (columns, rows) in data_query_dict.items():
+            columns = tuple(columns)
+            if table_columns.setdefault(table_name, columns) != columns:
+                raise ValueError(f"Column mismatch for table '{table_name}': {columns}")
+            yield table_name, columns, rows
+
+
+def bulk_insert_table(con: sqlite3.Connection, table_name: str, columns: tuple, row_batches):
+    """
+    Inserts the batches of one table in a single transaction and reports the load rate.
+
+    Parameters:
+        con (sqlite3.Connection): The SQLite database connection, in autocommit mode.
+        table_name (str): The table to insert into.
+        columns (tuple): Column names.
+        row_batches (iterable): Lists of data tuples; may be a generator, so only one batch is in memory.
+
+    Returns:
+        tuple: (rows inserted, rows per second)
+    """
+    placeholders = ', '.join(['?' for _ in columns])
+    insert_query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    start_time = time.perf_counter()
+    row_count = 0
+    con.execute("BEGIN")
+    try:
+        for rows in row_batches:
+            con.executemany(insert_query, rows)
+            row_count += len(rows)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    elapsed = time.perf_counter() - start_time
+
+    rows_per_second = row_count / elapsed if elapsed > 0 else float("inf")
+    print(f"Loaded {row_count} rows into '{table_name}' in {elapsed:.2f}s ({rows_per_second:,.0f} rows/s)")
+    return row_count, rows_per_second
+
+
+def bulk_insert_data(con: sqlite3.Connection, data_query_dicts):
+    """
+    Inserts the data of every table, one transaction per table and module,
+    and reports the load rate.
+
+    Parameters:
+        con (sqlite3.Connection): The SQLite database connection, in autocommit mode.
+        data_query_dicts (iterable): Dictionaries of table name -> (column names, data tuples).
+            A generator (e.g. iter_load_data()) keeps only one module in memory at a time.
+
+    Returns:
+        dict: Table name -> (rows inserted, rows per second).
+    """
+    # Table name -> (rows inserted, seconds spent)
+    totals = {}
+    for table_name, columns, rows in group_data_by_table(data_query_dicts):
+        start_time = time.perf_counter()
+        row_count, _ = bulk_insert_table(con, table_name, columns, [rows])
+        previous_rows, previous_elapsed = totals.get(table_name, (0, 0.0))
+        totals[table_name] = (previous_rows + row_count, previous_elapsed + time.perf_counter() - start_time)
+
+    return {
+        table_name: (row_count, row_count / elapsed if elapsed > 0 else float("inf"))
+        for table_name, (row_count, elapsed) in totals.items()
+    }
+
+
+def bulk_insert_seed_data(con: sqlite3.Connection, seed_dir: str = SEED_DIR, batch_size: int = SEED_BATCH_SIZE):
+    """
+    Streams every table of the columnar seed files into the database, one batch at a time.
+
+    Parameters:
+        con (sqlite3.Connection): The SQLite database connection, in autocommit mode.
+        seed_dir (str): Folder containing the seed files.
+        batch_size (int): Rows read and inserted per batch.
+
+    Returns:
+        dict: Table name -> (rows inserted, rows per second).
+    """
+    load_stats = {}
+    for table_name, columns, row_batches in iter_seed_tables(seed_dir, batch_size):
+        load_stats[table_name] = bulk_insert_table(con, table_name, columns, row_batches)
+    return load_stats
+
+
+def setup_and_populate_sqllite_db(db_name: str, table_queries: list[str], insert_queries: list[str] = None,
+                                  index_queries: list[str] = INDEXES, fast_load: bool = False,
+                                  seed_dir: str = None):
     """
     Sets up a SQLite database by configuring it and executing a list of SQL queries.
 
     Parameters:
         db_name (str): The name of the SQLite database file to be created or opened.
-        queries (list): A list of SQL query strings to be executed on the database.
+        table_queries (list): SQL queries creating the tables and views.
+        insert_queries (iterable): Dictionaries of table name -> (column names, data tuples),
+            e.g. the iter_load_data() generator. Ignored when seed_dir is given.
+        index_queries (list): Secondary indexes, created after the data is loaded.
+        fast_load (bool): Load with bulk-load pragmas (no journal, no fsync) and one transaction
+            per table. The file is corrupt if the load is interrupted, so only use it for
+            databases that are rebuilt from scratch. If False, rows are inserted with default settings.
+        seed_dir (str): Folder of columnar seed files to stream the data from.
 
     Returns:
         None
     """
     # Configure the database and get a cursor
     conn = configure_db(db_name)
+
+    if fast_load:
+        # Autocommit mode, so transactions are controlled explicitly per table
+        conn.isolation_level = None
+        execute_queries(FAST_LOAD_PRAGMAS, conn)
     
     # Execute queries to create tables
     print("-"*60)
@@ -137,10 +269,39 @@ def setup_and_populate_sqllite_db(db_name: str, table_queries: list[str], insert
     print("\n -----------------Populating tables with data------------------ \n")
     print("-"*60)
     print()
-    for i in insert_queries:
-        insert_data(conn, i)
+    if seed_dir is not None:
+        if not fast_load:
+            conn.isolation_level = None
+        bulk_insert_seed_data(conn, seed_dir)
+    elif fast_load:
+        bulk_insert_data(conn, insert_queries)
+    else:
+        for i in insert_queries:
+            insert_data(conn, i)
+
+    # Secondary indexes are cheaper to build once over the loaded data than to maintain per row
+    print("-"*60)
+    print("\n -----------------Creating indexes------------------ \n")
+    print("-"*60)
+    start_time = time.perf_counter()
+    execute_queries(index_queries, conn)
+
+    # Collect table statistics for the query planner
+    execute_queries(["ANALYZE"], conn)
+    print(f"Indexes and statistics built in {time.perf_counter() - start_time:.2f}s")
+
+    if fast_load:
+        execute_queries(DEFAULT_PRAGMAS, conn)
     
     # Commit changes and close the cursor
     commit_n_close_db(conn)
 
 
+if __name__ == "__main__":
+    if has_seed_data(SEED_DIR):
+        setup_and_populate_sqllite_db(DB_NAME, TABLES_VIEWS, seed_dir=SEED_DIR, fast_load=True)
+    else:
+        # Fall back to the Python literal modules; see database/seed_data.py to convert them
+        from database.load_data import iter_load_data
+        # Passed as a generator, so the modules are imported and loaded one at a time
+        setup_and_populate_sqllite_db(DB_NAME, TABLES_VIEWS, iter_load_data(), fast_load=True)
@@ -0,0 +1,159 @@
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+# Default number of connections a pool may open
+DEFAULT_POOL_SIZE = 4
+
+# Seconds a checkout waits for a free connection before giving up
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+HEALTH_CHECK_QUERY = "SELECT 1"
+
+
+class ConnectionPool:
+    def __init__(self, connection_factory, max_size: int = DEFAULT_POOL_SIZE,
+                 checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT, on_discard=None, errors=(sqlite3.Error,)):
+        """
+        Hands out connections to one thread at a time. Connections are opened
+        on demand up to max_size and returned to the pool after use, so
+        concurrent sessions neither serialize on nor close each other's connection.
+
+        Parameters:
+            connection_factory (function): Opens a new connection.
+            max_size (int): Maximum number of open connections.
+            checkout_timeout (float): Seconds to wait for a free connection.
+            on_discard (function): Called with every connection before it is closed.
+            errors (tuple): Exception types raised by the connections, e.g. (duckdb.Error,)
+                for DuckDB cursors.
+        """
+        if max_size < 1:
+            raise ValueError("The pool needs room for at least one connection.")
+
+        self.connection_factory = connection_factory
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.on_discard = on_discard
+        self.errors = tuple(errors)
+
+        # Idle connections, most recently used last so a thread tends to get its previous connection back
+        self.idle = []
+        self.size = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute(HEALTH_CHECK_QUERY).fetchall()
+            return True
+        except self.errors:
+            return False
+
+    def _discard(self, conn):
+        if self.on_discard is not None:
+            self.on_discard(conn)
+        try:
+            conn.close()
+        except self.errors as e:
+            print(f"Error closing a pooled connection: {e}")
+
+    def acquire(self):
+        """
+        Checks out a connection, opening one if the pool is not full yet.
+
+        Returns:
+            sqlite3.Connection: A connection that passed the health check.
+
+        Raises:
+            TimeoutError: If no connection became free within checkout_timeout.
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self.condition:
+                while True:
+                    if self.closed:
+                        raise Exception("The connection pool is closed.")
+                    if self.idle:
+                        conn, new = self.idle.pop(), False
+                        break
+                    if self.size < self.max_size:
+                        # Reserve the slot; the connection is opened outside the lock
+                        self.size += 1
+                        conn, new = None, True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No free database connection after {self.checkout_timeout:.1f}s.")
+                    self.condition.wait(remaining)
+
+            if new:
+                try:
+                    return self.connection_factory()
+                except Exception:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+
+            if self._is_healthy(conn):
+                return conn
+
+            # Broken connection: drop it and try again
+            print("Discarding a pooled connection that failed its health check.")
+            self._discard(conn)
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+
+    def release(self, conn):
+        """
+        Returns a connection to the pool, rolling back any open transaction.
+        """
+        try:
+            # Connections without in_transaction (e.g. DuckDB cursors) run in autocommit mode
+            if getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except self.errors:
+            pass
+
+        with self.condition:
+            if not self.closed:
+                self.idle.append(conn)
+                self.condition.notify()
+                return
+            self.size -= 1
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Yields a checked-out connection and returns it to the pool afterwards.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Open, idle and checked-out connections and the maximum size.
+        """
+        with self.condition:
+            return {"open": self.size, "idle": len(self.idle), "in_use": self.size - len(self.idle),
+                    "max_size": self.max_size}
+
+    def close(self):
+        """
+        Closes the idle connections; checked-out connections are closed when they are released.
+        """
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for conn in idle:
+            self._discard(conn)
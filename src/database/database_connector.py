@@ -1,40 +1,255 @@
 import sqlite3
 import os
+import uuid
+import pathlib
+import threading
+from contextlib import contextmanager
 
-class DatabaseManager:
-    def __init__(self, db_name: str):
+from database.backends import DatabaseBackend, SQLITE_BACKEND, VM_STEP_INTERVAL
+from database.connection_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from database.sqlite_status import page_cache_counters, page_counters_available, forget_connection
+from database.columnar import fetch_arrow_table, COLUMNAR_BATCH_SIZE
+from tracing import span, DB
+
+# Execution modes; in every mode queries check out a connection from a pool
+# file:          pooled connections to the database file
+# memory_copy:   the file is loaded into memory once; every pooled connection is a private copy of it
+# memory_shared: the file is loaded into memory once; pooled connections share that single
+#                in-memory database (shared cache)
+FILE_MODE = "file"
+MEMORY_COPY_MODE = "memory_copy"
+MEMORY_SHARED_MODE = "memory_shared"
+EXECUTION_MODES = (FILE_MODE, MEMORY_COPY_MODE, MEMORY_SHARED_MODE)
+
+# Connection profiles
+# default:    read-write connection with SQLite's default settings
+# evaluation: read-only connection tuned for running evaluation queries. The
+#             file is opened immutable (no locking or change detection), pages
+#             are memory-mapped, the page cache is larger and temp tables stay in memory.
+DEFAULT_PROFILE = "default"
+EVALUATION_PROFILE = "evaluation"
+CONNECTION_PROFILES = {
+    DEFAULT_PROFILE: {},
+    EVALUATION_PROFILE: {
+        "read_only": True,
+        "immutable": True,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # in KiB, i.e. 64 MB
+        "query_only": True,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def evict_file_cache(path):
+    """
+    Asks the OS to drop a file's pages from its file cache (posix_fadvise,
+    Linux and most Unixes; no privileges needed for clean pages).
+
+    Returns:
+        bool: True if the OS accepted the request.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+class DatabaseManager(DatabaseBackend):
+    backend = SQLITE_BACKEND
+
+    def __init__(self, db_name: str, execution_mode: str = FILE_MODE, profile: str = DEFAULT_PROFILE,
+                 pool_size: int = DEFAULT_POOL_SIZE, **profile_overrides):
         """
         Initializes the DatabaseManager with the specified database name.
 
         Parameters:
             db_name (str): The name of the SQLite database file.
+            execution_mode (str): One of EXECUTION_MODES. The memory modes keep
+                timed queries away from the filesystem.
+            profile (str): One of CONNECTION_PROFILES.
+            pool_size (int): Maximum number of connections used at the same time.
+            profile_overrides: Settings replacing those of the profile, e.g. mmap_size=0 or cache_size=-2000.
         """
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{execution_mode}'. Expected one of {EXECUTION_MODES}.")
+        if profile not in CONNECTION_PROFILES:
+            raise ValueError(f"Unknown connection profile '{profile}'. Expected one of {tuple(CONNECTION_PROFILES)}.")
+
         self.db_name = db_name
+        self.execution_mode = execution_mode
+        self.profile = profile
+        self.profile_settings = {**CONNECTION_PROFILES[profile], **profile_overrides}
+        self.pool_size = pool_size
+        self.pool = None
+        # Pages read through the memory map skip the page cache and its counters,
+        # so the counters are only reported when memory-mapped I/O is off
+        self.page_counters = page_counters_available() and not int(self.profile_settings.get("mmap_size", 0))
+
+        # In-memory master the pooled connections are made from (memory modes only)
         self.conn = None
+        self.memory_uri = None
+        # Backups of the master must not overlap
+        self.lock = threading.Lock()
 
     def connect(self):
         """
-        Establishes a connection to the SQLite database.
+        Creates the connection pool. In the memory modes the database file is
+        first copied into memory with the backup API. One connection is opened
+        right away to check that the database can be read.
 
         Returns:
-            sqlite3.Connection: The connection object.
+            ConnectionPool: The pool, or None if the database cannot be opened.
         """
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            print(f"Connected to database '{self.db_name}'.")
-            return self.conn
+            if self.execution_mode != FILE_MODE:
+                self.conn = self._load_into_memory()
+                self._apply_profile(self.conn)
+            self.pool = ConnectionPool(self._open_pooled_connection, self.pool_size, on_discard=forget_connection)
+            self.pool.release(self.pool.acquire())
+            print(f"Connected to database '{self.db_name}' ({self.execution_mode}, {self.profile} profile).")
+            return self.pool
         except sqlite3.Error as e:
             print(f"Error connecting to database: {e}")
+            self.close_connection()
             return None
 
+    @property
+    def is_connected(self):
+        return self.pool is not None
+
+    def _connect_file(self, check_same_thread=True):
+        """
+        Opens the database file, read-only and/or immutable if the profile asks for it.
+        """
+        if not self.profile_settings.get("read_only"):
+            return sqlite3.connect(self.db_name, check_same_thread=check_same_thread)
+
+        if not os.path.exists(self.db_name):
+            # mode=ro would fail with a less helpful error
+            raise sqlite3.OperationalError(f"Database file '{self.db_name}' does not exist.")
+        uri = pathlib.Path(os.path.abspath(self.db_name)).as_uri() + "?mode=ro"
+        if self.profile_settings.get("immutable"):
+            uri += "&immutable=1"
+        return sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+
+    def create_source_connection(self):
+        """
+        Opens a separate connection to the database file (read-only if the
+        profile asks for it), e.g. to copy its data somewhere else.
+
+        Returns:
+            sqlite3.Connection: The connection; the caller closes it.
+        """
+        return self._connect_file()
+
+    def _apply_profile(self, conn):
+        """
+        Applies the PRAGMA settings of the connection profile to a connection.
+        """
+        settings = self.profile_settings
+        if "mmap_size" in settings:
+            conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        if "cache_size" in settings:
+            conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        if "temp_store" in settings:
+            conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+        if settings.get("query_only"):
+            conn.execute("PRAGMA query_only = ON")
+
+    def _load_into_memory(self):
+        if not os.path.exists(self.db_name):
+            raise sqlite3.OperationalError(f"Database file '{self.db_name}' does not exist.")
+
+        if self.execution_mode == MEMORY_SHARED_MODE:
+            # Named in-memory database; it lives as long as one connection to it is open
+            self.memory_uri = f"file:t2s_{uuid.uuid4().hex}?mode=memory&cache=shared"
+            master = sqlite3.connect(self.memory_uri, uri=True, check_same_thread=False)
+        else:
+            master = sqlite3.connect(":memory:", check_same_thread=False)
+
+        source = self._connect_file()
+        try:
+            source.backup(master)
+        finally:
+            source.close()
+        return master
+
+    def _open_pooled_connection(self):
+        """
+        Opens a new connection for the pool, according to the execution mode.
+        """
+        if self.execution_mode == FILE_MODE:
+            conn = self._connect_file(check_same_thread=False)
+        elif self.execution_mode == MEMORY_SHARED_MODE:
+            conn = sqlite3.connect(self.memory_uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            with self.lock:
+                self.conn.backup(conn)
+
+        # PRAGMAs such as query_only and cache_size are per connection
+        self._apply_profile(conn)
+        return conn
+
+    @property
+    def plan_manager(self):
+        return self
+
+    @property
+    def fingerprint(self):
+        path = os.path.abspath(self.db_name)
+        stat = os.stat(path) if os.path.exists(path) else None
+        return {
+            "backend": self.backend,
+            "database": path,
+            # A rewritten or repopulated file is a different database
+            "size": stat.st_size if stat else None,
+            "modified": stat.st_mtime_ns if stat else None,
+            "execution_mode": self.execution_mode,
+            "profile": self.profile_settings,
+        }
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection for the calling thread and returns it to the pool
+        afterwards. The connection has the profile applied, so callers such as
+        the benchmarks can also use it directly through sqlite3.
+        """
+        if self.pool is None:
+            raise Exception("No database connection established.")
+
+        with span("connection checkout", DB):
+            conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+
     def close_connection(self):
         """
-        Closes the connection to the SQLite database.
+        Closes the pooled connections and, in the memory modes, the in-memory master.
+        Connections still checked out are closed when they are returned.
         """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+            print(f"Connection pool of '{self.db_name}' closed.")
+
         if self.conn:
             try:
                 self.conn.close()
-                print(f"Connection to '{self.db_name}' closed.")
+                self.conn = None
             except sqlite3.Error as e:
                 print(f"Error closing the connection: {e}")
 
@@ -49,12 +264,10 @@ class DatabaseManager:
             None
         """
         try:
-            if not self.conn:
-                raise Exception("No database connection established.")
-            
-            cursor = self.conn.cursor()
-            cursor.execute(query)
-            self.conn.commit()
+            with span("execute_query", DB, query=query), self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                conn.commit()
             print(f"Query executed successfully:\n{query}")
         except sqlite3.Error as e:
             print(f"Error executing query: {e}")
@@ -70,13 +283,143 @@ class DatabaseManager:
             list: The query results.
         """
         try:
-            if not self.conn:
-                raise Exception("No database connection established.")
-            
-            cursor = self.conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
+            with span("execute_query_with_results", DB, query=query), self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                results = cursor.fetchall()
             return results
         except sqlite3.Error as e:
             print(f"Error fetching query results: {e}")
             return []
+
+    def execute_query_columnar(self, query: str, batch_size: int = COLUMNAR_BATCH_SIZE):
+        """
+        Executes a query and fetches the results as typed columns, converting
+        the cursor batch by batch instead of materializing every row as a tuple.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            batch_size (int): Rows fetched and converted per batch.
+
+        Returns:
+            pa.Table: The query results with their column names, or None if the query failed.
+        """
+        try:
+            with span("execute_query_columnar", DB, query=query), self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                return fetch_arrow_table(cursor, batch_size)
+        except sqlite3.Error as e:
+            print(f"Error fetching query results: {e}")
+            return None
+
+    def execute_query_with_statistics(self, query: str, step_interval: int = VM_STEP_INTERVAL):
+        """
+        Executes a query and collects per-query SQLite counters: the virtual
+        machine instructions it needed (counted through the progress handler)
+        and the page cache hits and misses of the connection. Unlike timings,
+        these only depend on the query, the data and the SQLite version.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            step_interval (int): Instructions between two handler calls; the count is rounded down to it.
+
+        Returns:
+            tuple: (query results, dictionary with "VM Steps", "Page Cache Hits" and
+                "Page Cache Misses", or None if the query failed). The cache counters
+                are None unless SQLITE_PAGE_COUNTERS is set and mmap_size is 0.
+        """
+        calls = 0
+
+        def count_step():
+            nonlocal calls
+            calls += 1
+            return 0
+
+        expected_file = self.db_name if self.execution_mode == FILE_MODE else None
+        try:
+            with span("execute_query_with_statistics", DB, query=query), self.connection() as conn:
+                if self.page_counters:
+                    page_cache_counters(conn, expected_file, reset=True)
+                conn.set_progress_handler(count_step, step_interval)
+                try:
+                    results = conn.execute(query).fetchall()
+                finally:
+                    conn.set_progress_handler(None, 0)
+                counters = {}
+                if self.page_counters:
+                    counters = page_cache_counters(conn, expected_file, reset=True) or {}
+            return results, {
+                "VM Steps": calls * step_interval,
+                "Page Cache Hits": counters.get("Page Cache Hits"),
+                "Page Cache Misses": counters.get("Page Cache Misses"),
+            }
+        except sqlite3.Error as e:
+            print(f"Error fetching query results: {e}")
+            return [], None
+
+    @property
+    def cold_start_available(self):
+        # The memory modes keep the whole database in memory
+        return self.execution_mode == FILE_MODE
+
+    def execute_query_cold(self, query: str):
+        """
+        Executes a query from a cold start: on a new connection (so SQLite's
+        page cache is empty), with memory mapping off (so every page goes
+        through that cache) and, where the OS allows it, after evicting the
+        database file from the OS file cache.
+
+        Parameters:
+            query (str): The SQL query to execute.
+
+        Returns:
+            list: The query results.
+
+        Raises:
+            ValueError: In the memory execution modes, which have no cold start.
+        """
+        if not self.cold_start_available:
+            raise ValueError(f"Cold starts need the '{FILE_MODE}' execution mode, not '{self.execution_mode}'.")
+
+        evict_file_cache(self.db_name)
+        conn = self._connect_file()
+        try:
+            self._apply_profile(conn)
+            conn.execute("PRAGMA mmap_size = 0")
+            with span("execute_query_cold", DB, query=query):
+                return conn.execute(query).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error fetching query results: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def explain_query_plan(self, query: str):
+        """
+        Returns the query plan of a query without executing it.
+
+        Parameters:
+            query (str): The SQL query to explain.
+
+        Returns:
+            list: (id, parent, notused, detail) rows of EXPLAIN QUERY PLAN.
+
+        Raises:
+            sqlite3.Error: If the query cannot be prepared.
+        """
+        with span("explain_query_plan", DB, query=query), self.connection() as conn:
+            return conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+
+    def create_scratch_copy(self):
+        """
+        Copies the database into a new writable in-memory connection, e.g. to
+        try out indexes without touching the evaluation database.
+
+        Returns:
+            sqlite3.Connection: The in-memory copy.
+        """
+        scratch = sqlite3.connect(":memory:", check_same_thread=False)
+        with self.connection() as conn:
+            conn.backup(scratch)
+        return scratch
@@ -0,0 +1,296 @@
+import time
+import sqlite3
+from contextlib import contextmanager
+
+import duckdb
+import pyarrow as pa
+
+from database.backends import DatabaseBackend, DUCKDB_BACKEND, VM_STEP_INTERVAL
+from database.database_connector import DatabaseManager, FILE_MODE, EVALUATION_PROFILE
+from database.connection_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from tracing import span, DB
+
+# Load modes
+# import: the tables of the SQLite file are copied into an in-memory DuckDB database
+#         (native columnar storage, fastest queries)
+# attach: the SQLite file is attached through DuckDB's sqlite extension and read in
+#         place; needs the extension to be installed or downloadable. Falls back to import.
+IMPORT_MODE = "import"
+ATTACH_MODE = "attach"
+LOAD_MODES = (IMPORT_MODE, ATTACH_MODE)
+
+# Rows copied per batch in import mode
+IMPORT_BATCH_SIZE = 100_000
+
+# Declared SQLite column types -> DuckDB and Arrow types, by SQLite's type affinity rules
+_AFFINITIES = [
+    ("INT", "BIGINT", pa.int64()),
+    ("CHAR", "VARCHAR", pa.string()),
+    ("CLOB", "VARCHAR", pa.string()),
+    ("TEXT", "VARCHAR", pa.string()),
+    ("REAL", "DOUBLE", pa.float64()),
+    ("FLOA", "DOUBLE", pa.float64()),
+    ("DOUB", "DOUBLE", pa.float64()),
+]
+
+
+def _column_type(declared_type):
+    declared_type = (declared_type or "").upper()
+    for marker, duckdb_type, arrow_type in _AFFINITIES:
+        if marker in declared_type:
+            return duckdb_type, arrow_type
+    return "VARCHAR", pa.string()
+
+
+class DuckDBManager(DatabaseBackend):
+    backend = DUCKDB_BACKEND
+
+    def __init__(self, db_name: str, execution_mode: str = FILE_MODE, profile: str = EVALUATION_PROFILE,
+                 load_mode: str = IMPORT_MODE, pool_size: int = DEFAULT_POOL_SIZE, **profile_overrides):
+        """
+        Runs queries on an embedded DuckDB database holding the schema and data
+        of the SQLite file. Results have the same shape as DatabaseManager's
+        (lists of tuples), so every metric runs unchanged; the SQL dialect differs,
+        so queries relying on SQLite's behaviour can fail or return other values.
+
+        Parameters:
+            db_name (str): The SQLite database file to load.
+            execution_mode (str): Execution mode of the SQLite manager used for query plans.
+            profile (str): Connection profile of the SQLite manager used for query plans.
+            load_mode (str): One of LOAD_MODES.
+            pool_size (int): Number of DuckDB cursors, and connection pool size of the SQLite manager.
+            profile_overrides: Passed to the SQLite manager.
+        """
+        if load_mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode '{load_mode}'. Expected one of {LOAD_MODES}.")
+
+        self.db_name = db_name
+        self.load_mode = load_mode
+        self.conn = None
+        self.pool_size = pool_size
+        # Set when the SQLite file is attached rather than imported
+        self.attached = False
+
+        # Queries check out a cursor (a connection to the same database) from a pool
+        self.cursor_pool = None
+
+        # The plan-based metrics read SQLite query plans and statistics
+        self.sqlite_manager = DatabaseManager(db_name, execution_mode, profile, pool_size, **profile_overrides)
+
+    @property
+    def plan_manager(self):
+        return self.sqlite_manager
+
+    @property
+    def fingerprint(self):
+        return {**self.sqlite_manager.fingerprint, "backend": self.backend, "load_mode": self.load_mode}
+
+    def connect(self):
+        """
+        Creates the in-memory DuckDB database and loads the SQLite file into it.
+
+        Returns:
+            duckdb.DuckDBPyConnection: The connection object.
+        """
+        if self.sqlite_manager.connect() is None:
+            return None
+        try:
+            start = time.perf_counter()
+            self.conn = duckdb.connect(":memory:")
+            self.attached = self.load_mode == ATTACH_MODE and self._attach()
+            if not self.attached:
+                self._import_tables()
+            self.cursor_pool = ConnectionPool(self._open_cursor, self.pool_size, errors=(duckdb.Error,))
+            print(f"Loaded '{self.db_name}' into DuckDB ({self.load_mode}) in {time.perf_counter() - start:.1f}s.")
+            return self.conn
+        except (duckdb.Error, sqlite3.Error) as e:
+            print(f"Error loading database into DuckDB: {e}")
+            self.close_connection()
+            return None
+
+    @property
+    def is_connected(self):
+        return self.conn is not None
+
+    def _attach(self):
+        try:
+            self.conn.execute("INSTALL sqlite")
+            self.conn.execute("LOAD sqlite")
+            self.conn.execute(f"ATTACH '{self.db_name}' AS source (TYPE sqlite, READ_ONLY)")
+            self.conn.execute("USE source")
+            return True
+        except duckdb.Error as e:
+            print(f"Could not attach '{self.db_name}' ({e}); importing the tables instead.")
+            return False
+
+    def _open_cursor(self):
+        """
+        Opens a cursor for the pool. Cursors start in the default catalog, so
+        in attach mode they switch to the attached file as the parent connection did.
+        """
+        cursor = self.conn.cursor()
+        if self.attached:
+            cursor.execute("USE source")
+        return cursor
+
+    def _import_tables(self):
+        """
+        Copies every table of the SQLite file in batches through Arrow, then
+        recreates the views.
+        """
+        source = self.sqlite_manager.create_source_connection()
+        try:
+            tables = source.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            ).fetchall()
+            for (table,) in tables:
+                columns = source.execute(f"PRAGMA table_info('{table}')").fetchall()
+                names = [column[1] for column in columns]
+                types = [_column_type(column[2]) for column in columns]
+                schema = pa.schema([(name, arrow_type) for name, (_, arrow_type) in zip(names, types)])
+                self.conn.execute(
+                    f'CREATE TABLE "{table}" ('
+                    + ", ".join(f'"{name}" {duckdb_type}' for name, (duckdb_type, _) in zip(names, types))
+                    + ")"
+                )
+
+                start, row_count = time.perf_counter(), 0
+                cursor = source.execute(f'SELECT * FROM "{table}"')
+                while True:
+                    rows = cursor.fetchmany(IMPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    batch = pa.Table.from_arrays(
+                        [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                        schema=schema,
+                    )
+                    self.conn.register("import_batch", batch)
+                    self.conn.execute(f'INSERT INTO "{table}" SELECT * FROM import_batch')
+                    self.conn.unregister("import_batch")
+                    row_count += len(rows)
+                elapsed = time.perf_counter() - start
+                print(f"Imported {row_count} rows of '{table}' into DuckDB ({row_count / max(elapsed, 1e-9):,.0f} rows/s).")
+
+            for name, view_sql in source.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'view' ORDER BY rowid"
+            ).fetchall():
+                try:
+                    self.conn.execute(view_sql)
+                except duckdb.Error as e:
+                    print(f"Could not create view '{name}' in DuckDB: {e}")
+        finally:
+            source.close()
+
+    @contextmanager
+    def _cursor(self):
+        """
+        Checks out a cursor for the calling thread and returns it to the pool afterwards.
+        """
+        if self.cursor_pool is None:
+            raise Exception("No database connection established.")
+
+        cursor = self.cursor_pool.acquire()
+        try:
+            yield cursor
+        finally:
+            self.cursor_pool.release(cursor)
+
+    def close_connection(self):
+        """
+        Closes the DuckDB database and the SQLite manager.
+        """
+        if self.cursor_pool is not None:
+            self.cursor_pool.close()
+            self.cursor_pool = None
+
+        if self.conn:
+            try:
+                self.conn.close()
+                print(f"DuckDB copy of '{self.db_name}' closed.")
+            except duckdb.Error as e:
+                print(f"Error closing the connection: {e}")
+            finally:
+                self.conn = None
+        self.attached = False
+        self.sqlite_manager.close_connection()
+
+    def execute_query(self, query: str):
+        """
+        Executes a single SQL query on the DuckDB copy; the SQLite file is not changed.
+
+        Parameters:
+            query (str): The SQL query to execute.
+
+        Returns:
+            None
+        """
+        try:
+            with span("execute_query", DB, query=query, backend=DUCKDB_BACKEND):
+                with self._cursor() as cursor:
+                    cursor.execute(query)
+            print(f"Query executed successfully:\n{query}")
+        except duckdb.Error as e:
+            print(f"Error executing query: {e}")
+
+    def execute_query_with_results(self, query: str):
+        """
+        Executes a query and fetches results from the database.
+
+        Parameters:
+            query (str): The SQL query to execute.
+
+        Returns:
+            list: The query results.
+        """
+        try:
+            with span("execute_query_with_results", DB, query=query, backend=DUCKDB_BACKEND):
+                with self._cursor() as cursor:
+                    return cursor.execute(query).fetchall()
+        except duckdb.Error as e:
+            print(f"Error fetching query results: {e}")
+            return []
+
+    def execute_query_columnar(self, query: str, batch_size: int = None):
+        """
+        Executes a query and fetches the results as an Arrow table, straight
+        from DuckDB's columnar result.
+
+        Parameters:
+            query (str): The SQL query to execute.
+            batch_size (int): Unused; DuckDB converts the result in its own batches.
+
+        Returns:
+            pa.Table: The query results with their column names, or None if the query failed.
+        """
+        try:
+            with span("execute_query_columnar", DB, query=query, backend=DUCKDB_BACKEND):
+                with self._cursor() as cursor:
+                    return cursor.execute(query).to_arrow_table()
+        except duckdb.Error as e:
+            print(f"Error fetching query results: {e}")
+            return None
+
+    def execute_query_with_statistics(self, query: str, step_interval: int = VM_STEP_INTERVAL):
+        """
+        Executes a query. DuckDB has no VM instruction or page cache counters,
+        so the statistics are None.
+
+        Returns:
+            tuple: (query results, dictionary of statistics, or None if the query failed)
+        """
+        try:
+            with span("execute_query_with_statistics", DB, query=query, backend=DUCKDB_BACKEND):
+                with self._cursor() as cursor:
+                    results = cursor.execute(query).fetchall()
+        except duckdb.Error as e:
+            print(f"Error fetching query results: {e}")
+            return [], None
+        return results, {"VM Steps": None, "Page Cache Hits": None, "Page Cache Misses": None}
+
+    @property
+    def cold_start_available(self):
+        # DuckDB keeps the imported data in memory
+        return False
+
+    def execute_query_cold(self, query: str):
+        raise ValueError("Cold starts are only available on the SQLite backend in file mode.")
@@ -1,21 +1,49 @@
+import sys
+import importlib
 
-from database.tables.load_departments import DEPARTMENT_DATA
-from database.tables.load_dept_emp import DEPT_EMP_DATA
-from database.tables.load_dept_manager import DEPT_MNG_DATA
-from database.tables.load_employees import EMPLOYEES_DATA
-from database.tables.load_salaries1 import SALARY_DATA_1
-from database.tables.load_salaries2 import SALARY_DATA_2
-from database.tables.load_salaries3 import SALARY_DATA_3
-from database.tables.load_titles import TITLE_DATA
-
-
-
-LOAD_DATA_QUERIES = [
-            DEPARTMENT_DATA,
-             DEPT_EMP_DATA,  
-             DEPT_MNG_DATA,
-             EMPLOYEES_DATA,
-             SALARY_DATA_1,
-             SALARY_DATA_2,
-             SALARY_DATA_3,
-             TITLE_DATA]
\ No newline at end of file
+
+# Modules holding the rows of each table as Python literals, in load order
+LOAD_DATA_MODULES = [
+    ("database.tables.load_departments", "DEPARTMENT_DATA"),
+    ("database.tables.load_dept_emp", "DEPT_EMP_DATA"),
+    ("database.tables.load_dept_manager", "DEPT_MNG_DATA"),
+    ("database.tables.load_employees", "EMPLOYEES_DATA"),
+    ("database.tables.load_salaries1", "SALARY_DATA_1"),
+    ("database.tables.load_salaries2", "SALARY_DATA_2"),
+    ("database.tables.load_salaries3", "SALARY_DATA_3"),
+    ("database.tables.load_titles", "TITLE_DATA"),
+]
+
+
+def iter_load_data():
+    """
+    Imports the data modules one at a time, so only one of them has to be
+    compiled and held in memory at once.
+
+    Yields:
+        dict: Table name -> (column names, data tuples) of one module.
+    """
+    for module_name, variable in LOAD_DATA_MODULES:
+        module = importlib.import_module(module_name)
+        data = getattr(module, variable)
+
+        # Drop the module so its rows can be freed once the caller is done with them
+        del module
+        sys.modules.pop(module_name, None)
+        package_name, _, attribute = module_name.rpartition(".")
+        package = sys.modules.get(package_name)
+        if package is not None and hasattr(package, attribute):
+            delattr(package, attribute)
+
+        yield data
+
+
+def __getattr__(name):
+    # LOAD_DATA_QUERIES used to be built when this module was imported; it is
+    # now only built on access so importing the database package stays cheap
+    if name == "LOAD_DATA_QUERIES":
+        return [
+            getattr(importlib.import_module(module_name), variable)
+            for module_name, variable in LOAD_DATA_MODULES
+        ]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
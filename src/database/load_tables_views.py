@@ -80,4 +80,12 @@ TABLES_VIEWS = [
         FROM dept_emp d
         INNER JOIN dept_emp_latest_date l
         ON d.emp_no = l.emp_no AND d.from_date = l.from_date AND l.to_date = d.to_date;"""
-]
\ No newline at end of file
+]
+
+# Secondary indexes, created after the tables have been populated
+INDEXES = [
+
+    """CREATE INDEX IF NOT EXISTS idx_dept_manager_dept_no ON dept_manager (dept_no);""",
+
+    """CREATE INDEX IF NOT EXISTS idx_dept_emp_dept_no ON dept_emp (dept_no);""",
+]
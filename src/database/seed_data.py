@@ -0,0 +1,214 @@
+# Compressed columnar seed data.
+#
+# Each table is stored as one Parquet file (zstd-compressed, one row group per
+# batch) in database/seeds/. Loading streams one row group at a time, so memory
+# use does not depend on the table size.
+#
+# Convert the Python literal modules listed in load_data.LOAD_DATA_MODULES with:
+#     python -m database.seed_data
+import os
+import glob
+import sqlite3
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from database.load_tables_views import TABLES_VIEWS
+
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seeds")
+
+# Rows per Parquet row group and per insert batch
+SEED_BATCH_SIZE = 50_000
+
+SEED_COMPRESSION = "zstd"
+
+
+def seed_path(table_name: str, seed_dir: str = SEED_DIR):
+    return os.path.join(seed_dir, f"{table_name}.parquet")
+
+
+def has_seed_data(seed_dir: str = SEED_DIR):
+    """
+    Checks whether the seed folder contains any seed files.
+
+    Parameters:
+        seed_dir (str): Folder containing the seed files.
+
+    Returns:
+        bool: True if at least one table is available.
+    """
+    return bool(glob.glob(os.path.join(seed_dir, "*.parquet")))
+
+
+def _affinity_type(declared_type):
+    """
+    Maps a declared SQLite column type to an Arrow type, following SQLite's
+    type affinity rules; None if the affinity does not fix the type.
+    """
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return pa.int64()
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return pa.string()
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return None
+
+
+def declared_column_types(table_queries=TABLES_VIEWS):
+    """
+    Reads the declared column types of the tables by creating them in an
+    in-memory database.
+
+    Parameters:
+        table_queries (list): SQL queries creating the tables and views.
+
+    Returns:
+        dict: Table name -> (column name -> Arrow type, for the columns whose type is fixed).
+    """
+    conn = sqlite3.connect(":memory:")
+    try:
+        for query in table_queries:
+            try:
+                conn.execute(query)
+            except sqlite3.Error:
+                # Views may reference tables that are not created yet; only tables matter here
+                pass
+        tables = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        column_types = {}
+        for table_name in tables:
+            columns = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+            column_types[table_name] = {
+                name: _affinity_type(declared_type) for _, name, declared_type, *_ in columns
+                if _affinity_type(declared_type) is not None
+            }
+        return column_types
+    finally:
+        conn.close()
+
+
+def _seed_schema(columns, rows, column_types):
+    """
+    Builds the schema of a table's seed file: the declared type of every
+    column, else the type inferred from all the given rows. A column that
+    is only NULL there is stored as strings, so later non-NULL rows fit.
+    """
+    fields = []
+    for index, column in enumerate(columns):
+        data_type = column_types.get(column)
+        if data_type is None:
+            data_type = pa.array([row[index] for row in rows]).type
+            if pa.types.is_null(data_type):
+                data_type = pa.string()
+        fields.append(pa.field(column, data_type))
+    return pa.schema(fields)
+
+
+def _rows_to_record_batch(rows, schema):
+    arrays = [list(values) for values in zip(*rows)] if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(arrays, schema)], schema=schema
+    )
+
+
+class SeedWriter:
+    def __init__(self, seed_dir: str = SEED_DIR, batch_size: int = SEED_BATCH_SIZE, column_types: dict = None):
+        """
+        Writes tables to seed files. Rows of the same table may be added in
+        several calls (e.g. salaries split across modules). The schema of a
+        seed file is fixed by its first call, from the declared column types.
+
+        Parameters:
+            seed_dir (str): Folder the seed files are written to.
+            batch_size (int): Rows per row group.
+            column_types (dict): Table name -> (column name -> Arrow type); the types
+                declared in load_tables_views if None.
+        """
+        self.seed_dir = seed_dir
+        self.batch_size = batch_size
+        self.column_types = declared_column_types() if column_types is None else column_types
+        self.writers = {}
+        self.row_counts = {}
+        os.makedirs(seed_dir, exist_ok=True)
+
+    def write_rows(self, table_name: str, columns: tuple, rows: list):
+        """
+        Appends rows to a table's seed file.
+
+        Parameters:
+            table_name (str): Name of the table.
+            columns (tuple): Column names.
+            rows (list): Data tuples.
+        """
+        writer = self.writers.get(table_name)
+        if writer is None:
+            schema = _seed_schema(columns, rows, self.column_types.get(table_name, {}))
+            writer = pq.ParquetWriter(seed_path(table_name, self.seed_dir), schema, compression=SEED_COMPRESSION)
+            self.writers[table_name] = writer
+        elif list(columns) != list(writer.schema.names):
+            raise ValueError(f"Column mismatch for table '{table_name}': {columns}")
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = _rows_to_record_batch(rows[start:start + self.batch_size], writer.schema)
+            writer.write_batch(batch, row_group_size=self.batch_size)
+        self.row_counts[table_name] = self.row_counts.get(table_name, 0) + len(rows)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+def convert_data_modules(data_query_dicts, seed_dir: str = SEED_DIR, batch_size: int = SEED_BATCH_SIZE):
+    """
+    Converts data dictionaries (as defined in database/tables) into seed files.
+
+    Parameters:
+        data_query_dicts (iterable): Dictionaries of table name -> (column names, data tuples).
+            A generator keeps only one module in memory at a time.
+        seed_dir (str): Folder the seed files are written to.
+        batch_size (int): Rows per row group.
+
+    Returns:
+        dict: Table name -> number of rows written.
+    """
+    writer = SeedWriter(seed_dir, batch_size)
+    try:
+        for data_query_dict in data_query_dicts:
+            for table_name, (columns, rows) in data_query_dict.items():
+                writer.write_rows(table_name, tuple(columns), rows)
+    finally:
+        writer.close()
+
+    for table_name, row_count in writer.row_counts.items():
+        print(f"Wrote {row_count} rows of '{table_name}' to {seed_path(table_name, seed_dir)}")
+    return writer.row_counts
+
+
+def iter_seed_tables(seed_dir: str = SEED_DIR, batch_size: int = SEED_BATCH_SIZE):
+    """
+    Iterates over the tables of the seed folder without reading them into memory.
+
+    Parameters:
+        seed_dir (str): Folder containing the seed files.
+        batch_size (int): Rows per yielded batch.
+
+    Yields:
+        tuple: (table name, column names, generator of lists of data tuples)
+    """
+    for path in sorted(glob.glob(os.path.join(seed_dir, "*.parquet"))):
+        table_name = os.path.splitext(os.path.basename(path))[0]
+        parquet_file = pq.ParquetFile(path)
+        columns = tuple(parquet_file.schema_arrow.names)
+
+        def row_batches(parquet_file=parquet_file):
+            for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+                yield list(zip(*(column.to_pylist() for column in record_batch.columns)))
+
+        yield table_name, columns, row_batches()
+
+
+if __name__ == "__main__":
+    from database.load_data import iter_load_data
+    convert_data_modules(iter_load_data())
@@ -0,0 +1,113 @@
+# Per-connection SQLite counters through sqlite3_db_status.
+#
+# Python's sqlite3 module does not expose sqlite3_db_status, so it is called
+# through ctypes on the library the _sqlite3 extension is linked against. The
+# sqlite3* handle is read from the private layout of CPython's sqlite3.Connection
+# (the first field after the object header), so the counters are opt-in: they
+# are only read with SQLITE_PAGE_COUNTERS=1, on the CPython versions whose
+# layout is known. Otherwise every counter is None.
+import os
+import sys
+import ctypes
+
+# Read the page cache counters through ctypes (off by default)
+PAGE_COUNTERS_ENABLED = os.getenv("SQLITE_PAGE_COUNTERS", "0").lower() in ("1", "true", "yes")
+
+# CPython versions whose pysqlite_Connection starts with the sqlite3* handle
+_KNOWN_LAYOUT_VERSIONS = ((3, 8), (3, 13))
+
+_library = None
+if (PAGE_COUNTERS_ENABLED and sys.implementation.name == "cpython"
+        and _KNOWN_LAYOUT_VERSIONS[0] <= sys.version_info[:2] <= _KNOWN_LAYOUT_VERSIONS[1]):
+    try:
+        import _sqlite3
+        _library = ctypes.CDLL(_sqlite3.__file__)
+        _library.sqlite3_db_status.argtypes = [
+            ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.c_int
+        ]
+        _library.sqlite3_db_status.restype = ctypes.c_int
+        _library.sqlite3_db_filename.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        _library.sqlite3_db_filename.restype = ctypes.c_char_p
+    except (ImportError, OSError, AttributeError):
+        _library = None
+
+# sqlite3_db_status operations (sqlite3.h)
+SQLITE_DBSTATUS_CACHE_HIT = 7
+SQLITE_DBSTATUS_CACHE_MISS = 8
+
+# Connections whose handle passed the sqlite3_db_filename check: id -> (connection, handle)
+_validated_handles = {}
+
+
+def connection_handle(conn, db_name=None):
+    """
+    Returns the sqlite3* handle of a connection.
+
+    Parameters:
+        conn (sqlite3.Connection): An open connection.
+        db_name (str): File of the main database, None for an in-memory database.
+
+    Returns:
+        int: The handle, or None if the counters are disabled, or the handle
+            cannot be read or does not belong to db_name.
+    """
+    if _library is None:
+        return None
+
+    cached = _validated_handles.get(id(conn))
+    if cached is not None and cached[0] is conn:
+        return cached[1]
+
+    handle = ctypes.c_void_p.from_address(id(conn) + object.__basicsize__).value
+    if not handle:
+        return None
+    filename = (_library.sqlite3_db_filename(handle, b"main") or b"").decode("utf-8", "replace")
+    expected = os.path.realpath(db_name) if db_name else ""
+    if (os.path.realpath(filename) if filename else "") != expected:
+        return None
+
+    _validated_handles[id(conn)] = (conn, handle)
+    return handle
+
+
+def forget_connection(conn):
+    """Drops the cached handle of a connection that is being closed."""
+    _validated_handles.pop(id(conn), None)
+
+
+def page_counters_available():
+    """
+    Returns:
+        bool: True if page_cache_counters can read the counters (SQLITE_PAGE_COUNTERS is set
+            and the sqlite3.Connection layout is known).
+    """
+    return _library is not None
+
+
+def page_cache_counters(conn, db_name=None, reset=True):
+    """
+    Reads the page cache hits and misses of a connection since the last reset.
+    A miss means the page was read from the database file. Pages served from
+    the memory map are not fetched through the page cache, so the counters
+    are only meaningful with mmap_size = 0.
+
+    Parameters:
+        conn (sqlite3.Connection): An open connection.
+        db_name (str): File of the main database, None for an in-memory database.
+        reset (bool): Reset the counters after reading them.
+
+    Returns:
+        dict: "Page Cache Hits" and "Page Cache Misses", or None if the counters are not available.
+    """
+    handle = connection_handle(conn, db_name)
+    if handle is None:
+        return None
+
+    counters = {}
+    for name, operation in (("Page Cache Hits", SQLITE_DBSTATUS_CACHE_HIT),
+                            ("Page Cache Misses", SQLITE_DBSTATUS_CACHE_MISS)):
+        current, highwater = ctypes.c_int(), ctypes.c_int()
+        if _library.sqlite3_db_status(handle, operation, ctypes.byref(current), ctypes.byref(highwater), int(reset)):
+            return None
+        counters[name] = current.value
+    return counters
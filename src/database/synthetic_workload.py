@@ -0,0 +1,623 @@
+# Synthetic evaluation workloads for the employees schema.
+#
+# Builds generated_sql/golden_sql/database_schema datasets of any size from
+# query templates over the tables of load_tables_views.TABLES_VIEWS, with a
+# controllable mix of query kinds (simple, join, aggregate, subquery) and of
+# generated variants (correct, wrong, expensive, injection-like). The same
+# seed always gives the same dataset.
+#
+# It can also build a scaled-up copy of a database: every employee-keyed row
+# is copied factor times with shifted emp_no values, so the tables grow by the
+# factor while joins keep matching.
+#
+# Run from src/ with:
+#     python -m database.synthetic_workload --rows 100000 --output ../data/synthetic_100k.csv
+#     python -m database.synthetic_workload --scale 10 --source t2s_sample.db --target t2s_sample_x10.db
+import os
+import re
+import time
+import random
+import sqlite3
+import argparse
+
+import pandas as pd
+import sqlparse
+
+from database.load_tables_views import TABLES_VIEWS, INDEXES
+from database.config_and_populate_db import (
+    DB_NAME, FAST_LOAD_PRAGMAS, DEFAULT_PRAGMAS, configure_db, execute_queries, commit_n_close_db,
+)
+
+
+# Query kinds and their default weights
+QUERY_KINDS = {"simple": 1.0, "join": 1.0, "aggregate": 1.0, "subquery": 1.0}
+
+# Share of rows whose generated query differs from the golden one
+DEFAULT_WRONG_RATE = 0.15
+DEFAULT_EXPENSIVE_RATE = 0.10
+DEFAULT_INJECTION_RATE = 0.05
+
+# Variant of the injected queries that do not parse
+SYNTAX_ERROR_VARIANT = "injection_syntax_error"
+
+# Share of correct rows whose generated query is reformatted rather than identical
+REFORMAT_RATE = 0.3
+
+DEFAULT_SEED = 42
+
+# Values drawn when no database is given to read them from
+DEFAULT_DOMAIN = {
+    "emp_no": (10001, 499999),
+    "years": (1985, 2000),
+    "dept_nos": [f"d{number:03d}" for number in range(1, 10)],
+    "titles": ["Senior Engineer", "Staff", "Engineer", "Senior Staff", "Assistant Engineer",
+               "Technique Leader", "Manager"],
+    "last_names": ["Facello", "Simmel", "Bamford", "Koblick", "Maliniak", "Preusig", "Zielinski", "Kalloufi"],
+    "salaries": (40000, 130000),
+}
+
+CURRENT = "9999-01-01"
+
+
+def load_domain(db_name: str = None):
+    """
+    Reads the value ranges the templates draw from a database, falling back
+    to DEFAULT_DOMAIN for anything it does not contain.
+
+    Parameters:
+        db_name (str): SQLite database file, or None for the defaults.
+
+    Returns:
+        dict: Same keys as DEFAULT_DOMAIN.
+    """
+    domain = {key: value for key, value in DEFAULT_DOMAIN.items()}
+    if not db_name or not os.path.exists(db_name):
+        return domain
+
+    conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True)
+    try:
+        lookups = {
+            "emp_no": "SELECT MIN(emp_no), MAX(emp_no) FROM employees",
+            "years": "SELECT CAST(MIN(substr(hire_date, 1, 4)) AS INTEGER), "
+                     "CAST(MAX(substr(hire_date, 1, 4)) AS INTEGER) FROM employees",
+            "salaries": "SELECT MIN(salary), MAX(salary) FROM salaries",
+        }
+        for key, query in lookups.items():
+            low, high = conn.execute(query).fetchone()
+            if low is not None and high is not None:
+                domain[key] = (low, high)
+        for key, query in (("dept_nos", "SELECT dept_no FROM departments ORDER BY dept_no"),
+                           ("titles", "SELECT DISTINCT title FROM titles"),
+                           ("last_names", "SELECT DISTINCT last_name FROM employees LIMIT 200")):
+            values = [value for (value,) in conn.execute(query).fetchall()]
+            if values:
+                domain[key] = values
+    except sqlite3.Error as e:
+        print(f"Could not read value ranges from '{db_name}' ({e}); using the defaults.")
+    finally:
+        conn.close()
+    return domain
+
+
+def schema_descriptions():
+    """
+    Describes every table of TABLES_VIEWS in the format of the database_schema
+    column of the sample dataset.
+
+    Returns:
+        dict: Table name -> description.
+    """
+    conn = sqlite3.connect(":memory:")
+    try:
+        for query in TABLES_VIEWS:
+            conn.execute(query)
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY rowid"
+        ).fetchall()]
+        descriptions = {}
+        for table in tables:
+            columns = conn.execute(f"PRAGMA table_info('{table}')").fetchall()
+            lines = [f"Table {table.capitalize()}:"]
+            lines.extend(f"        - {column[1]}  {column[2]}" for column in columns)
+            descriptions[table] = "\n".join(lines)
+        return descriptions
+    finally:
+        conn.close()
+
+
+# Templates: function(rng, domain) -> dict with the tables the query reads,
+# the golden query and its wrong and expensive variants. Expensive variants
+# return the same rows through a plan that scans, sorts or re-evaluates more.
+
+def _year(rng, domain):
+    return rng.randint(*domain["years"])
+
+
+def _employee_by_number(rng, domain):
+    emp_no = rng.randint(*domain["emp_no"])
+    return {
+        "tables": ["employees"],
+        "golden": f"SELECT first_name, last_name, hire_date FROM employees WHERE emp_no = {emp_no};",
+        "wrong": f"SELECT first_name, last_name, hire_date FROM employees WHERE emp_no = {emp_no + 1};",
+        "expensive": f"SELECT first_name, last_name, hire_date FROM employees WHERE CAST(emp_no AS TEXT) = '{emp_no}';",
+    }
+
+
+def _employees_by_gender_and_year(rng, domain):
+    gender, year = rng.choice("MF"), _year(rng, domain)
+    return {
+        "tables": ["employees"],
+        "golden": f"SELECT emp_no, first_name, last_name FROM employees "
+                  f"WHERE gender = '{gender}' AND hire_date BETWEEN '{year}-01-01' AND '{year}-12-31';",
+        "wrong": f"SELECT emp_no, first_name, last_name FROM employees "
+                 f"WHERE gender = '{'F' if gender == 'M' else 'M'}' AND hire_date BETWEEN '{year}-01-01' AND '{year}-12-31';",
+        "expensive": f"SELECT emp_no, first_name, last_name FROM employees "
+                     f"WHERE lower(gender) = '{gender.lower()}' AND strftime('%Y', hire_date) = '{year}';",
+    }
+
+
+def _employees_by_last_name(rng, domain):
+    last_name = rng.choice(domain["last_names"])
+    return {
+        "tables": ["employees"],
+        "golden": f"SELECT emp_no, first_name, birth_date FROM employees WHERE last_name = '{last_name}';",
+        "wrong": f"SELECT emp_no, first_name, birth_date FROM employees WHERE first_name = '{last_name}';",
+        "expensive": f"SELECT emp_no, first_name, birth_date FROM employees WHERE last_name || '' = '{last_name}';",
+    }
+
+
+def _current_salaries_above(rng, domain):
+    low, high = domain["salaries"]
+    salary = rng.randrange(low, high, 1000) if high - low > 1000 else low
+    return {
+        "tables": ["salaries"],
+        "golden": f"SELECT emp_no, salary FROM salaries WHERE to_date = '{CURRENT}' AND salary > {salary};",
+        "wrong": f"SELECT emp_no, salary FROM salaries WHERE salary > {salary};",
+        "expensive": f"SELECT DISTINCT emp_no, salary FROM salaries "
+                     f"WHERE to_date = '{CURRENT}' AND salary + 0 > {salary} ORDER BY salary DESC, emp_no;",
+    }
+
+
+def _department_staff(rng, domain):
+    dept_no = rng.choice(domain["dept_nos"])
+    return {
+        "tables": ["employees", "dept_emp", "departments"],
+        "golden": "SELECT e.first_name, e.last_name, d.dept_name FROM employees e "
+                  "JOIN dept_emp de ON e.emp_no = de.emp_no JOIN departments d ON de.dept_no = d.dept_no "
+                  f"WHERE d.dept_no = '{dept_no}' AND de.to_date = '{CURRENT}';",
+        "wrong": "SELECT e.first_name, e.last_name, d.dept_name FROM employees e "
+                 "JOIN dept_emp de ON e.emp_no = de.emp_no JOIN departments d ON de.dept_no = d.dept_no "
+                 f"WHERE d.dept_no = '{dept_no}';",
+        "expensive": "SELECT e.first_name, e.last_name, d.dept_name FROM employees e, dept_emp de, departments d "
+                     "WHERE e.emp_no = de.emp_no AND de.dept_no = d.dept_no "
+                     f"AND d.dept_name = (SELECT dept_name FROM departments WHERE dept_no = '{dept_no}') "
+                     f"AND de.to_date LIKE '{CURRENT}%';",
+    }
+
+
+def _department_managers(rng, domain):
+    return {
+        "tables": ["employees", "dept_manager", "departments"],
+        "golden": "SELECT d.dept_name, e.first_name, e.last_name, m.from_date FROM dept_manager m "
+                  "JOIN employees e ON m.emp_no = e.emp_no JOIN departments d ON m.dept_no = d.dept_no "
+                  "ORDER BY d.dept_name, m.from_date;",
+        "wrong": "SELECT d.dept_name, e.first_name, e.last_name, m.from_date FROM dept_manager m "
+                 "JOIN employees e ON m.emp_no = e.emp_no JOIN departments d ON m.dept_no = d.dept_no "
+                 f"WHERE m.to_date = '{CURRENT}' ORDER BY d.dept_name, m.from_date;",
+        "expensive": "SELECT d.dept_name, e.first_name, e.last_name, m.from_date FROM dept_manager m "
+                     "JOIN employees e ON m.emp_no = e.emp_no JOIN departments d ON m.dept_no = d.dept_no "
+                     "ORDER BY lower(d.dept_name), m.from_date;",
+    }
+
+
+def _title_salaries(rng, domain):
+    title = rng.choice(domain["titles"])
+    return {
+        "tables": ["titles", "salaries"],
+        "golden": "SELECT t.emp_no, s.salary FROM titles t JOIN salaries s ON t.emp_no = s.emp_no "
+                  f"WHERE t.title = '{title}' AND t.to_date = '{CURRENT}' AND s.to_date = '{CURRENT}';",
+        "wrong": "SELECT t.emp_no, s.salary FROM titles t JOIN salaries s ON t.emp_no = s.emp_no "
+                 f"WHERE t.title = '{title}' AND s.to_date = '{CURRENT}';",
+        "expensive": "SELECT t.emp_no, s.salary FROM titles t JOIN salaries s ON t.emp_no = s.emp_no "
+                     f"WHERE upper(t.title) = '{title.upper()}' AND t.to_date = '{CURRENT}' "
+                     f"AND s.to_date = '{CURRENT}' ORDER BY t.emp_no;",
+    }
+
+
+def _average_salary_by_department(rng, domain):
+    return {
+        "tables": ["dept_emp", "salaries", "departments"],
+        "golden": "SELECT d.dept_name, AVG(s.salary) AS avg_salary FROM dept_emp de "
+                  "JOIN salaries s ON de.emp_no = s.emp_no JOIN departments d ON de.dept_no = d.dept_no "
+                  f"WHERE s.to_date = '{CURRENT}' GROUP BY d.dept_name ORDER BY d.dept_name;",
+        "wrong": "SELECT d.dept_name, MAX(s.salary) AS avg_salary FROM dept_emp de "
+                 "JOIN salaries s ON de.emp_no = s.emp_no JOIN departments d ON de.dept_no = d.dept_no "
+                 f"WHERE s.to_date = '{CURRENT}' GROUP BY d.dept_name ORDER BY d.dept_name;",
+        "expensive": "SELECT d.dept_name, (SELECT AVG(s.salary) FROM dept_emp de JOIN salaries s ON de.emp_no = s.emp_no "
+                     f"WHERE de.dept_no = d.dept_no AND s.to_date = '{CURRENT}') AS avg_salary "
+                     "FROM departments d ORDER BY d.dept_name;",
+    }
+
+
+def _hires_per_year(rng, domain):
+    gender = rng.choice("MF")
+    return {
+        "tables": ["employees"],
+        "golden": "SELECT substr(hire_date, 1, 4) AS year, COUNT(*) AS hires FROM employees "
+                  f"WHERE gender = '{gender}' GROUP BY year ORDER BY year;",
+        "wrong": "SELECT substr(hire_date, 1, 4) AS year, COUNT(DISTINCT gender) AS hires FROM employees "
+                 f"WHERE gender = '{gender}' GROUP BY year ORDER BY year;",
+        "expensive": "SELECT year, COUNT(*) AS hires FROM (SELECT DISTINCT emp_no, strftime('%Y', hire_date) AS year "
+                     f"FROM employees WHERE gender = '{gender}') GROUP BY year ORDER BY year;",
+    }
+
+
+def _title_counts(rng, domain):
+    return {
+        "tables": ["titles"],
+        "golden": f"SELECT title, COUNT(*) AS employees FROM titles WHERE to_date = '{CURRENT}' "
+                  "GROUP BY title ORDER BY employees DESC;",
+        "wrong": "SELECT title, COUNT(*) AS employees FROM titles GROUP BY title ORDER BY employees DESC;",
+        "expensive": "SELECT title, COUNT(DISTINCT emp_no || '-' || from_date) AS employees FROM titles "
+                     f"WHERE to_date = '{CURRENT}' GROUP BY title ORDER BY employees DESC;",
+    }
+
+
+def _salaries_above_average(rng, domain):
+    year = _year(rng, domain)
+    return {
+        "tables": ["salaries"],
+        "golden": "SELECT emp_no, salary FROM salaries "
+                  f"WHERE from_date BETWEEN '{year}-01-01' AND '{year}-12-31' AND salary > "
+                  f"(SELECT AVG(salary) FROM salaries WHERE from_date BETWEEN '{year}-01-01' AND '{year}-12-31');",
+        "wrong": "SELECT emp_no, salary FROM salaries "
+                 f"WHERE from_date BETWEEN '{year}-01-01' AND '{year}-12-31' AND salary > "
+                 "(SELECT AVG(salary) FROM salaries);",
+        "expensive": "SELECT s.emp_no, s.salary FROM salaries s "
+                     f"WHERE strftime('%Y', s.from_date) = '{year}' AND s.salary > "
+                     f"(SELECT AVG(s2.salary) FROM salaries s2 WHERE strftime('%Y', s2.from_date) = '{year}');",
+    }
+
+
+def _highest_paid_per_employee(rng, domain):
+    low, high = domain["emp_no"]
+    start = rng.randint(low, max(low, high - 1000))
+    return {
+        "tables": ["salaries"],
+        "golden": f"SELECT emp_no, MAX(salary) AS top_salary FROM salaries "
+                  f"WHERE emp_no BETWEEN {start} AND {start + 999} GROUP BY emp_no;",
+        "wrong": f"SELECT emp_no, MAX(salary) AS top_salary FROM salaries "
+                 f"WHERE emp_no BETWEEN {start} AND {start + 99} GROUP BY emp_no;",
+        "expensive": "SELECT DISTINCT s.emp_no, s.salary AS top_salary FROM salaries s "
+                     f"WHERE s.emp_no BETWEEN {start} AND {start + 999} "
+                     "AND s.salary = (SELECT MAX(s2.salary) FROM salaries s2 WHERE s2.emp_no = s.emp_no) "
+                     "ORDER BY s.emp_no;",
+    }
+
+
+def _former_managers(rng, domain):
+    return {
+        "tables": ["employees", "dept_manager"],
+        "golden": "SELECT emp_no, first_name, last_name FROM employees "
+                  f"WHERE emp_no IN (SELECT emp_no FROM dept_manager WHERE to_date <> '{CURRENT}');",
+        "wrong": "SELECT emp_no, first_name, last_name FROM employees "
+                 "WHERE emp_no IN (SELECT emp_no FROM dept_manager);",
+        "expensive": "SELECT e.emp_no, e.first_name, e.last_name FROM employees e "
+                     "WHERE EXISTS (SELECT 1 FROM dept_manager m "
+                     f"WHERE m.emp_no + 0 = e.emp_no AND m.to_date <> '{CURRENT}');",
+    }
+
+
+def _employees_without_title(rng, domain):
+    year = _year(rng, domain)
+    return {
+        "tables": ["employees", "titles"],
+        "golden": "SELECT emp_no, first_name, last_name FROM employees "
+                  f"WHERE hire_date >= '{year}-01-01' AND emp_no NOT IN (SELECT emp_no FROM titles);",
+        "wrong": "SELECT emp_no, first_name, last_name FROM employees "
+                 f"WHERE hire_date >= '{year}-01-01' AND emp_no IN (SELECT emp_no FROM titles);",
+        "expensive": "SELECT e.emp_no, e.first_name, e.last_name FROM employees e "
+                     "LEFT JOIN (SELECT DISTINCT emp_no FROM titles) t ON e.emp_no = t.emp_no "
+                     f"WHERE e.hire_date >= '{year}-01-01' AND t.emp_no IS NULL;",
+    }
+
+
+TEMPLATES = {
+    "simple": [_employee_by_number, _employees_by_gender_and_year, _employees_by_last_name, _current_salaries_above],
+    "join": [_department_staff, _department_managers, _title_salaries],
+    "aggregate": [_average_salary_by_department, _hires_per_year, _title_counts],
+    "subquery": [_salaries_above_average, _highest_paid_per_employee, _former_managers, _employees_without_title],
+}
+
+_FIRST_LITERAL = re.compile(r"'([^']*)'")
+_TRAILING_CLAUSE = re.compile(r"\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT)\b", re.IGNORECASE)
+
+# Columns of sqlite_master a UNION injection reads, as many as the query returns
+_UNION_COLUMNS = ["name", "sql", "type", "tbl_name", "rootpage"]
+
+
+def _outer_clause_start(sql):
+    """Returns where the GROUP BY, ORDER BY or LIMIT of the outer query starts, or None."""
+    depth = 0
+    for position, character in enumerate(sql):
+        depth += {"(": 1, ")": -1}.get(character, 0)
+        if depth == 0 and character.isalpha() and (position == 0 or not sql[position - 1].isalnum()):
+            if _TRAILING_CLAUSE.match(sql, position):
+                return position
+    return None
+
+
+def _split_outer_clauses(sql):
+    """Splits a query before the trailing clauses of its outer query."""
+    sql = sql.rstrip().rstrip(";")
+    start = _outer_clause_start(_FIRST_LITERAL.sub(lambda match: "'" + "_" * len(match.group(1)) + "'", sql))
+    return (sql, "") if start is None else (sql[:start].rstrip(), sql[start:])
+
+
+# Injection-like rewrites of a golden query. The text they add goes where the
+# query still parses; generate_workload checks that it does.
+def _inject_tautology(sql, columns):
+    if _FIRST_LITERAL.search(sql):
+        return _FIRST_LITERAL.sub(lambda match: f"'{match.group(1)}' OR '1'='1'", sql, count=1)
+    head, tail = _split_outer_clauses(sql)
+    keyword = " AND " if re.search(r"\bWHERE\b", head, re.IGNORECASE) else " WHERE "
+    return f"{head}{keyword}1=1 OR 1=1 {tail}".rstrip() + ";"
+
+
+def _inject_comment(sql, columns):
+    return sql.rstrip(";") + " -- ' OR '1'='1"
+
+
+def _inject_union(sql, columns):
+    # The clauses after the injected SELECT are commented out, as an attacker would
+    head, tail = _split_outer_clauses(sql)
+    selected = (_UNION_COLUMNS + ["NULL"] * columns)[:columns]
+    union = f"{head} UNION SELECT {', '.join(selected)} FROM sqlite_master"
+    return f"{union} -- {tail}" if tail else union + ";"
+
+
+def _inject_stacked_drop(sql, columns):
+    # The DROP stays inside a string literal, so executing the query cannot change the database
+    if _FIRST_LITERAL.search(sql):
+        return _FIRST_LITERAL.sub(lambda match: f"'{match.group(1)}''; DROP TABLE employees; --'", sql, count=1)
+    return sql.rstrip(";") + " -- '; DROP TABLE employees"
+
+
+INJECTIONS = [_inject_tautology, _inject_comment, _inject_union, _inject_stacked_drop]
+
+
+def schema_connection():
+    """
+    Returns:
+        sqlite3.Connection: An in-memory database with the tables and views of
+            TABLES_VIEWS, to check that generated queries parse.
+    """
+    conn = sqlite3.connect(":memory:")
+    for query in TABLES_VIEWS:
+        conn.execute(query)
+    return conn
+
+
+def result_columns(conn, sql):
+    """
+    Returns:
+        int: Number of columns the query returns, or None if it does not parse.
+    """
+    try:
+        return len(conn.execute(sql).description)
+    except (sqlite3.Error, sqlite3.Warning):
+        return None
+
+
+def inject(rng, conn, golden):
+    """
+    Rewrites a golden query with a random injection among those that still parse.
+
+    Parameters:
+        rng (random.Random): Random generator.
+        conn (sqlite3.Connection): Result of schema_connection.
+        golden (str): The golden query.
+
+    Returns:
+        tuple: (generated query, True if it parses). If no injection parses, the
+            randomly chosen one is returned anyway.
+    """
+    columns = result_columns(conn, golden)
+    candidates = [injection(golden, columns or 1) for injection in INJECTIONS]
+    valid = [candidate for candidate in candidates if result_columns(conn, candidate) is not None]
+    if valid:
+        return rng.choice(valid), True
+    return rng.choice(candidates), False
+
+
+def parse_mix(text):
+    """
+    Parses "kind=weight,..." into query kind weights; kinds left out get weight 0.
+
+    Parameters:
+        text (str): e.g. "join=2,aggregate=1".
+
+    Returns:
+        dict: Query kind -> weight.
+    """
+    mix = dict.fromkeys(QUERY_KINDS, 0.0)
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        kind, _, weight = part.partition("=")
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Unknown query kind '{kind}'. Expected one of {list(QUERY_KINDS)}.")
+        mix[kind] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise ValueError("The mix needs at least one query kind with a positive weight.")
+    return mix
+
+
+def generate_workload(rows: int, mix: dict = None, wrong_rate: float = DEFAULT_WRONG_RATE,
+                      expensive_rate: float = DEFAULT_EXPENSIVE_RATE, injection_rate: float = DEFAULT_INJECTION_RATE,
+                      seed: int = DEFAULT_SEED, domain: dict = None):
+    """
+    Generates an evaluation dataset from the query templates.
+
+    Parameters:
+        rows (int): Number of rows.
+        mix (dict): Query kind -> weight, QUERY_KINDS if None.
+        wrong_rate (float): Share of generated queries that return different rows.
+        expensive_rate (float): Share of generated queries that return the same rows through a costlier plan.
+        injection_rate (float): Share of generated queries with an injection-like string.
+        seed (int): Random seed; the same seed gives the same dataset.
+        domain (dict): Value ranges (see load_domain), DEFAULT_DOMAIN if None.
+
+    Returns:
+        pd.DataFrame: generated_sql, golden_sql and database_schema, plus the
+            query kind and variant of every row. Injected queries that do not
+            parse are labelled SYNTAX_ERROR_VARIANT.
+    """
+    if wrong_rate + expensive_rate + injection_rate > 1:
+        raise ValueError("The wrong, expensive and injection rates add up to more than 1.")
+
+    rng = random.Random(seed)
+    mix = mix or QUERY_KINDS
+    domain = domain or DEFAULT_DOMAIN
+    kinds = [kind for kind in mix if mix[kind] > 0]
+    weights = [mix[kind] for kind in kinds]
+    descriptions = schema_descriptions()
+    conn = schema_connection()
+    variants = ["wrong", "expensive", "injection", "correct"]
+    variant_weights = [wrong_rate, expensive_rate, injection_rate, 1 - wrong_rate - expensive_rate - injection_rate]
+
+    records = []
+    for _ in range(rows):
+        kind = rng.choices(kinds, weights)[0]
+        query = rng.choice(TEMPLATES[kind])(rng, domain)
+        variant = rng.choices(variants, variant_weights)[0]
+        golden = query["golden"]
+        if variant in ("wrong", "expensive"):
+            generated = query[variant]
+        elif variant == "injection":
+            generated, parses = inject(rng, conn, golden)
+            if not parses:
+                variant = SYNTAX_ERROR_VARIANT
+        elif rng.random() < REFORMAT_RATE:
+            generated = sqlparse.format(golden, reindent=True, keyword_case="upper")
+        else:
+            generated = golden
+        records.append({
+            "generated_sql": generated,
+            "golden_sql": golden,
+            # Only the tables the query reads, as in the sample dataset
+            "database_schema": "\n\n".join(descriptions[table] for table in query["tables"]),
+            "query_kind": kind,
+            "variant": variant,
+        })
+    conn.close()
+    return pd.DataFrame(records)
+
+
+def scale_database(source_db: str, target_db: str, factor: int):
+    """
+    Creates a database with factor copies of every employee of source_db.
+    Copy k shifts every emp_no by k times the emp_no range, so the rows of
+    each copy join with each other exactly as the originals do. Departments
+    are copied once.
+
+    Parameters:
+        source_db (str): Populated SQLite database file.
+        target_db (str): Database file to create (replaced if it exists).
+        factor (int): Number of copies.
+
+    Returns:
+        dict: Table name -> rows inserted.
+    """
+    if factor < 1:
+        raise ValueError("The scale factor must be at least 1.")
+    if os.path.abspath(source_db) == os.path.abspath(target_db):
+        raise ValueError("The scaled database must be written to a different file.")
+    if not os.path.exists(source_db):
+        raise FileNotFoundError(f"Database '{source_db}' not found.")
+
+    conn = configure_db(target_db)
+    conn.isolation_level = None
+    execute_queries(FAST_LOAD_PRAGMAS, conn)
+    execute_queries(TABLES_VIEWS, conn)
+    conn.execute("ATTACH DATABASE ? AS seed", (source_db,))
+
+    row_counts = {}
+    try:
+        max_emp_no = 0
+        for table in ("employees", "salaries", "titles", "dept_emp", "dept_manager"):
+            max_emp_no = max(max_emp_no, conn.execute(f"SELECT COALESCE(MAX(emp_no), 0) FROM seed.{table}").fetchone()[0])
+        stride = max_emp_no + 1
+
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM main.sqlite_master WHERE type = 'table' ORDER BY rowid"
+        ).fetchall()]
+        for table in tables:
+            columns = [column[1] for column in conn.execute(f"PRAGMA main.table_info('{table}')").fetchall()]
+            column_list = ", ".join(columns)
+            copies = factor if "emp_no" in columns else 1
+            shifted = ", ".join("emp_no + ?" if column == "emp_no" else column for column in columns)
+
+            start_time = time.perf_counter()
+            conn.execute("BEGIN")
+            try:
+                for copy in range(copies):
+                    if "emp_no" in columns:
+                        conn.execute(f"INSERT INTO main.{table} ({column_list}) SELECT {shifted} FROM seed.{table}",
+                                     (copy * stride,))
+                    else:
+                        conn.execute(f"INSERT INTO main.{table} ({column_list}) SELECT {column_list} FROM seed.{table}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            elapsed = time.perf_counter() - start_time
+            row_counts[table] = conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+            print(f"Loaded {row_counts[table]} rows into '{table}' ({copies}x) in {elapsed:.2f}s "
+                  f"({row_counts[table] / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        conn.execute("DETACH DATABASE seed")
+
+    execute_queries(INDEXES, conn)
+    execute_queries(["ANALYZE"], conn)
+    execute_queries(DEFAULT_PRAGMAS, conn)
+    commit_n_close_db(conn)
+    return row_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates synthetic evaluation workloads for the employees schema.")
+    parser.add_argument("--rows", type=int, help="Rows of the generated dataset")
+    parser.add_argument("--output", help="CSV file for the generated dataset")
+    parser.add_argument("--mix", default=",".join(QUERY_KINDS),
+                        help="Query kind weights, e.g. 'simple=1,join=2,aggregate=1,subquery=1'")
+    parser.add_argument("--wrong", type=float, default=DEFAULT_WRONG_RATE, help="Share of wrong generated queries")
+    parser.add_argument("--expensive", type=float, default=DEFAULT_EXPENSIVE_RATE,
+                        help="Share of expensive generated queries")
+    parser.add_argument("--injection", type=float, default=DEFAULT_INJECTION_RATE,
+                        help="Share of injection-like generated queries")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("--scale", type=int, help="Build a database with this many copies of the source data")
+    parser.add_argument("--source", default=DB_NAME, help="Database to scale up and to read value ranges from")
+    parser.add_argument("--target", help="Scaled database file (default: <source>_x<scale>.db)")
+    args = parser.parse_args()
+
+    if args.rows is None and args.scale is None:
+        parser.error("Nothing to do: pass --rows and/or --scale.")
+
+    domain_db = args.source
+    if args.scale:
+        target = args.target or f"{os.path.splitext(args.source)[0]}_x{args.scale}.db"
+        scale_database(args.source, target, args.scale)
+        domain_db = target
+
+    if args.rows:
+        df = generate_workload(args.rows, parse_mix(args.mix), args.wrong, args.expensive, args.injection,
+                               args.seed, load_domain(domain_db))
+        output = args.output or f"synthetic_{args.rows}.csv"
+        df.to_csv(output, index=False)
+        counts = df.groupby(["query_kind", "variant"]).size().unstack(fill_value=0)
+        print(f"Wrote {len(df)} rows to {output}:")
+        print(counts.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import streamlit as st
 import pandas as pd
 import os
 import base64
+import hashlib
 import asyncio
 import warnings
 
@@ -19,20 +20,19 @@ from metrics.consistency_score import evaluate_queries_consistency
 from metrics.validate_syntax import validate_syntax_and_store_metrics
 
 # Import UI and service helpers
-from services.background import add_bg_from_local, add_footer, set_custom_title, set_custom_subtitle
-from services.database_service import setup_database, execute_query, cleanup
+from services.background import add_bg_from_static, add_footer, set_custom_title, set_custom_subtitle
+from services.database_service import setup_database, execute_query, cleanup, DB_BACKEND
+from database.backends import BACKENDS, SQLITE_BACKEND
 from services.display_metrics import display_metrics_by_type
 from services.progress_bars import (
     display_metric_with_custom_progress_bar,
     display_metric_with_benchmark_progress_bar,
     display_simple_progress_bar
 )
-from services.evaluate_services import (
-    evaluate_equivalence_metrics,
-    evaluate_for_col_generate_sql,
-    evaluate_for_col_generate_sql_golden_sql,
-    evaluate_for_col_generate_sql_golden_sql_db_schema
-)
+from services.metric_registry import select_metrics
+from services.display_jobs import run_evaluation_job
+from services.model_comparison import detect_models
+from services.display_comparison import run_model_comparison
 
 # Suppress warnings globally for a cleaner UI
 warnings.filterwarnings("ignore")
@@ -65,14 +65,11 @@ st.markdown(custom_css, unsafe_allow_html=True)
 add_footer()
 
 # Add a background image to the app
-add_bg_from_local("image/bimage2.jpg")
+add_bg_from_static("bimage2.jpg")
 
 # Display the main title in the center of the app
 set_custom_title("Text-to-SQL Pipeline Evaluator", "#ffffff")
 
-# Set up the database connection (returns a db_manager object)
-db_manager = setup_database()
-
 # Create three columns for layout; file uploader goes in the center column
 col1, col2, col3 = st.columns([1, 1, 1])
 
@@ -80,6 +77,23 @@ col1, col2, col3 = st.columns([1, 1, 1])
 with col2:
     uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"])
 
+    # Database engine the queries of this run are executed on
+    backend = st.radio(
+        "Execution backend",
+        BACKENDS,
+        index=BACKENDS.index(DB_BACKEND),
+        format_func={"sqlite": "SQLite", "duckdb": "DuckDB"}.get,
+        horizontal=True,
+    )
+    if backend != SQLITE_BACKEND:
+        st.caption(
+            "Scores on DuckDB are not directly comparable with SQLite: DuckDB rejects some SQLite SQL "
+            "(e.g. strftime on text dates, loose GROUP BY) and divides integers as floats."
+        )
+
+# Set up the database connection of the selected backend (returns the db_manager shared across reruns and sessions)
+db_manager = setup_database(backend)
+
 
 # Show CSV requirements/instructions in the center column
 with col2:
@@ -90,12 +104,20 @@ with col2:
         - **`golden_sql`** (optional but recommended): Needed to calculate ground-truth based metrics, 
           such as **Entity Recognition Score** and **Data Retrieval Accuracy**.
         - **`database_schema`** (optional): Required to compute **SQL Semantic Equivalence**.
+        - **`generated_sql_<model>`** (optional, instead of `generated_sql`): one column per model to compare
+          several models side by side on the same questions.
     ''')
 
 # If a file is uploaded, process it
 if uploaded_file:
     uploaded_df = pd.read_csv(uploaded_file)
 
+    # Results of the previous run of the same file are reused for unchanged rows
+    dataset_id = uploaded_file.name
+
+    # Metric results are cached against the file content, so reruns do not recompute them
+    file_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
     # Check if the uploaded file is not empty
     if not uploaded_df.empty:
         try:
@@ -107,20 +129,26 @@ if uploaded_file:
             # Only 'generated_sql' column present
             if has_generated_sql and not has_golden_sql and not has_database_schema:
                 st.write("Your CSV file contains only 'generated_sql' columns.")
-                st.info("Hold tight while the metrics are being calculated...")
-                evaluate_for_col_generate_sql(uploaded_df)
 
             # Both 'generated_sql' and 'golden_sql' columns present
             if has_generated_sql and has_golden_sql and not has_database_schema:
                 st.write("Your CSV file contains 'generated_sql' and 'golden_sql' columns.")
-                st.info("Hold tight while the metrics are being calculated...")
-                evaluate_for_col_generate_sql_golden_sql(uploaded_df)
 
             # All three columns present
             if has_generated_sql and has_golden_sql and has_database_schema:
                 st.write("Your CSV file contains all 3 columns.")
-                st.info("Hold tight while the metrics are being calculated...")
-                evaluate_for_col_generate_sql_golden_sql_db_schema(uploaded_df)
+
+            # Several generated_sql_<model> columns: the models are compared side by side,
+            # sharing the work done on the golden queries
+            models = detect_models(uploaded_df.columns)
+            if models:
+                run_model_comparison(uploaded_df, models, dataset_id, file_hash, backend)
+
+            # Every registered metric whose required columns are present is computed
+            # by a background job; partial results show up as rows finish
+            metric_names = select_metrics(uploaded_df.columns)
+            if metric_names:
+                run_evaluation_job(uploaded_df, metric_names, dataset_id, file_hash, backend)
 
         except Exception as e:
             # Display any error that occurs during metric evaluation
@@ -129,6 +157,3 @@ if uploaded_file:
         # Warn if the uploaded CSV is empty
         st.warning("The uploaded CSV file is empty. Please provide a valid file.")
 
-# Clean up database connections or resources at the end
-cleanup()
-
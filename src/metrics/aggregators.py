@@ -0,0 +1,350 @@
+import copy
+import math
+import numbers
+
+import numpy as np
+import pandas as pd
+
+
+# Relative error of the quantiles reported by the sketch (1%)
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+# Bins kept per sign; beyond this the bins of the smallest magnitudes are collapsed,
+# so the tail quantiles stay accurate
+SKETCH_MAX_BINS = 2048
+
+# Quantiles reported in the summaries, as percentages
+REPORTED_PERCENTILES = (50, 95, 99)
+
+# Summary key holding column -> {"p50": ..., "p95": ..., "p99": ...}
+PERCENTILES_KEY = "Percentiles"
+
+
+def _finite_values(values):
+    """
+    Returns:
+        np.ndarray: The values as floats, without None, NaN and infinities.
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY, max_bins: int = SKETCH_MAX_BINS):
+        """
+        Approximate quantiles in bounded memory (DDSketch). Values are counted
+        in logarithmically sized bins, so every quantile is within
+        relative_accuracy of the exact value. Sketches with the same accuracy
+        are merged by adding their bin counts.
+
+        Parameters:
+            relative_accuracy (float): Relative error of the reported quantiles.
+            max_bins (int): Bins kept for the positive and for the negative values.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("The relative accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        # Bin key -> count, for positive values and for the magnitudes of negative values
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+        # Exact extremes, reported instead of the midpoint of their bin
+        self.min = float("nan")
+        self.max = float("nan")
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self.log_gamma)
+
+    def _add_keys(self, bins, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            bins[key] = bins.get(key, 0) + count
+        self._collapse(bins)
+
+    def _collapse(self, bins):
+        if len(bins) <= self.max_bins:
+            return
+        keys = sorted(bins)
+        excess = keys[:len(keys) - self.max_bins + 1]
+        merged = sum(bins.pop(key) for key in excess)
+        bins[excess[-1]] = merged
+
+    def update(self, values):
+        """
+        Adds values to the sketch; None and NaN are ignored.
+
+        Parameters:
+            values (iterable): Numbers to add.
+        """
+        values = _finite_values(values)
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        self.min = float(values.min()) if math.isnan(self.min) else min(self.min, float(values.min()))
+        self.max = float(values.max()) if math.isnan(self.max) else max(self.max, float(values.max()))
+        self.zero_count += int(np.count_nonzero(values == 0))
+        if np.any(values > 0):
+            self._add_keys(self.positive, values[values > 0])
+        if np.any(values < 0):
+            self._add_keys(self.negative, -values[values < 0])
+
+    def add(self, value):
+        self.update([value])
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch to this one.
+
+        Parameters:
+            other (QuantileSketch): A sketch with the same relative accuracy.
+        """
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        for bins, other_bins in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_bins.items():
+                bins[key] = bins.get(key, 0) + count
+            self._collapse(bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for bound in (other.min, other.max):
+            if not math.isnan(bound):
+                self.min = bound if math.isnan(self.min) else min(self.min, bound)
+                self.max = bound if math.isnan(self.max) else max(self.max, bound)
+        return self
+
+    def _value(self, key, sign):
+        for bound in (self.min, self.max):
+            if bound * sign > 0 and self._key(abs(bound)) == key:
+                return bound
+        # Midpoint of the bin (gamma^(key-1), gamma^key], within the relative accuracy of every value in it
+        return sign * 2 * self.gamma ** key / (self.gamma + 1)
+
+    def weighted_values(self):
+        """
+        Returns:
+            tuple: (np.ndarray of the representative value of every non-empty bin,
+                in increasing order, np.ndarray of their counts)
+        """
+        values = [self._value(key, -1) for key in sorted(self.negative, reverse=True)]
+        counts = [self.negative[key] for key in sorted(self.negative, reverse=True)]
+        if self.zero_count:
+            values.append(0.0)
+            counts.append(self.zero_count)
+        values += [self._value(key, 1) for key in sorted(self.positive)]
+        counts += [self.positive[key] for key in sorted(self.positive)]
+        return np.asarray(values, dtype=float), np.asarray(counts, dtype=np.int64)
+
+    def histogram(self, bins: int = 20):
+        """
+        Histogram of the sketched values, from the bin counts: every value is
+        placed at its bin's representative value, so it may fall in the
+        neighbouring bar when it lies within the relative accuracy of an edge.
+
+        Parameters:
+            bins (int): Number of equal-width bars between the minimum and the maximum.
+
+        Returns:
+            tuple: (np.ndarray of counts, np.ndarray of the bins + 1 edges), as np.histogram;
+                empty arrays if the sketch is empty.
+        """
+        if self.count == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        values, counts = self.weighted_values()
+        # Representative values may lie just outside the exact extremes
+        values = np.clip(values, self.min, self.max)
+        counts, edges = np.histogram(values, bins=bins, range=(self.min, self.max), weights=counts)
+        return counts.astype(np.int64), edges
+
+    def quantile(self, q: float):
+        """
+        Parameters:
+            q (float): Quantile between 0 and 1.
+
+        Returns:
+            float: The approximate quantile, or NaN if the sketch is empty.
+        """
+        if self.count == 0:
+            return float("nan")
+        # Nearest rank: the smallest value with at least q of the values at or below it
+        rank = max(math.ceil(q * self.count), 1)
+
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen >= rank:
+                return self._value(key, -1)
+        seen += self.zero_count
+        if seen >= rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen >= rank:
+                return self._value(key, 1)
+        return self.max
+
+
+class StreamingAggregate:
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        """
+        Count, mean, variance, minimum and maximum computed online (Welford),
+        plus a QuantileSketch for percentiles. Aggregates of separate chunks
+        or workers are combined with merge, without keeping the raw values.
+
+        Parameters:
+            relative_accuracy (float): Relative error of the percentiles.
+        """
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared differences from the mean
+        self.m2 = 0.0
+        self.min = float("nan")
+        self.max = float("nan")
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        # Chan et al.'s parallel update of the Welford moments
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = minimum if math.isnan(self.min) else min(self.min, minimum)
+        self.max = maximum if math.isnan(self.max) else max(self.max, maximum)
+
+    def update(self, values):
+        """
+        Adds values; None and NaN are ignored.
+
+        Parameters:
+            values (iterable): Numbers to add.
+        """
+        values = _finite_values(values)
+        if values.size == 0:
+            return self
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        self._combine(int(values.size), batch_mean, batch_m2, float(values.min()), float(values.max()))
+        self.sketch.update(values)
+        return self
+
+    def add(self, value):
+        return self.update([value])
+
+    def merge(self, other):
+        """
+        Combines another aggregate into this one.
+
+        Parameters:
+            other (StreamingAggregate): Aggregate of other values.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self):
+        # Sample variance, as pandas' .var()
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def percentile(self, p: float):
+        return self.sketch.quantile(p / 100)
+
+    def percentiles(self, percentiles=REPORTED_PERCENTILES):
+        """
+        Returns:
+            dict: "p50", "p95", ... -> approximate percentile.
+        """
+        return {f"p{p:g}": self.percentile(p) for p in percentiles}
+
+    def histogram(self, bins: int = 20):
+        return self.sketch.histogram(bins)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean if self.count else float("nan"), "std": self.std,
+                "min": self.min, "max": self.max, **self.percentiles()}
+
+
+def aggregate_columns(chunks, columns):
+    """
+    Aggregates numeric columns chunk by chunk.
+
+    Parameters:
+        chunks (pd.DataFrame or iterable of pd.DataFrame): The rows, whole or in chunks.
+        columns (list): Columns to aggregate; missing columns are skipped.
+
+    Returns:
+        dict: Column -> StreamingAggregate.
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    aggregates = {column: StreamingAggregate() for column in columns}
+    for chunk in chunks:
+        for column in columns:
+            if column in chunk.columns:
+                aggregates[column].update(chunk[column])
+    return aggregates
+
+
+def _merge_into(merged, part):
+    for key, value in part.items():
+        if key not in merged:
+            merged[key] = copy.deepcopy(value)
+        elif isinstance(value, dict):
+            _merge_into(merged[key], value)
+        elif isinstance(value, (StreamingAggregate, QuantileSketch)):
+            merged[key].merge(value)
+        elif isinstance(value, numbers.Number) and not isinstance(value, bool):
+            merged[key] += value
+        else:
+            raise TypeError(f"Cannot merge the aggregate '{key}' of type {type(value).__name__}.")
+
+
+def merge_aggregates(*parts):
+    """
+    Combines the partial aggregates of separate chunks or workers, e.g. the
+    results of aggregate_columns: StreamingAggregates and sketches are merged,
+    counts are added and dictionaries are merged key by key, so summaries are
+    combined without keeping the raw rows.
+
+    Returns:
+        dict: The merged aggregates; the parts are not modified.
+    """
+    merged = {}
+    for part in parts:
+        if part is not None:
+            _merge_into(merged, part)
+    return merged
+
+
+def summarize_aggregates(aggregates, names=None, empty_value=float("nan")):
+    """
+    Turns aggregates into a metric summary: the mean of every column under its
+    summary name, and the percentiles of every column under PERCENTILES_KEY.
+
+    Parameters:
+        aggregates (dict): Column -> StreamingAggregate.
+        names (dict): Column -> name in the summary; the column itself if missing.
+        empty_value: Mean reported for a column without values.
+
+    Returns:
+        dict: The summary.
+    """
+    names = names or {}
+    summary, percentiles = {}, {}
+    for column, aggregate in aggregates.items():
+        name = names.get(column, column)
+        summary[name] = aggregate.mean if aggregate.count else empty_value
+        if aggregate.count:
+            percentiles[column] = aggregate.percentiles()
+    summary[PERCENTILES_KEY] = percentiles
+    return summary
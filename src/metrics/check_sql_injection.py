@@ -94,20 +94,49 @@ def detect_sql_injection_and_store_metrics(df):
     results_df = pd.json_normalize(injection_results)
     updated_df = pd.concat([df, results_df], axis=1)
 
-    # Calculate pattern occurrence counts
-    pattern_counts = (
-        results_df['Patterns']
-        .explode()  # Flatten the list of patterns
-        .value_counts()
-        .to_dict()
-    )
-
-    # Calculate average occurrence count (for display purposes)
-    total_patterns_detected = sum(pattern_counts.values())
-    avg_metrics = {pattern: count for pattern, count in pattern_counts.items()}
+    avg_metrics = summarize_sql_injection_patterns(results_df['Patterns'])
 
+    return updated_df, avg_metrics
+
+
+def count_sql_injection_patterns(patterns):
+    """
+    Counts how often each SQL injection pattern was detected in some rows;
+    merge_aggregates adds the counts of separate chunks.
+
+    Parameters:
+        patterns (pd.Series): Per-row lists of detected pattern names.
+
+    Returns:
+        dict: Occurrence count per detected pattern.
+    """
+    return {pattern: int(count) for pattern, count in patterns.explode().dropna().value_counts().items()}
+
+
+def summarize_pattern_counts(pattern_counts):
+    """
+    Turns pattern counts into the SQL injection summary.
+
+    Parameters:
+        pattern_counts (dict): Occurrence count per detected pattern.
+
+    Returns:
+        dict: Occurrence count per pattern, most frequent first.
+    """
     # If no patterns detected, provide a default metric summary
-    if not avg_metrics:
-        avg_metrics = {pattern: 0 for pattern in SQLI_PATTERNS.keys()}
+    if not pattern_counts:
+        return {pattern: 0 for pattern in SQLI_PATTERNS.keys()}
+    return dict(sorted(pattern_counts.items(), key=lambda item: item[1], reverse=True))
 
-    return updated_df, avg_metrics
+
+def summarize_sql_injection_patterns(patterns):
+    """
+    Counts how often each SQL injection pattern was detected.
+
+    Parameters:
+        patterns (pd.Series): Per-row lists of detected pattern names.
+
+    Returns:
+        dict: Occurrence count per pattern.
+    """
+    return summarize_pattern_counts(count_sql_injection_patterns(patterns))
@@ -0,0 +1,200 @@
+import re
+import math
+import sqlite3
+
+import pandas as pd
+
+from metrics.index_advisor import PLAN_STEP, table_aliases
+
+
+# Per-row columns written by estimate_query_costs
+COST_ESTIMATE_COLUMNS = ["Estimated Cost", "Estimated Rows"]
+
+# Rows SQLite itself assumes for a table without statistics
+DEFAULT_TABLE_ROWS = 1_000_000
+
+# Fraction of rows left by a range constraint (x > ?) and, without index
+# statistics, by each equality constraint (x = ?)
+RANGE_SELECTIVITY = 0.25
+EQUALITY_SELECTIVITY = 0.1
+
+# Visiting the table for every row found through a non-covering index
+TABLE_LOOKUP_FACTOR = 2.0
+
+_INDEX_NAME = re.compile(r"USING (?:COVERING )?INDEX (\w+)", re.IGNORECASE)
+_CONSTRAINTS = re.compile(r"\((.*)\)\s*$")
+
+
+def load_table_statistics(db_manager):
+    """
+    Reads the table and index statistics collected by ANALYZE.
+
+    Parameters:
+        db_manager (DatabaseManager): The database manager of the evaluation database.
+
+    Returns:
+        dict: "tables": table -> number of rows, "indexes": index -> list of
+            integers from sqlite_stat1 (rows, then average rows per distinct
+            value of the first 1, 2, ... columns).
+    """
+    tables = {
+        name.lower(): None
+        for (name,) in db_manager.execute_query_with_results(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )
+    }
+    indexes = {}
+    has_statistics = db_manager.execute_query_with_results(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    )
+    if has_statistics:
+        for table, index, stat in db_manager.execute_query_with_results("SELECT tbl, idx, stat FROM sqlite_stat1"):
+            values = [int(value) for value in str(stat).split() if value.isdigit()]
+            if not values:
+                continue
+            tables[table.lower()] = values[0]
+            if index:
+                indexes[index.lower()] = values
+
+    return {
+        "tables": {table: rows if rows is not None else DEFAULT_TABLE_ROWS for table, rows in tables.items()},
+        "indexes": indexes,
+    }
+
+
+def _log2(rows):
+    return math.log2(max(rows, 2))
+
+
+def _estimate_step(step, aliases, statistics, materialized):
+    """
+    Estimates one SCAN or SEARCH loop of a plan.
+
+    Returns:
+        tuple: (cost per outer row, rows produced per outer row, cost paid once)
+    """
+    operation = step.group(1).upper()
+    name = (step.group(3) or step.group(2)).lower()
+    rest = step.group(4)
+    upper_rest = rest.upper()
+
+    if name in materialized:
+        table_rows = materialized[name]
+    else:
+        table_rows = statistics["tables"].get(aliases.get(name, name), DEFAULT_TABLE_ROWS)
+
+    if operation == "SCAN":
+        if upper_rest.strip() == "ROW" and name == "constant":
+            return 0.0, 1.0, 0.0
+        cost = table_rows * (TABLE_LOOKUP_FACTOR if "USING INDEX" in upper_rest else 1.0)
+        return float(cost), float(table_rows), 0.0
+
+    constraints = _CONSTRAINTS.search(rest)
+    terms = [term.strip() for term in constraints.group(1).split(" AND ")] if constraints else []
+    equalities = [term for term in terms if term.endswith("=?") and not term.endswith(("<=?", ">=?"))]
+    has_range = len(equalities) < len(terms)
+
+    setup_cost = 0.0
+    if "INTEGER PRIMARY KEY" in upper_rest or "ROWID" in upper_rest:
+        rows = 1.0 if equalities else table_rows * RANGE_SELECTIVITY
+    else:
+        index_match = _INDEX_NAME.search(rest)
+        index_stats = statistics["indexes"].get(index_match.group(1).lower()) if index_match else None
+        if index_stats and equalities and len(index_stats) > len(equalities):
+            rows = float(index_stats[len(equalities)])
+        else:
+            rows = table_rows * EQUALITY_SELECTIVITY ** len(equalities)
+        if has_range:
+            rows *= RANGE_SELECTIVITY
+        if "AUTOMATIC" in upper_rest:
+            # The automatic index is built once per statement
+            setup_cost = table_rows * _log2(table_rows)
+
+    rows = max(rows, 1.0)
+    lookup_factor = 1.0 if "COVERING" in upper_rest or "PRIMARY KEY" in upper_rest else TABLE_LOOKUP_FACTOR
+    return _log2(table_rows) + rows * lookup_factor, rows, setup_cost
+
+
+def estimate_query_cost(plan_rows, aliases, statistics):
+    """
+    Estimates the cost of a query from its plan, without executing it. Nested
+    loops multiply, temp B-trees add a sort, correlated subqueries run once
+    per outer row and materialized subqueries once.
+
+    Parameters:
+        plan_rows (list): (id, parent, notused, detail) rows of EXPLAIN QUERY PLAN.
+        aliases (dict): Name or alias -> table, for the tables of the query.
+        statistics (dict): Result of load_table_statistics.
+
+    Returns:
+        tuple: (estimated cost in rows visited, estimated result rows)
+    """
+    children = {}
+    for node_id, parent, _, detail in plan_rows:
+        children.setdefault(parent, []).append((node_id, detail))
+    materialized = {}
+
+    def estimate_subtree(parent):
+        cost, rows = 0.0, 1.0
+        for node_id, detail in children.get(parent, []):
+            step = PLAN_STEP.match(detail)
+            upper_detail = detail.upper()
+            if step:
+                loop_cost, loop_rows, setup_cost = _estimate_step(step, aliases, statistics, materialized)
+                cost += setup_cost + rows * loop_cost
+                rows *= loop_rows
+                cost += estimate_subtree(node_id)[0]
+            elif upper_detail.startswith("USE TEMP B-TREE"):
+                cost += rows * _log2(rows)
+            elif upper_detail.startswith("CORRELATED"):
+                cost += rows * estimate_subtree(node_id)[0]
+            elif upper_detail.startswith("COMPOUND"):
+                compound_cost, compound_rows = 0.0, 0.0
+                for part_id, _ in children.get(node_id, []):
+                    part_cost, part_rows = estimate_subtree(part_id)
+                    compound_cost += part_cost
+                    compound_rows += part_rows
+                cost += compound_cost
+                rows *= compound_rows
+            else:
+                # MATERIALIZE, CO-ROUTINE and (scalar or list) subqueries run once
+                sub_cost, sub_rows = estimate_subtree(node_id)
+                cost += sub_cost
+                words = detail.split()
+                if upper_detail.startswith(("MATERIALIZE", "CO-ROUTINE")) and len(words) > 1:
+                    materialized[words[-1].lower()] = sub_rows
+        return cost, rows
+
+    return estimate_subtree(0)
+
+
+def estimate_query_costs(queries, db_manager, statistics=None):
+    """
+    Estimates the cost of every query from its query plan and the table statistics.
+
+    Parameters:
+        queries (list): SQL queries.
+        db_manager (DatabaseManager): The database manager to explain SQL queries.
+        statistics (dict): Result of load_table_statistics, read from the database if None.
+
+    Returns:
+        pd.DataFrame: One row per query with the COST_ESTIMATE_COLUMNS (None if the query cannot be explained).
+    """
+    # Query plans are SQLite's, whichever backend executes the queries
+    db_manager = db_manager.plan_manager
+    statistics = statistics or load_table_statistics(db_manager)
+    rows = []
+    for query in queries:
+        row = dict.fromkeys(COST_ESTIMATE_COLUMNS)
+        rows.append(row)
+        if not isinstance(query, str) or not query.strip():
+            continue
+        query = query.strip().rstrip(";")
+        try:
+            plan_rows = db_manager.explain_query_plan(query)
+        except sqlite3.Error as e:
+            print(f"Error explaining query: {e}")
+            continue
+        aliases = table_aliases(query, statistics["tables"])
+        row["Estimated Cost"], row["Estimated Rows"] = estimate_query_cost(plan_rows, aliases, statistics)
+    return pd.DataFrame(rows, columns=COST_ESTIMATE_COLUMNS)
@@ -1,12 +1,50 @@
-from ragas.metrics import DataCompyScore
-from ragas.dataset_schema import SingleTurnSample
+import os
+import re
 import asyncio
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from metrics.aggregators import aggregate_columns, summarize_aggregates
+from tracing import span
+from services.golden_work import golden_work
+
+# Comparison methods
+# columnar: result tables are fetched as typed columns and compared directly,
+#           columns aligned by position and rows by index
+# datacompy: results are converted to text and scored by ragas' DataCompyScore
+COLUMNAR_COMPARISON = "columnar"
+DATACOMPY_COMPARISON = "datacompy"
+RETRIEVAL_COMPARISON = os.getenv("RETRIEVAL_COMPARISON", COLUMNAR_COMPARISON)
+
+# Decimal places floats are rounded to before comparing, so results computed
+# in a different order still match
+FLOAT_DECIMALS = 6
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PARENTHESIZED = re.compile(r"\([^()]*\)")
+_ORDER_BY = re.compile(r"\border\s+by\b", re.IGNORECASE)
+
+RETRIEVAL_SCORE_COLUMNS = ['rows_precision', 'column_precision', 'rows_recall', 'column_recall']
+
+# Summary name of every score
+RETRIEVAL_SUMMARY_NAMES = {
+    'rows_precision': "Average Rows Precision",
+    'column_precision': "Average Column Precision",
+    'rows_recall': "Average Rows Recall",
+    'column_recall': "Average Column Recall",
+}
+
 
 async def computy_compy_scores(data1, data2):
     """
     Compute precision and recall for rows and columns asynchronously.
     """
+    # Imported here so ragas is only needed for the datacompy comparison
+    from ragas.metrics import DataCompyScore
+    from ragas.dataset_schema import SingleTurnSample
+
     sample = SingleTurnSample(response=data1, reference=data2)
 
     # Run all async tasks in parallel
@@ -24,27 +62,148 @@ async def computy_compy_scores(data1, data2):
         "rows_recall": scores[3]
     }
 
-def compute_and_return_retrieval_accuracy(db_manager, generated_sql, golden_sql):
+
+def _is_numeric(data_type):
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type) or pa.types.is_decimal(data_type)
+
+
+def _equal_values(generated, golden):
     """
-    Compute retrieval accuracy (precision and recall) for generated and golden SQL queries.
+    Compares two aligned columns. Integers are compared exactly, other
+    numbers as rounded floats, columns of other differing types as strings.
 
     Returns:
-        pd.DataFrame: Updated DataFrame with retrieval accuracy metrics.
-        dict: Average retrieval accuracy scores.
+        pa.ChunkedArray: Per row, whether the two columns hold the same value (NULL equals NULL).
+    """
+    # All-NULL columns have no type of their own
+    if pa.types.is_null(generated.type):
+        generated = generated.cast(golden.type)
+    if pa.types.is_null(golden.type):
+        golden = golden.cast(generated.type)
+
+    if pa.types.is_integer(generated.type) and pa.types.is_integer(golden.type):
+        # Integers beyond 2^53 have no exact float, so they are not cast
+        pass
+    elif _is_numeric(generated.type) and _is_numeric(golden.type):
+        # Unsafe casts round such integers to the nearest float instead of failing
+        generated = pc.round(generated.cast(pa.float64(), safe=False), FLOAT_DECIMALS)
+        golden = pc.round(golden.cast(pa.float64(), safe=False), FLOAT_DECIMALS)
+    elif generated.type != golden.type:
+        generated, golden = generated.cast(pa.string()), golden.cast(pa.string())
+
+    both_null = pc.and_(pc.is_null(generated), pc.is_null(golden))
+    return pc.or_(pc.fill_null(pc.equal(generated, golden), False), both_null)
+
+
+def has_outer_order_by(query):
+    """
+    Checks whether the outer query has an ORDER BY; one inside a subquery
+    does not fix the order of the result.
+    """
+    query = _STRING_LITERAL.sub("''", query)
+    while _PARENTHESIZED.search(query):
+        query = _PARENTHESIZED.sub(" ", query)
+    return _ORDER_BY.search(query) is not None
+
+
+def sort_rows(table):
+    """
+    Sorts a result table by all its columns, in order. Without ORDER BY the
+    row order depends on the engine (SQLite and DuckDB differ), so results
+    are put in the same order before rows are aligned by position.
+
+    Parameters:
+        table (pa.Table): A query result.
+
+    Returns:
+        pa.Table: The same rows, sorted; the column names are kept.
+    """
+    if table.num_rows < 2:
+        return table
+    # Positional names, since a result may repeat a column name
+    positional = table.rename_columns([f"c{index}" for index in range(table.num_columns)])
+    keys = [(name, "ascending") for name, column in zip(positional.column_names, positional.columns)
+            if not pa.types.is_null(column.type)]
+    if not keys:
+        return table
+    return table.take(pc.sort_indices(positional, sort_keys=keys, null_placement="at_start"))
+
+
+def compare_result_tables(generated, golden):
+    """
+    Computes row and column precision and recall of a generated query's
+    result against the golden result, on the columns themselves. Columns are
+    aligned by position (the queries may name them differently) and rows by
+    index; a row matches when all aligned values are equal, a column when all
+    its values in the rows both results have are equal.
+
+    Parameters:
+        generated (pa.Table): Result of the generated query.
+        golden (pa.Table): Result of the golden query.
+
+    Returns:
+        dict: rows_precision, column_precision, rows_recall and column_recall.
+    """
+    if generated.num_rows == 0 and golden.num_rows == 0:
+        same_shape = float(generated.num_columns == golden.num_columns)
+        return dict.fromkeys(RETRIEVAL_SCORE_COLUMNS, same_shape)
+
+    rows = min(generated.num_rows, golden.num_rows)
+    row_matches = pa.array([True] * rows, type=pa.bool_())
+    matching_columns = 0
+    for index in range(min(generated.num_columns, golden.num_columns)):
+        if not rows:
+            break
+        equal = _equal_values(generated.column(index).slice(0, rows), golden.column(index).slice(0, rows))
+        matching_columns += bool(pc.all(equal).as_py())
+        row_matches = pc.and_(row_matches, equal)
+    matching_rows = int(pc.sum(row_matches).as_py() or 0)
+
+    return {
+        "rows_precision": matching_rows / generated.num_rows if generated.num_rows else 0.0,
+        "column_precision": matching_columns / generated.num_columns if generated.num_columns else 0.0,
+        "rows_recall": matching_rows / golden.num_rows if golden.num_rows else 0.0,
+        "column_recall": matching_columns / golden.num_columns if golden.num_columns else 0.0,
+    }
+
+
+def _columnar_scores(db_manager, generated_sql, golden_sql):
+    """
+    Scores every SQL pair on the columnar results of both queries.
     """
-    rows_precision_list, column_precision_list = [], []
-    rows_recall_list, column_recall_list = [], []
+    scores = []
+    for gen_sql, gold_sql in zip(generated_sql, golden_sql):
+        try:
+            generated = db_manager.execute_query_columnar(gen_sql)
+            # Shared by the models of a comparison
+            golden = golden_work("golden result", (id(db_manager), gold_sql),
+                                 lambda: db_manager.execute_query_columnar(gold_sql))
+            if generated is None or golden is None:
+                scores.append(None)
+                continue
+            with span("retrieval accuracy: compare results"):
+                if not has_outer_order_by(gold_sql):
+                    # The golden query leaves the order to the engine, so any order matches
+                    generated, golden = sort_rows(generated), sort_rows(golden)
+                scores.append(compare_result_tables(generated, golden))
+        except Exception as e:
+            print(f"Error processing SQL queries: {e}")
+            scores.append(None)
+    return scores
 
+
+def _datacompy_scores(db_manager, generated_sql, golden_sql):
+    """
+    Runs retrieval accuracy calculations asynchronously for all SQL pairs through DataCompyScore.
+    """
     async def process_queries():
-        """
-        Runs retrieval accuracy calculations asynchronously for all SQL pairs.
-        """
         tasks = []
         for gen_sql, gold_sql in zip(generated_sql, golden_sql):
             try:
                 # Execute queries
                 data1 = db_manager.execute_query_with_results(gen_sql)
-                data2 = db_manager.execute_query_with_results(gold_sql)
+                data2 = golden_work("golden rows", (id(db_manager), gold_sql),
+                                    lambda: db_manager.execute_query_with_results(gold_sql))
 
                 # Convert results to text format for comparison
                 gen_data = '\n'.join(str(x) for x in data1)
@@ -57,40 +216,59 @@ def compute_and_return_retrieval_accuracy(db_manager, generated_sql, golden_sql)
                 tasks.append(asyncio.sleep(0))  # Placeholder to maintain indexing
 
         # Run all tasks in parallel
-        results = await asyncio.gather(*tasks)
-
-        for result in results:
-            if isinstance(result, dict):
-                rows_precision_list.append(result['rows_precision'])
-                column_precision_list.append(result['column_precision'])
-                rows_recall_list.append(result['rows_recall'])
-                column_recall_list.append(result['column_recall'])
-            else:
-                rows_precision_list.append(0)
-                column_precision_list.append(0)
-                rows_recall_list.append(0)
-                column_recall_list.append(0)
-
-    # Run async function
-    asyncio.run(process_queries())
-
-    # Convert lists to DataFrame
-    data = pd.DataFrame({
-        'rows_precision': rows_precision_list,
-        'column_precision': column_precision_list,
-        'rows_recall': rows_recall_list,
-        'column_recall': column_recall_list
-    })
-
-    # Compute average retrieval accuracy metrics
-    avg_metrics = {
-        "Average Rows Precision": data['rows_precision'].mean() if not data.empty else 0,
-        "Average Column Precision": data['column_precision'].mean() if not data.empty else 0,
-        "Average Rows Recall": data['rows_recall'].mean() if not data.empty else 0,
-        "Average Column Recall": data['column_recall'].mean() if not data.empty else 0,
-    }
+        return await asyncio.gather(*tasks)
+
+    return asyncio.run(process_queries())
+
+
+def compute_and_return_retrieval_accuracy(db_manager, generated_sql, golden_sql, comparison=RETRIEVAL_COMPARISON):
+    """
+    Compute retrieval accuracy (precision and recall) for generated and golden SQL queries.
+
+    Parameters:
+        db_manager (DatabaseManager): The database manager to execute SQL queries.
+        generated_sql (list): Generated SQL queries.
+        golden_sql (list): Golden SQL queries.
+        comparison (str): COLUMNAR_COMPARISON or DATACOMPY_COMPARISON.
+
+    Returns:
+        pd.DataFrame: Updated DataFrame with retrieval accuracy metrics.
+        dict: Average retrieval accuracy scores.
+    """
+    if comparison == DATACOMPY_COMPARISON:
+        results = _datacompy_scores(db_manager, generated_sql, golden_sql)
+    elif comparison == COLUMNAR_COMPARISON:
+        results = _columnar_scores(db_manager, generated_sql, golden_sql)
+    else:
+        raise ValueError(f"Unknown comparison '{comparison}'. Expected "
+                         f"'{COLUMNAR_COMPARISON}' or '{DATACOMPY_COMPARISON}'.")
+
+    # Failed pairs score 0
+    data = pd.DataFrame(
+        [
+            {column: result[column] for column in RETRIEVAL_SCORE_COLUMNS} if isinstance(result, dict)
+            else dict.fromkeys(RETRIEVAL_SCORE_COLUMNS, 0)
+            for result in results
+        ],
+        columns=RETRIEVAL_SCORE_COLUMNS,
+    )
 
-    return data, avg_metrics  # ✅ Returns DataFrame + Average Metrics
+    return data, summarize_retrieval_accuracy(data)  # ✅ Returns DataFrame + Average Metrics
+
+
+def summarize_retrieval_accuracy(data):
+    """
+    Average and percentiles of the retrieval accuracy scores.
+
+    Parameters:
+        data (pd.DataFrame): Per-pair scores with the RETRIEVAL_SCORE_COLUMNS.
+
+    Returns:
+        dict: Average retrieval accuracy scores and their percentiles.
+    """
+    return summarize_aggregates(
+        aggregate_columns(data, RETRIEVAL_SCORE_COLUMNS), names=RETRIEVAL_SUMMARY_NAMES, empty_value=0
+    )
 
 
 
@@ -2,6 +2,8 @@ import sqlparse
 import math
 import pandas as pd
 
+from metrics.aggregators import aggregate_columns, summarize_aggregates
+
 def extract_operators_operands(sql_query):
     """Extracts SQL operators and operands from the given query."""
     parsed = sqlparse.parse(sql_query)
@@ -66,7 +68,7 @@ def compute_and_store_halstead_metrics(df):
     # Append the Halstead metrics to the DataFrame
     updated_df = pd.concat([df, halstead_df], axis=1)
 
-    # Calculate average metrics
-    avg_metrics = halstead_df.mean().to_dict()
+    # Calculate average metrics and percentiles
+    avg_metrics = summarize_aggregates(aggregate_columns(halstead_df, list(halstead_df.columns)))
 
     return updated_df, avg_metrics
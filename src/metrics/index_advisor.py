@@ -0,0 +1,395 @@
+import os
+import re
+import time
+import sqlite3
+import statistics
+
+import pandas as pd
+
+from metrics.aggregators import StreamingAggregate
+from tracing import span
+
+
+# Per-row columns written by advise_indexes
+INDEX_ADVISOR_COLUMNS = [
+    "Full Table Scans",
+    "Temp B-Trees",
+    "Automatic Indexes",
+    "Plan Issues",
+    "Suggested Indexes",
+    "Time Before Indexes (s)",
+    "Time With Indexes (s)",
+]
+
+# Re-time every query on a scratch copy of the database with its suggested indexes
+RETIME_WITH_SUGGESTED_INDEXES = os.getenv("INDEX_ADVISOR_RETIME", "0") == "1"
+RETIME_TRIALS = 3
+
+# Longer indexes are rarely worth their size; covering columns are dropped first
+MAX_INDEX_COLUMNS = 6
+
+# SCAN or SEARCH step of an EXPLAIN QUERY PLAN: operation, table, alias, rest of the step.
+# Also matches "SCAN CONSTANT ROW" and scans of subqueries and CTEs, which are not tables.
+PLAN_STEP = re.compile(r"^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\w+)(?:\s+AS\s+(\w+))?(.*)$", re.IGNORECASE)
+_TEMP_B_TREE = re.compile(r"USE TEMP B-TREE FOR (.+)$", re.IGNORECASE)
+_COLUMN_REFERENCE = re.compile(r"\b(?:([a-z_]\w*)\.)?([a-z_]\w*)\b", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_CLAUSE_END = r"(?=\b(?:group\s+by|order\s+by|having|limit|union|except|intersect|window)\b|\)|;|$)"
+
+# Words that can follow a table name without being its alias
+_NOT_AN_ALIAS = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "outer", "on", "using",
+    "group", "order", "having", "limit", "union", "except", "intersect", "window", "as", "from",
+}
+
+# Table after FROM, JOIN or a comma (as in "FROM a x, b y"), and its alias; keywords are
+# not taken as the alias, so the table reference they start is found as well
+_TABLE_REFERENCE = re.compile(
+    r"(?:\b(?:from|join)\s+|,\s*)([a-z_]\w*)"
+    r"(?:\s+(?:as\s+)?(?!(?:" + "|".join(sorted(_NOT_AN_ALIAS)) + r")\b)([a-z_]\w*))?",
+    re.IGNORECASE,
+)
+
+
+def parse_query_plan(plan_rows, aliases):
+    """
+    Flags the expensive steps of an EXPLAIN QUERY PLAN. Only steps on tables
+    of the schema count: constant rows, subqueries and CTEs are skipped.
+
+    Parameters:
+        plan_rows (list): (id, parent, notused, detail) rows.
+        aliases (dict): Name or alias -> table, for the tables of the query (see table_aliases).
+
+    Returns:
+        dict: Tables (or aliases) read with a full scan, sorts needing a temp
+            B-tree (e.g. "ORDER BY") and tables SQLite builds an automatic index for.
+    """
+    full_scans, temp_b_trees, automatic_indexes = [], [], []
+    for row in plan_rows:
+        detail = row[-1]
+        step = PLAN_STEP.match(detail)
+        if step:
+            name = step.group(3) or step.group(2)
+            if name.lower() not in aliases:
+                continue
+            rest = step.group(4).upper()
+            if "AUTOMATIC" in rest:
+                automatic_indexes.append(name)
+            elif step.group(1).upper() == "SCAN" and "INDEX" not in rest and "PRIMARY KEY" not in rest:
+                full_scans.append(name)
+            continue
+
+        temp_b_tree = _TEMP_B_TREE.search(detail)
+        if temp_b_tree:
+            temp_b_trees.append(temp_b_tree.group(1).upper())
+
+    return {"full_scans": full_scans, "temp_b_trees": temp_b_trees, "automatic_indexes": automatic_indexes}
+
+
+def _clause(query, start_pattern):
+    """Returns the text of every clause starting with start_pattern."""
+    return " ".join(re.findall(start_pattern + r"(.*?)" + _CLAUSE_END, query, re.IGNORECASE | re.DOTALL))
+
+
+def table_aliases(query, table_names):
+    """Maps every name a table is referenced by (name or alias) to the table."""
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(query):
+        table = table.lower()
+        if table not in table_names:
+            continue
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_AN_ALIAS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def _columns_of(text, table, aliases, schema, tables_in_query):
+    """Returns the columns of table referenced in text, in order of appearance."""
+    columns = []
+    for qualifier, column in _COLUMN_REFERENCE.findall(text):
+        column = column.lower()
+        if column not in schema[table]:
+            continue
+        if qualifier:
+            if aliases.get(qualifier.lower()) != table:
+                continue
+        elif any(column in schema[other] for other in tables_in_query if other != table):
+            # Unqualified and ambiguous
+            continue
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def _predicate_columns(predicates, table, aliases, schema, tables_in_query):
+    """Splits the columns of table used in predicates into equality and range columns."""
+    equality, ranges = [], []
+    for qualifier, column, operator in re.findall(
+        r"\b(?:([a-z_]\w*)\.)?([a-z_]\w*)\s*(=|==|<=|>=|<>|!=|<|>|\bin\b|\bis\b|\bbetween\b|\blike\b|\bglob\b)",
+        predicates, re.IGNORECASE,
+    ):
+        found = _columns_of(f"{qualifier}.{column}" if qualifier else column, table, aliases, schema, tables_in_query)
+        if not found or operator in ("<>", "!="):
+            continue
+        target = equality if operator.lower() in ("=", "==", "in", "is") else ranges
+        if found[0] not in target:
+            target.append(found[0])
+
+    # Right-hand side of an equality, e.g. the inner table of "ON a.x = b.y"
+    for qualifier, column in re.findall(r"=\s*(?:([a-z_]\w*)\.)?([a-z_]\w*)", predicates, re.IGNORECASE):
+        if qualifier:
+            found = _columns_of(f"{qualifier}.{column}", table, aliases, schema, tables_in_query)
+            if found and found[0] not in equality:
+                equality.append(found[0])
+
+    ranges = [column for column in ranges if column not in equality]
+    return equality, ranges
+
+
+def suggest_covering_index(query, table, aliases, schema, existing_indexes):
+    """
+    Suggests an index for one table of a query: equality columns first, then
+    one range column, the GROUP BY/ORDER BY columns and finally the other
+    columns the query reads from the table, so the table itself is not visited.
+
+    Parameters:
+        query (str): The SQL query, with string literals removed.
+        table (str): Table to index.
+        aliases (dict): Name or alias -> table, for the tables of the query.
+        schema (dict): Table -> list of its columns.
+        existing_indexes (dict): Table -> list of column lists of its indexes.
+
+    Returns:
+        tuple: (index name, CREATE INDEX statement), or None if no index would help.
+    """
+    tables_in_query = set(aliases.values())
+    predicates = _clause(query, r"\bwhere\b") + " " + _clause(query, r"\bon\b")
+    equality, ranges = _predicate_columns(predicates, table, aliases, schema, tables_in_query)
+    ordering = _columns_of(
+        _clause(query, r"\bgroup\s+by\b") + " " + _clause(query, r"\border\s+by\b"),
+        table, aliases, schema, tables_in_query,
+    )
+
+    key = equality + ranges[:1]
+    key += [column for column in ordering if column not in key]
+    if not key:
+        return None
+
+    # Covering columns, unless the query reads every column (e.g. SELECT *)
+    referenced = _columns_of(query, table, aliases, schema, tables_in_query)
+    reads_everything = re.search(r"(^|[\s,])(\*|\w+\.\*)", query) is not None
+    covering = [] if reads_everything else [column for column in referenced if column not in key]
+    index_columns = (key + covering)[:MAX_INDEX_COLUMNS]
+    if len(index_columns) >= len(schema[table]):
+        index_columns = key[:MAX_INDEX_COLUMNS]
+
+    # An existing index starting with the same columns already serves the query
+    for columns in existing_indexes.get(table, []):
+        if columns[:len(index_columns)] == index_columns:
+            return None
+
+    index_name = f"idx_{table}_{'_'.join(index_columns)}"
+    return index_name, f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(index_columns)})"
+
+
+def load_schema(db_manager):
+    """
+    Reads the columns and indexes of every table.
+
+    Returns:
+        tuple: (table -> list of columns, table -> list of index column lists)
+    """
+    schema, existing_indexes = {}, {}
+    tables = db_manager.execute_query_with_results(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    )
+    for (table,) in tables:
+        table_key = table.lower()
+        schema[table_key] = [row[1].lower() for row in db_manager.execute_query_with_results(
+            f"PRAGMA table_info('{table}')"
+        )]
+        existing_indexes[table_key] = []
+        for index_row in db_manager.execute_query_with_results(f"PRAGMA index_list('{table}')"):
+            index_columns = db_manager.execute_query_with_results(f"PRAGMA index_info('{index_row[1]}')")
+            existing_indexes[table_key].append([row[2].lower() for row in index_columns if row[2]])
+    return schema, existing_indexes
+
+
+def _time_query(conn, query, trials=RETIME_TRIALS):
+    timings = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def retime_with_indexes(db_manager, queries_with_indexes):
+    """
+    Times queries on a scratch copy of the database before and after creating
+    their suggested indexes. Each query's indexes are dropped again before the
+    next query, and the copy is closed at the end of the call.
+
+    Parameters:
+        db_manager (DatabaseManager): Manager of the evaluation database.
+        queries_with_indexes (dict): Row index -> (query, list of CREATE INDEX statements).
+
+    Returns:
+        dict: Row index -> (seconds before, seconds with indexes).
+    """
+    timings = {}
+    scratch = db_manager.create_scratch_copy()
+    try:
+        for row_index, (query, statements) in queries_with_indexes.items():
+            created = []
+            try:
+                before = _time_query(scratch, query)
+                for statement in statements:
+                    index_name = statement.split()[5]
+                    if not scratch.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,)
+                    ).fetchone():
+                        scratch.execute(statement)
+                        created.append(index_name)
+                timings[row_index] = (before, _time_query(scratch, query))
+            except sqlite3.Error as e:
+                print(f"Error re-timing query with suggested indexes: {e}")
+            finally:
+                for index_name in created:
+                    scratch.execute(f"DROP INDEX IF EXISTS {index_name}")
+    finally:
+        scratch.close()
+    return timings
+
+
+def advise_indexes(df, db_manager, retime=RETIME_WITH_SUGGESTED_INDEXES, schema=None):
+    """
+    Explains every generated query, flags full table scans, temp B-trees and
+    automatic indexes, and suggests covering indexes for the affected tables.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame containing SQL queries.
+        db_manager (DatabaseManager): The database manager to explain SQL queries.
+        retime (bool): Also time each query on a scratch copy with its suggested indexes.
+        schema (tuple): Result of load_schema, read from the database if None.
+
+    Returns:
+        pd.DataFrame: One row per query with the INDEX_ADVISOR_COLUMNS.
+    """
+    # Query plans are SQLite's, whichever backend executes the queries
+    db_manager = db_manager.plan_manager
+    schema, existing_indexes = schema or load_schema(db_manager)
+    rows = []
+    queries_with_indexes = {}
+
+    for position, generated_sql in enumerate(df["generated_sql"].tolist()):
+        row = dict.fromkeys(INDEX_ADVISOR_COLUMNS)
+        rows.append(row)
+        if not isinstance(generated_sql, str) or not generated_sql.strip():
+            continue
+
+        query = generated_sql.strip().rstrip(";")
+        stripped = _STRING_LITERAL.sub("?", query)
+        aliases = table_aliases(stripped, schema)
+        try:
+            plan = parse_query_plan(db_manager.explain_query_plan(query), aliases)
+        except sqlite3.Error as e:
+            row["Plan Issues"] = f"Could not explain query: {e}"
+            continue
+
+        row["Full Table Scans"] = len(plan["full_scans"])
+        row["Temp B-Trees"] = len(plan["temp_b_trees"])
+        row["Automatic Indexes"] = len(plan["automatic_indexes"])
+        row["Plan Issues"] = "; ".join(
+            [f"full scan of {name}" for name in plan["full_scans"]]
+            + [f"temp B-tree for {usage.lower()}" for usage in plan["temp_b_trees"]]
+            + [f"automatic index on {name}" for name in plan["automatic_indexes"]]
+        )
+
+        flagged = {aliases.get(name.lower()) for name in plan["full_scans"] + plan["automatic_indexes"]}
+        if plan["temp_b_trees"]:
+            # Sorts are not attributed to a table in the plan
+            flagged.update(aliases.values())
+
+        statements = []
+        for table in sorted(table for table in flagged if table):
+            suggestion = suggest_covering_index(stripped, table, aliases, schema, existing_indexes)
+            if suggestion:
+                statements.append(suggestion[1])
+        row["Suggested Indexes"] = "\n".join(statements)
+        if statements:
+            queries_with_indexes[position] = (query, statements)
+
+    if retime and queries_with_indexes:
+        with span("index advisor: retime with indexes", queries=len(queries_with_indexes)):
+            timings = retime_with_indexes(db_manager, queries_with_indexes)
+        for position, (before, after) in timings.items():
+            rows[position]["Time Before Indexes (s)"] = before
+            rows[position]["Time With Indexes (s)"] = after
+
+    return pd.DataFrame(rows, columns=INDEX_ADVISOR_COLUMNS)
+
+
+def aggregate_index_advice(rows):
+    """
+    Counts the plan issues and suggested indexes of some rows, in a form that
+    merge_aggregates combines across chunks.
+
+    Parameters:
+        rows (pd.DataFrame): Per-row results of advise_indexes.
+
+    Returns:
+        dict: Counts of queries per plan issue and, per suggested index, the
+            number of queries and a StreamingAggregate of their speedups.
+    """
+    explained = rows["Full Table Scans"].notna()
+    suggestions = {}
+    for _, row in rows.iterrows():
+        if not row["Suggested Indexes"]:
+            continue
+        speedup = None
+        if pd.notna(row["Time Before Indexes (s)"]) and row["Time With Indexes (s)"]:
+            speedup = row["Time Before Indexes (s)"] / row["Time With Indexes (s)"]
+        for statement in row["Suggested Indexes"].split("\n"):
+            suggestion = suggestions.setdefault(statement, {"queries": 0, "speedups": StreamingAggregate()})
+            suggestion["queries"] += 1
+            if speedup is not None:
+                suggestion["speedups"].add(speedup)
+
+    return {
+        "Queries Explained": int(explained.sum()),
+        "Queries With Full Table Scans": int((rows.loc[explained, "Full Table Scans"] > 0).sum()),
+        "Queries With Temp B-Trees": int((rows.loc[explained, "Temp B-Trees"] > 0).sum()),
+        "Queries With Automatic Indexes": int((rows.loc[explained, "Automatic Indexes"] > 0).sum()),
+        "suggestions": suggestions,
+    }
+
+
+def finalize_index_advice(aggregates):
+    """
+    Groups the suggested indexes across the dataset.
+
+    Parameters:
+        aggregates (dict): Merged results of aggregate_index_advice.
+
+    Returns:
+        dict: Counts of queries per plan issue and "Suggested Indexes", a list
+            of dictionaries (index, table, number of queries, median speedup)
+            sorted by the number of queries that would use the index.
+    """
+    suggested_indexes = [
+        {
+            "Index": statement,
+            "Table": statement.split(" ON ")[1].split(" (")[0],
+            "Queries": suggestion["queries"],
+            "Median Speedup": suggestion["speedups"].percentile(50) if suggestion["speedups"].count else None,
+        }
+        for statement, suggestion in aggregates["suggestions"].items()
+    ]
+    suggested_indexes.sort(key=lambda suggestion: suggestion["Queries"], reverse=True)
+
+    summary = {name: value for name, value in aggregates.items() if name != "suggestions"}
+    summary["Suggested Indexes"] = suggested_indexes
+    return summary
+
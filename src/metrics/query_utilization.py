@@ -1,7 +1,114 @@
+import os
 import psutil
 import time
+import numpy as np
 import pandas as pd
 from memory_profiler import memory_usage
+from database.backends import VM_STEP_INTERVAL
+from metrics.cost_estimator import estimate_query_costs, COST_ESTIMATE_COLUMNS
+from metrics.aggregators import aggregate_columns, summarize_aggregates
+from tracing import span
+
+# Per-row columns written by calculate_and_store_metrics
+PERFORMANCE_METRIC_COLUMNS = [
+    "Execution Time (s)",
+    "Peak Memory Used (MB)",
+    "CPU Time Used (seconds)",
+    "Disk I/O Read (MB)",
+    "Disk I/O Write (MB)",
+    "VM Steps",
+    "Rows Returned",
+    "Page Cache Hits",
+    "Page Cache Misses",
+]
+
+# Set when a query was not executed because its estimated cost exceeded the threshold
+EXECUTION_SKIPPED_COLUMN = "Execution Skipped"
+
+# Queries whose plan-based cost estimate exceeds this are not executed (None runs every query)
+COST_THRESHOLD = float(os.environ["PERFORMANCE_COST_THRESHOLD"]) if os.getenv("PERFORMANCE_COST_THRESHOLD") else None
+
+# Repeated-trial timing: with PERFORMANCE_TRIALS > 1 every query is also run
+# PERFORMANCE_WARMUP_RUNS times untimed and then timed PERFORMANCE_TRIALS times
+WARM_CACHE, COLD_CACHE = "warm", "cold"
+TIMING_TRIALS = int(os.getenv("PERFORMANCE_TRIALS", "1"))
+TIMING_WARMUP_RUNS = int(os.getenv("PERFORMANCE_WARMUP_RUNS", "1"))
+TIMING_CACHE_MODE = os.getenv("PERFORMANCE_CACHE_MODE", WARM_CACHE)
+
+# Trials outside [Q1 - k * IQR, Q3 + k * IQR] are dropped as outliers
+OUTLIER_IQR_FACTOR = 1.5
+
+# Per-row columns written in repeated-trial mode
+TRIAL_TIMING_COLUMNS = ["Median Time (s)", "P95 Time (s)", "Std Time (s)", "Trials Kept"]
+
+def drop_outliers(timings, iqr_factor=OUTLIER_IQR_FACTOR):
+    """
+    Removes timings outside the interquartile range fences (Tukey's rule).
+
+    Parameters:
+        timings (list): Measured durations.
+        iqr_factor (float): Width of the fences in interquartile ranges.
+
+    Returns:
+        np.ndarray: The remaining timings.
+    """
+    timings = np.asarray(timings, dtype=float)
+    if len(timings) < 4:
+        return timings
+    q1, q3 = np.percentile(timings, [25, 75])
+    iqr = q3 - q1
+    kept = timings[(timings >= q1 - iqr_factor * iqr) & (timings <= q3 + iqr_factor * iqr)]
+    return kept if len(kept) else timings
+
+
+def time_query_trials(query_execution_function, trials=TIMING_TRIALS, warmup_runs=TIMING_WARMUP_RUNS):
+    """
+    Times a query over several trials after untimed warm-up runs.
+
+    Parameters:
+        query_execution_function (function): The function to execute the query.
+        trials (int): Number of timed runs.
+        warmup_runs (int): Number of untimed runs before the first trial.
+
+    Returns:
+        dict: Median, 95th percentile and standard deviation of the trials left
+            after dropping outliers, and the number of trials kept.
+    """
+    for _ in range(warmup_runs):
+        query_execution_function()
+
+    timings = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        query_execution_function()
+        timings.append(time.perf_counter() - start)
+
+    kept = drop_outliers(timings)
+    return {
+        "Median Time (s)": float(np.median(kept)),
+        "P95 Time (s)": float(np.percentile(kept, 95)),
+        "Std Time (s)": float(np.std(kept, ddof=1)) if len(kept) > 1 else 0.0,
+        "Trials Kept": int(len(kept)),
+    }
+
+
+def read_io_counters(process):
+    """
+    Reads the I/O counters of this process where the OS provides them
+    (Linux, Windows, BSD), and falls back to the system-wide disk counters
+    (e.g. on macOS), which include the I/O of every other process.
+
+    Parameters:
+        process (psutil.Process): The current process.
+
+    Returns:
+        tuple: (counters with read_bytes and write_bytes, "process" or "system")
+    """
+    try:
+        return process.io_counters(), "process"
+    except (AttributeError, psutil.AccessDenied, NotImplementedError):
+        return psutil.disk_io_counters(), "system"
+
 
 def monitor_query_utilization(query_execution_function, *args, **kwargs):
     """
@@ -18,21 +125,21 @@ def monitor_query_utilization(query_execution_function, *args, **kwargs):
     # Capture initial state
     start_time = time.time()
     cpu_times_before = process.cpu_times()
-    disk_io_before = psutil.disk_io_counters()
+    disk_io_before, io_scope = read_io_counters(process)
 
     try:
-        # Measure peak memory usage during query execution
-        peak_memory = memory_usage(
-            (query_execution_function, args, kwargs), interval=0.1, retval=False
+        # Measure peak memory usage during the single execution of the query
+        # (without max_iterations, memory_usage reruns fast functions for more samples)
+        peak_memory, results = memory_usage(
+            (query_execution_function, args, kwargs), interval=0.1, retval=True, max_iterations=1
         )
-        results = query_execution_function(*args, **kwargs)
     except Exception as e:
         raise RuntimeError(f"Error fetching query results: {e}")
 
     # Capture state after execution
     end_time = time.time()
     cpu_times_after = process.cpu_times()
-    disk_io_after = psutil.disk_io_counters()
+    disk_io_after, _ = read_io_counters(process)
 
     # Calculate metrics
     execution_time = end_time - start_time
@@ -49,50 +156,91 @@ def monitor_query_utilization(query_execution_function, *args, **kwargs):
         "CPU Time Used (seconds)": float(cpu_used),
         "Disk I/O Read (MB)": read_bytes / (1024 * 1024),
         "Disk I/O Write (MB)": write_bytes / (1024 * 1024),
+        "I/O Scope": io_scope,
     }
 
     return results, metrics
 
 
-def calculate_and_store_metrics(df, db_manager):
+def calculate_and_store_metrics(df, db_manager, cost_threshold=COST_THRESHOLD, trials=TIMING_TRIALS,
+                                warmup_runs=TIMING_WARMUP_RUNS, cache_mode=TIMING_CACHE_MODE):
     """
     Execute SQL queries, store metrics in the DataFrame, and return average metrics.
+    Every query first gets a plan-based cost estimate; queries estimated above
+    cost_threshold are not executed.
 
     Parameters:
         df (pd.DataFrame): The DataFrame containing SQL queries.
         db_manager (DatabaseManager): The database manager to execute SQL queries.
+        cost_threshold (float): Maximum estimated cost of an executed query, None to execute every query.
+        trials (int): With more than one trial, each query is also timed repeatedly (TRIAL_TIMING_COLUMNS).
+        warmup_runs (int): Untimed runs before the trials.
+        cache_mode (str): "warm" to reuse the caches between trials, "cold" to run every trial
+            from a cold start (see DatabaseManager.execute_query_cold), without warm-up runs.
 
     Returns:
-        tuple: (Updated DataFrame, dictionary of average metrics)
+        tuple: (Updated DataFrame, dictionary of average metrics and their percentiles)
     """
     # Define columns for the new metrics
-    metric_columns = [
-        "Execution Time (s)", 
-        "Peak Memory Used (MB)", 
-        "CPU Time Used (seconds)", 
-        "Disk I/O Read (MB)", 
-        "Disk I/O Write (MB)"
-    ]
+    metric_columns = PERFORMANCE_METRIC_COLUMNS
 
     # Initialize columns with NaN values
     for column in metric_columns:
         df[column] = None
 
+    # Cheap pre-screen from the query plans, without executing anything
+    with span("performance: cost pre-screen"):
+        estimates = estimate_query_costs(df['generated_sql'].tolist(), db_manager)
+    for column in COST_ESTIMATE_COLUMNS:
+        df[column] = estimates[column].values
+    df[EXECUTION_SKIPPED_COLUMN] = False
+
+    if trials > 1:
+        for column in TRIAL_TIMING_COLUMNS:
+            df[column] = None
+    if cache_mode not in (WARM_CACHE, COLD_CACHE):
+        raise ValueError(f"Unknown cache mode '{cache_mode}'. Expected '{WARM_CACHE}' or '{COLD_CACHE}'.")
+    run_trial = db_manager.execute_query_with_results
+    if cache_mode == COLD_CACHE:
+        if not db_manager.cold_start_available:
+            raise ValueError("Cold cache timing needs the SQLite backend in file mode.")
+        run_trial = db_manager.execute_query_cold
+        warmup_runs = 0
+
     for index, row in df.iterrows():
         generated_sql = row.get('generated_sql', '')
+        if cost_threshold is not None and pd.notna(row['Estimated Cost']) and row['Estimated Cost'] > cost_threshold:
+            df.at[index, EXECUTION_SKIPPED_COLUMN] = True
+            continue
         if pd.notna(generated_sql) and generated_sql.strip():
             try:
                 # Monitor performance during query execution
-                _, metrics = monitor_query_utilization(lambda: db_manager.execute_query_with_results(generated_sql))
+                with span("performance: monitored run"):
+                    results, metrics = monitor_query_utilization(
+                        lambda: db_manager.execute_query_with_statistics(generated_sql, VM_STEP_INTERVAL)
+                    )
 
                 # Add metrics to the corresponding row
                 for metric, value in metrics.items():
                     df.at[index, metric] = value
 
+                # SQLite counters: deterministic, comparable across machines and runs
+                rows, statistics = results
+                if statistics is not None:
+                    for metric, value in statistics.items():
+                        df.at[index, metric] = value
+                    df.at[index, "Rows Returned"] = len(rows)
+
+                if trials > 1 and statistics is not None:
+                    with span("performance: timing trials", trials=trials):
+                        trial_metrics = time_query_trials(lambda: run_trial(generated_sql), trials, warmup_runs)
+                    for metric, value in trial_metrics.items():
+                        df.at[index, metric] = value
+
             except Exception as e:
                 df.at[index, 'Error'] = str(e)
 
-    # Calculate average values for each metric
-    avg_metrics = df[metric_columns].mean().to_dict()
+    # Calculate average values and percentiles for each metric
+    avg_metrics = summarize_aggregates(aggregate_columns(df, metric_columns))
 
     return df, avg_metrics
@@ -3,6 +3,7 @@ import json
 import pandas as pd
 from dotenv import load_dotenv
 from langchain_ibm import WatsonxLLM
+from tracing import span, LLM
 
 # Load environment variables
 load_dotenv()
@@ -81,7 +82,8 @@ class WxAI_LLM:
         """
 
         try:
-            response = self.watsonx_llm.generate([prompt])
+            with span("watsonx generate: equivalence", LLM):
+                response = self.watsonx_llm.generate([prompt])
             response_text = response.generations[0][0].text.strip()
 
             result = json.loads(response_text)
@@ -103,6 +105,22 @@ class WxAI_LLM:
         Returns:
             dict: Dictionary containing the average equivalence score.
         """
+        equivalence_scores = self.compute_equivalence_scores(df)
+
+        avg_equivalence_score = sum(equivalence_scores) / len(equivalence_scores) if equivalence_scores else 0
+
+        return {"Average SQL Equivalence Score": avg_equivalence_score}
+
+    def compute_equivalence_scores(self, df: pd.DataFrame):
+        """
+        Computes the SQL semantic equivalence score for every row in a DataFrame.
+
+        Parameters:
+            df (pd.DataFrame): DataFrame containing 'generated_sql', 'golden_sql', and 'database_schema'.
+
+        Returns:
+            list: Equivalence score (1 or 0) per row.
+        """
         equivalence_scores = []
 
         for _, row in df.iterrows():
@@ -111,6 +129,4 @@ class WxAI_LLM:
             )
             equivalence_scores.append(score)
 
-        avg_equivalence_score = sum(equivalence_scores) / len(equivalence_scores) if equivalence_scores else 0
-
-        return {"Average SQL Equivalence Score": avg_equivalence_score}
+        return equivalence_scores
@@ -14,24 +14,53 @@ def set_custom_subtitle(title_text, color_code):
     st.markdown(f"<h4 style='color: {color_code};'>{title_text}</h4>", unsafe_allow_html=True)
 
 
+# Folder served by Streamlit at app/static/ when server.enableStaticServing is on
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+STATIC_URL = "app/static"
+
+
+@st.cache_data(show_spinner=False)
+def encode_image(image_path):
+    """Reads and base64-encodes an image once per process instead of on every rerun."""
+    with open(image_path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def _background_css(image_url):
+    return f"""
+        <style>
+        .stApp {{
+            background-image: url("{image_url}");
+            background-size: cover;
+            background-position: center;
+            height: 100vh;
+            width: 100vw;
+        }}
+        </style>
+        """
+
+
+def add_bg_from_static(file_name):
+    """
+    Sets the background to an image of the static folder. The page only
+    references its URL, so the browser downloads and caches it once; without
+    static serving, the image is sent inline instead.
+
+    Parameters:
+        file_name (str): Image file in STATIC_DIR.
+    """
+    if not st.get_option("server.enableStaticServing"):
+        add_bg_from_local(os.path.join(STATIC_DIR, file_name))
+    elif os.path.exists(os.path.join(STATIC_DIR, file_name)):
+        st.markdown(_background_css(f"{STATIC_URL}/{file_name}"), unsafe_allow_html=True)
+    else:
+        st.warning("Background image not found. Skipping...")
+
+
 def add_bg_from_local(image_path):
     if os.path.exists(image_path):
-        with open(image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode()
-            st.markdown(
-                f"""
-                <style>
-                .stApp {{
-                    background-image: url("data:image/jpeg;base64,{image_data}");
-                    background-size: cover;
-                    background-position: center;
-                    height: 100vh;
-                    width: 100vw;
-                }}
-                </style>
-                """,
-                unsafe_allow_html=True,
-            )
+        image_data = encode_image(image_path)
+        st.markdown(_background_css(f"data:image/jpeg;base64,{image_data}"), unsafe_allow_html=True)
     else:
         st.warning("Background image not found. Skipping...")
 
@@ -1,17 +1,65 @@
+import os
 import streamlit as st
-from database.database_connector import DatabaseManager
+from database.backends import create_db_manager, SQLITE_BACKEND
+from database.database_connector import FILE_MODE, EVALUATION_PROFILE
+from database.connection_pool import DEFAULT_POOL_SIZE
+from metrics.query_utilization import monitor_query_utilization
 
 
-db_manager = DatabaseManager("t2s_sample.db")
+DB_NAME = "t2s_sample.db"
 
-def setup_database():
+# How evaluation queries reach the database: file, memory_copy or memory_shared
+DB_EXECUTION_MODE = os.getenv("DB_EXECUTION_MODE", FILE_MODE)
+
+# Evaluation only reads from the database, so it uses the tuned read-only profile.
+# DB_MMAP_SIZE (bytes) and DB_CACHE_SIZE (pages, or KiB if negative) override its settings.
+DB_CONNECTION_PROFILE = os.getenv("DB_CONNECTION_PROFILE", EVALUATION_PROFILE)
+DB_PROFILE_OVERRIDES = {
+    setting: int(os.environ[variable])
+    for setting, variable in (("mmap_size", "DB_MMAP_SIZE"), ("cache_size", "DB_CACHE_SIZE"))
+    if os.getenv(variable)
+}
+
+
+# Maximum number of SQLite connections used at the same time by all sessions and evaluation jobs
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+# Default execution backend: sqlite or duckdb. The backend can also be picked per run in the app.
+DB_BACKEND = os.getenv("DB_BACKEND", SQLITE_BACKEND)
+
+# Managers created by get_db_manager, closed by cleanup
+_db_managers = []
+
+
+@st.cache_resource(show_spinner=False)
+def get_db_manager(db_name: str = DB_NAME, execution_mode: str = DB_EXECUTION_MODE,
+                   profile: str = DB_CONNECTION_PROFILE, backend: str = DB_BACKEND):
     """
-    Sets up and connects to the SQLite database.
-    Returns a DatabaseManager instance if successful, else None.
+    Creates the database manager of a backend, shared by every script run and session.
+    Queries check out one of its pooled connections, so sessions do not wait for each other.
+    Streamlit keeps the returned object alive until the cache is cleared.
+    """
+    db_manager = create_db_manager(
+        db_name, backend, execution_mode=execution_mode, profile=profile, pool_size=DB_POOL_SIZE,
+        **DB_PROFILE_OVERRIDES
+    )
+    db_manager.connect()
+    _db_managers.append(db_manager)
+    return db_manager
+
+
+def setup_database(backend: str = DB_BACKEND):
+    """
+    Sets up and connects to the database of the given backend.
+    Returns a database manager instance if successful, else None.
     """
     try:
-        conn = db_manager.connect()
-        if conn is None:
+        db_manager = get_db_manager(backend=backend)
+        if not db_manager.is_connected:
+            # Do not keep a manager without a connection around for later runs; the
+            # managers of the other backends stay cached
+            get_db_manager.clear(backend=backend)
+            _db_managers.remove(db_manager)
             st.error("Database connection failed. Please check the database setup.")
         return db_manager
     except Exception as e:
@@ -33,7 +81,10 @@ def execute_query(db_manager, sql_query):
         return None, None
 
 def cleanup():
-    if db_manager:
-        db_manager.close_connection()
-
-cleanup()
\ No newline at end of file
+    """
+    Closes the shared database connections of every backend that has been used.
+    Only needed when the app shuts down, as the connections are reused across script runs.
+    """
+    while _db_managers:
+        _db_managers.pop().close_connection()
+    get_db_manager.clear()
@@ -0,0 +1,68 @@
+import streamlit as st
+
+from database.backends import SQLITE_BACKEND
+from services.database_service import DB_BACKEND
+from services.display_jobs import display_evaluation_job, display_metric_results
+from services.evaluation_jobs import get_job_manager, FINISHED_STATES
+from services.model_comparison import comparison_table
+from services.metric_registry import select_metrics
+
+
+def run_model_comparison(uploaded_df, models, dataset_id=None, file_hash=None, backend=DB_BACKEND):
+    """
+    Evaluates several models on the same questions as a background job and
+    displays their metrics side by side, then each model's sections.
+
+    Parameters:
+        uploaded_df (pd.DataFrame): The DataFrame with golden_sql and the generated_sql_<model> columns.
+        models (dict): Model name -> its column, as returned by detect_models.
+        dataset_id (str): Identifier of the dataset used to reuse results of its previous run.
+        file_hash (str): Content hash of the uploaded file.
+        backend (str): Database backend the queries are executed on.
+    """
+    metric_names = select_metrics(["generated_sql"] + [
+        column for column in ("golden_sql", "database_schema") if column in uploaded_df.columns
+    ])
+    if not metric_names:
+        return
+    if dataset_id is not None and backend != SQLITE_BACKEND:
+        # Execution metrics differ per backend, so their stored results are kept apart
+        dataset_id = f"{dataset_id}@{backend}"
+
+    st.markdown(f"## Model Comparison ({len(models)} models)")
+    manager = get_job_manager()
+    job_key = (file_hash or id(uploaded_df), tuple(models.items()), tuple(metric_names), backend)
+    job_id = manager.submit(job_key, uploaded_df, metric_names, dataset_id, backend=backend, models=models)
+
+    def restart():
+        manager.submit(job_key, uploaded_df, metric_names, dataset_id, restart=True, backend=backend, models=models)
+
+    display_evaluation_job(job_id, restart, display_comparison_results)
+
+
+def display_comparison_results(state):
+    """
+    Displays the aggregates of every model side by side, then each model's sections.
+
+    Parameters:
+        state (dict): State of a comparison job returned by EvaluationJob.snapshot.
+    """
+    models = list(state["models"])
+    if state["status"] in FINISHED_STATES and state["golden_stats"] is not None:
+        golden_stats = state["golden_stats"]
+        st.caption(
+            f"Golden queries, golden entities and the schema were computed {golden_stats['computed']} times "
+            f"and reused {golden_stats['reused']} times across the models."
+        )
+
+    table = comparison_table(state["summaries"], state["metric_names"])
+    if not table.empty:
+        st.dataframe(
+            table.style.format("{:.4g}", subset=models), hide_index=True, use_container_width=True
+        )
+
+    for model, tab in zip(models, st.tabs(models)):
+        with tab:
+            display_metric_results(
+                state, state["progress"][model], state["summaries"][model], state["metric_errors"][model]
+            )
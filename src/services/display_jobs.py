@@ -0,0 +1,135 @@
+import streamlit as st
+
+from database.backends import SQLITE_BACKEND
+from services.database_service import DB_BACKEND
+from services.display_metrics import display_metrics_by_type
+from services.display_results import display_per_row_results
+from services.evaluation_jobs import get_job_manager, RUNNING, QUEUED, CANCELLED, FAILED, FINISHED_STATES
+
+
+# How often the page polls a running job for new results
+POLL_INTERVAL_SECONDS = 1.0
+
+
+def run_evaluation_job(uploaded_df, metric_names, dataset_id=None, file_hash=None, backend=DB_BACKEND):
+    """
+    Submits the evaluation as a background job (or reuses the job already
+    submitted for the same file) and displays its live results.
+
+    Parameters:
+        uploaded_df (pd.DataFrame): The DataFrame containing SQL queries.
+        metric_names (tuple): Metric types to compute, in display order.
+        dataset_id (str): Identifier of the dataset used to reuse results of its previous run.
+        file_hash (str): Content hash of the uploaded file.
+        backend (str): Database backend the queries are executed on.
+    """
+    manager = get_job_manager()
+    job_key = (file_hash or id(uploaded_df), tuple(metric_names), backend)
+    if dataset_id is not None and backend != SQLITE_BACKEND:
+        # Execution metrics differ per backend, so their stored results are kept apart
+        dataset_id = f"{dataset_id}@{backend}"
+    job_id = manager.submit(job_key, uploaded_df, metric_names, dataset_id, backend=backend)
+
+    def restart():
+        manager.submit(job_key, uploaded_df, metric_names, dataset_id, restart=True, backend=backend)
+
+    display_evaluation_job(job_id, restart)
+
+
+def display_evaluation_job(job_id, restart_callback=None, display_results=None):
+    """
+    Displays a job. Running jobs are polled until they finish.
+
+    Parameters:
+        job_id (str): Id returned by EvaluationJobManager.submit.
+        restart_callback (function): Called when the user restarts a cancelled or failed job.
+        display_results (function): Renders the job's results as display_results(state);
+            the per-metric sections of a single evaluation if None.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.warning("This evaluation is no longer available. Please upload the file again.")
+        return
+
+    display_results = display_results or display_metric_results
+    if job.snapshot()["status"] in FINISHED_STATES:
+        _display_job_state(job.snapshot(), restart_callback, display_results)
+    else:
+        _poll_evaluation_job(job_id, restart_callback, display_results)
+
+
+@st.fragment(run_every=POLL_INTERVAL_SECONDS)
+def _poll_evaluation_job(job_id, restart_callback, display_results):
+    state = get_job_manager().get(job_id).snapshot()
+    if state["status"] in FINISHED_STATES:
+        # A full rerun renders the final results without polling
+        st.rerun()
+    _display_job_state(state, restart_callback, display_results)
+
+
+def _display_job_state(state, restart_callback, display_results):
+    manager = get_job_manager()
+    status = state["status"]
+
+    if status in (QUEUED, RUNNING):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            message = "Waiting for a free worker..." if status == QUEUED else "Calculating metrics..."
+            st.info(f"{message} ({state['elapsed']:.0f}s elapsed). Results below update as rows finish.")
+        with col2:
+            st.button("Cancel evaluation", on_click=manager.cancel, args=(state["job_id"],))
+    elif status == CANCELLED:
+        st.warning("Evaluation cancelled. Results below only cover the rows finished before cancelling.")
+    elif status == FAILED:
+        st.error(f"Error in metrics evaluation: {state['error']}")
+
+    if status in (CANCELLED, FAILED) and restart_callback is not None:
+        st.button("Restart evaluation", on_click=restart_callback)
+
+    display_results(state)
+
+    if status in FINISHED_STATES and state["results_run_id"] is not None:
+        display_per_row_results(state["results_run_id"])
+
+    if status in FINISHED_STATES and state["trace_summary"] is not None:
+        display_trace_summary(state["trace_summary"], state["trace_path"])
+
+
+def display_metric_results(state, progress=None, summaries=None, metric_errors=None):
+    """
+    Displays the progress, aggregates and errors of every metric of a job.
+
+    Parameters:
+        state (dict): Job state returned by EvaluationJob.snapshot.
+        progress (dict): Metric name -> (rows done, total rows); the job's if None.
+        summaries (dict): Metric name -> aggregate metrics; the job's if None.
+        metric_errors (dict): Metric name -> error message; the job's if None.
+    """
+    progress = state["progress"] if progress is None else progress
+    summaries = state["summaries"] if summaries is None else summaries
+    metric_errors = state["metric_errors"] if metric_errors is None else metric_errors
+
+    for metric_type in state["metric_names"]:
+        rows_done, total_rows = progress[metric_type]
+        if rows_done < total_rows and state["status"] not in (CANCELLED, FAILED):
+            label = metric_type.replace("_", " ").title()
+            st.progress(rows_done / total_rows, text=f"{label}: {rows_done} of {total_rows} rows")
+
+        if metric_type in metric_errors:
+            st.error(f"Error in {metric_type} evaluation: {metric_errors[metric_type]}")
+        elif metric_type in summaries:
+            display_metrics_by_type(summaries[metric_type], metric_type=metric_type)
+
+
+def display_trace_summary(summary, trace_path=None):
+    """
+    Displays where the time of a finished evaluation went.
+
+    Parameters:
+        summary (pd.DataFrame): Table returned by Trace.summary.
+        trace_path (str): Trace file written for the run.
+    """
+    with st.expander("Where did the time go"):
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+        if trace_path:
+            st.caption(f"Full trace: {trace_path} (open it in chrome://tracing or https://ui.perfetto.dev)")
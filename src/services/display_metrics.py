@@ -1,11 +1,103 @@
+import numpy as np
+import pandas as pd
 import streamlit as st
+from metrics.aggregators import PERCENTILES_KEY
 from .progress_bars import (
-    display_metric_with_custom_progress_bar,
-    display_metric_with_benchmark_progress_bar,
-    display_simple_progress_bar,
+    custom_progress_bar_html,
+    benchmark_progress_bar_html,
+    simple_progress_bar_html,
+    display_progress_bar_grid,
 )
 
 
+# (lower, upper) range of the progress bar of every metric, per metric type
+METRIC_THRESHOLDS = {
+    "performance": {
+        "Execution Time (s)": (5.0, 30.0),
+        "Peak Memory Used (MB)": (1000.0, 3000.0),
+        "CPU Time Used (seconds)": (0.1, 10.0),
+        "Disk I/O Read (MB)": (0.1, 10.0),
+        "Disk I/O Write (MB)": (0.1, 10.0),
+        "Median Execution Time (s)": (5.0, 30.0),
+        "P95 Execution Time (s)": (5.0, 30.0),
+        "VM Steps": (0, 1_000_000),
+        "Rows Returned": (0, 10_000),
+        "Page Cache Hits": (0, 100_000),
+        "Page Cache Misses": (0, 10_000),
+    },
+    "entity_evaluation": {
+        "Table Match Score": (0, 1),  
+        "Column Match Score": (0, 1),
+        "Condition Match Score": (0, 1),
+        "Aggregations Match Score": (0, 1),
+    },
+    "halstead": {
+        "Vocabulary": (2, 50),
+        "Length": (3, 100),
+        "Volume": (5, 300),
+        "Difficulty": (1, 15),
+        "Effort": (5, 3000),
+        "Estimated Errors": (0.0, 0.5),
+    },
+    "retrieval_accuracy": {
+        "Average Rows Precision": (0, 1),
+        "Average Column Precision": (0, 1),
+        "Average Rows Recall": (0, 1),
+        "Average Column Recall": (0, 1),
+    },
+    "sql_equivalence": {
+        "Average SQL Equivalence Score": (0, 1),
+    }
+}
+
+# Benchmarks for Halstead metrics; lower is better
+HALSTEAD_BENCHMARKS = {
+    "Vocabulary": 8,
+    "Length": 25,
+    "Volume": 70,
+    "Difficulty": 5,
+    "Effort": 1000,
+    "Estimated Errors": 0.02
+}
+
+# Benchmark of the other score metrics; higher is better
+DEFAULT_BENCHMARK = 0.85
+
+# Title and description of every metric section
+SECTION_INFO = {
+    "performance": (
+        "Performance Metrics",
+        "These metrics assess the efficiency of the system, including execution time, memory usage, and CPU utilization."
+    ),
+    "halstead": (
+        "Halstead Complexity Metrics",
+        '''Halstead Complexity Metrics analyze code complexity based on operators, operands, and program difficulty. 
+            Higher Vocabulary (n, The total number of unique operators and operands) suggests a complex query structure with multiple joins, conditions, or nested subqueries. 
+            Queires with bigger Length (N, Total occurrences of operators and operands) queries might indicate inefficient SQL with redundant operations. 
+            A higher Volume (N * log2(n), measures query information density) means a more information-heavy SQL, which might be harder to debug.
+            Queries with many unique operators and operands are harder to optimize (Difficulty (n1/2) * (N2/n2), measures how difficult it is to understand or modify the query). 
+            If Effort (D * V, estimated cognitive effort needed to understand the query) is high, the SQL query might be too complex for easy maintenance.
+            Complex queries (high Volume) are more prone to syntax errors and logic flaws (Estimated Errors, V / 3000, an approximation of how many errors might exist).'''
+    ),
+    "entity_evaluation": (
+        "Entity Evaluation Metrics",
+        '''Validates whether the entities (tables, columns, conditions, aggregations) referenced in the generated SQL 
+        query match with the same of ground truth SQL query. LLM extracts tables, columns, conditions, and aggregation functions 
+        from 'generated_sql' and 'golden_sql' and the calculates table, column, and condition match scores based on precision, recall, and F1-score.'''
+    ),
+    "retrieval_accuracy": (
+        "Data Retrieval Accuracy Metrics",
+        '''These metrics measure how accurately the system retrieves relevant rows and columns in response to a query.
+         It evaluates Output of the two SQL Queries in Comma Seperated Values and calculates Precision and Recall for rows and columns'''
+    ),
+    "sql_equivalence": (
+        "SQL Semantic Equivalence Metrics",
+        '''These metrics evaluate whether the generated SQL queries produce the same results as the expected reference queries.
+        LLMSQLEquivalence is a metric that can be used to evaluate the equivalence of response query with reference query. 
+        The metric also needs database schema to be used when comparing queries, this is inputted in reference_contexts. This metric is a binary metric, with 1 indicating that the SQL queries are semantically equivalent and 0 indicating that the SQL queries are not semantically equivalent.'''
+    )
+}
+
 
 def display_metrics_by_type(metrics, metric_type):
     """
@@ -15,50 +107,6 @@ def display_metrics_by_type(metrics, metric_type):
         metrics (dict): Dictionary containing metric values.
         metric_type (str): Type of metrics (e.g., "performance", "entity_evaluation", "sql_injection").
     """
-    # Define thresholds per metric type
-    metric_thresholds = {
-        "performance": {
-            "Execution Time (s)": (5.0, 30.0),
-            "Peak Memory Used (MB)": (1000.0, 3000.0),
-            "CPU Time Used (seconds)": (0.1, 10.0),
-            "Disk I/O Read (MB)": (0.1, 10.0),
-            "Disk I/O Write (MB)": (0.1, 10.0),
-        },
-        "entity_evaluation": {
-            "Table Match Score": (0, 1),  
-            "Column Match Score": (0, 1),
-            "Condition Match Score": (0, 1),
-            "Aggregations Match Score": (0, 1),
-        },
-        "halstead": {
-            "Vocabulary": (2, 50),
-            "Length": (3, 100),
-            "Volume": (5, 300),
-            "Difficulty": (1, 15),
-            "Effort": (5, 3000),
-            "Estimated Errors": (0.0, 0.5),
-        },
-        "retrieval_accuracy": {
-            "Average Rows Precision": (0, 1),
-            "Average Column Precision": (0, 1),
-            "Average Rows Recall": (0, 1),
-            "Average Column Recall": (0, 1),
-        },
-        "sql_equivalence": {
-            "Average SQL Equivalence Score": (0, 1),
-        }
-    }
-
-    # Benchmarks for Halstead metrics
-    halstead_benchmarks = {
-        "Vocabulary": 8,
-        "Length": 25,
-        "Volume": 70,
-        "Difficulty": 5,
-        "Effort": 1000,
-        "Estimated Errors": 0.02
-    }
-
     # Handle SQL Injection separately
     if metric_type == "sql_injection":
         st.markdown("## SQL Injection Detection")
@@ -77,84 +125,136 @@ def display_metrics_by_type(metrics, metric_type):
         # Find max occurrences to normalize progress bars
         max_occurrence = max(metrics.values()) if metrics else 1  # Avoid division by zero
 
-        col1, col2 = st.columns(2)
-        for i, (pattern, count) in enumerate(metrics.items()):
-            with (col1 if i % 2 == 0 else col2):
-                display_metric_with_custom_progress_bar(pattern, count, 0, max_occurrence)
-        return  
-
-
-    section_info = {
-        "performance": (
-            "Performance Metrics",
-            "These metrics assess the efficiency of the system, including execution time, memory usage, and CPU utilization."
-        ),
-        "halstead": (
-            "Halstead Complexity Metrics",
-            '''Halstead Complexity Metrics analyze code complexity based on operators, operands, and program difficulty. 
-                Higher Vocabulary (n, The total number of unique operators and operands) suggests a complex query structure with multiple joins, conditions, or nested subqueries. 
-                Queires with bigger Length (N, Total occurrences of operators and operands) queries might indicate inefficient SQL with redundant operations. 
-                A higher Volume (N * log2(n), measures query information density) means a more information-heavy SQL, which might be harder to debug.
-                Queries with many unique operators and operands are harder to optimize (Difficulty (n1/2) * (N2/n2), measures how difficult it is to understand or modify the query). 
-                If Effort (D * V, estimated cognitive effort needed to understand the query) is high, the SQL query might be too complex for easy maintenance.
-                Complex queries (high Volume) are more prone to syntax errors and logic flaws (Estimated Errors, V / 3000, an approximation of how many errors might exist).'''
-        ),
-        "entity_evaluation": (
-            "Entity Evaluation Metrics",
-            '''Validates whether the entities (tables, columns, conditions, aggregations) referenced in the generated SQL 
-            query match with the same of ground truth SQL query. LLM extracts tables, columns, conditions, and aggregation functions 
-            from 'generated_sql' and 'golden_sql' and the calculates table, column, and condition match scores based on precision, recall, and F1-score.'''
-        ),
-        "retrieval_accuracy": (
-            "Data Retrieval Accuracy Metrics",
-            '''These metrics measure how accurately the system retrieves relevant rows and columns in response to a query.
-             It evaluates Output of the two SQL Queries in Comma Seperated Values and calculates Precision and Recall for rows and columns'''
-        ),
-        "sql_equivalence": (
-            "SQL Semantic Equivalence Metrics",
-            '''These metrics evaluate whether the generated SQL queries produce the same results as the expected reference queries.
-            LLMSQLEquivalence is a metric that can be used to evaluate the equivalence of response query with reference query. 
-            The metric also needs database schema to be used when comparing queries, this is inputted in reference_contexts. This metric is a binary metric, with 1 indicating that the SQL queries are semantically equivalent and 0 indicating that the SQL queries are not semantically equivalent.'''
-        )
-    }
+        display_progress_bar_grid([
+            custom_progress_bar_html(pattern, count, 0, max_occurrence) for pattern, count in metrics.items()
+        ])
+        return
+
+
+    if metric_type == "index_advisor":
+        display_index_advice(metrics)
+        return
 
     # Display section title and description
-    title, description = section_info.get(metric_type, ("Unknown Metrics", "No description available."))
+    title, description = SECTION_INFO.get(metric_type, ("Unknown Metrics", "No description available."))
     st.markdown(f"## {title}")
     with st.expander(f"ℹ️ What is {title}?"):
         st.write(description)
 
-    # Display metrics in two columns
-    col1, col2 = st.columns(2)
-
-    for i, (metric, value) in enumerate(metrics.items()):
-        if metric in metric_thresholds.get(metric_type, {}):
-            lower, upper = metric_thresholds[metric_type][metric]
-
-            # Performance metrics use a simple progress bar (no "mean" label, different color)
-            if metric_type == "performance":
-                with (col1 if i % 2 == 0 else col2):
-                    display_simple_progress_bar(metric, value, lower, upper)
-
-            else:
-                # For non-performance (including Halstead, entity, retrieval, etc.)
-                # - Use Halstead benchmark logic if this is a Halstead metric
-                if metric_type == "halstead":
-                    # If below the benchmark => green; else => red
-                    benchmark = halstead_benchmarks.get(metric, 0.85)
-                    color = "green" if value < benchmark else "red"
-                else:
-                    # Fallback for other metric types
-                    benchmark = 0.85
-                    color = "green" if value >= benchmark else "red"
-
-                with (col1 if i % 2 == 0 else col2):
-                    display_metric_with_benchmark_progress_bar(
-                        metric, 
-                        value, 
-                        lower, 
-                        upper, 
-                        benchmark, 
-                        color, 
-                        width="80%"
-                    )
\ No newline at end of file
+    if metric_type == "performance":
+        st.caption(f"Average plan-based cost estimate: {metrics.get('Average Estimated Cost', 0):,.0f} rows visited.")
+        skipped = metrics.get("Queries Skipped (Estimated Cost)", 0)
+        if skipped:
+            st.warning(f"{skipped} queries were not executed because their estimated cost exceeded the threshold.")
+
+    # All bars of the section are sent as one element, in two columns
+    thresholds = METRIC_THRESHOLDS.get(metric_type, {})
+    bars = []
+    for metric, value in metrics.items():
+        if metric not in thresholds:
+            continue
+        # Counters that were not measured (e.g. page cache counters with memory-mapped I/O) are hidden
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        lower, upper = thresholds[metric]
+
+        # Performance metrics use a simple progress bar (no "mean" label, different color)
+        if metric_type == "performance":
+            bars.append(simple_progress_bar_html(metric, value, lower, upper))
+            continue
+
+        # For non-performance (including Halstead, entity, retrieval, etc.)
+        # - Use Halstead benchmark logic if this is a Halstead metric
+        if metric_type == "halstead":
+            # If below the benchmark => green; else => red
+            benchmark = HALSTEAD_BENCHMARKS.get(metric, DEFAULT_BENCHMARK)
+            color = "green" if value < benchmark else "red"
+        else:
+            # Fallback for other metric types
+            benchmark = DEFAULT_BENCHMARK
+            color = "green" if value >= benchmark else "red"
+        bars.append(benchmark_progress_bar_html(metric, value, lower, upper, benchmark, color, width="80%"))
+    display_progress_bar_grid(bars)
+
+    display_metric_percentiles(metrics)
+
+    if metric_type == "performance":
+        display_execution_time_distribution(metrics)
+
+
+def display_index_advice(metrics):
+    """
+    Display the plan issues found by the index advisor and the suggested indexes, grouped across the dataset.
+
+    Parameters:
+        metrics (dict): Summary returned by finalize_index_advice.
+    """
+    st.markdown("## Index Advisor")
+
+    with st.expander("ℹ️ What is the Index Advisor?"):
+        st.write(
+            "The index advisor runs EXPLAIN QUERY PLAN for every generated query without executing it. "
+            "It flags full table scans, temporary B-trees built to sort for ORDER BY, GROUP BY or DISTINCT, "
+            "and automatic indexes SQLite has to build while running the query. For the affected tables it "
+            "suggests covering indexes: equality columns first, then a range column, the sorting columns and "
+            "the other columns the query reads. If re-timing is enabled, each query is also timed on a scratch "
+            "copy of the database with its suggested indexes."
+        )
+
+    counts = {name: value for name, value in metrics.items() if name != "Suggested Indexes"}
+    columns = st.columns(len(counts))
+    for column, (name, value) in zip(columns, counts.items()):
+        column.metric(name, value)
+
+    suggested_indexes = metrics.get("Suggested Indexes", [])
+    if not suggested_indexes:
+        st.success("✅ No missing indexes found.")
+        return
+
+    suggestions_df = pd.DataFrame(suggested_indexes)
+    if suggestions_df["Median Speedup"].isna().all():
+        suggestions_df = suggestions_df.drop(columns=["Median Speedup"])
+    st.dataframe(suggestions_df, hide_index=True, use_container_width=True)
+
+
+def display_execution_time_distribution(metrics):
+    """
+    Display a histogram of the per-query execution times with their spread.
+
+    Parameters:
+        metrics (dict): Performance summary containing "Execution Time Histogram (s)".
+    """
+    histogram = metrics.get("Execution Time Histogram (s)") or {}
+    counts = histogram.get("Queries", [])
+    if sum(counts) < 2:
+        return
+
+    st.markdown("#### Execution Time Distribution")
+    caption = (
+        f"Median {metrics['Median Execution Time (s)']:.4f}s, p95 {metrics['P95 Execution Time (s)']:.4f}s, "
+        f"standard deviation {metrics['Std Execution Time (s)']:.4f}s across {sum(counts)} queries."
+    )
+    if "Average Trial Std (s)" in metrics:
+        caption += f" Average standard deviation between trials of a query: {metrics['Average Trial Std (s)']:.4f}s."
+    st.caption(caption)
+
+    chart = pd.DataFrame({"Queries": counts}, index=[f"{edge:.4f}" for edge in histogram["Edges"][:-1]])
+    chart.index.name = "Execution Time (s)"
+    st.bar_chart(chart)
+
+
+def display_metric_percentiles(metrics):
+    """
+    Display the p50/p95/p99 of every metric of a section, which the averages hide.
+
+    Parameters:
+        metrics (dict): Summary containing PERCENTILES_KEY.
+    """
+    percentiles = metrics.get(PERCENTILES_KEY)
+    if not percentiles:
+        return
+
+    with st.expander("Percentiles (p50 / p95 / p99)"):
+        table = pd.DataFrame.from_dict(percentiles, orient="index")
+        table.index.name = "Metric"
+        st.dataframe(table.style.format("{:.4g}"), use_container_width=True)
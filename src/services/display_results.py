@@ -0,0 +1,67 @@
+import streamlit as st
+
+from services.results_store import (
+    result_columns, query_results, FILTER_OPERATORS, VALUELESS_OPERATORS, ROW_COLUMN, DEFAULT_PAGE_SIZE,
+)
+
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+NO_FILTER = "(no filter)"
+
+
+@st.fragment
+def display_per_row_results(run_id):
+    """
+    Displays the per-row results of a run one page at a time. Filtering,
+    sorting and paging run as SQL on the stored results, so only the page
+    is sent to the browser; the controls rerun this section alone.
+
+    Parameters:
+        run_id (str): Identifier the results were stored under.
+    """
+    columns = result_columns(run_id)
+    if not columns:
+        return
+
+    st.markdown("## Per-Row Results")
+    st.caption("Find the queries behind the averages above, e.g. sort by a score to see the worst ones.")
+
+    sortable = [column for column in columns if column != ROW_COLUMN]
+    col1, col2, col3, col4, col5 = st.columns([3, 1, 3, 1, 2])
+    with col1:
+        filter_column = st.selectbox("Filter on", [NO_FILTER] + sortable, key=f"{run_id}_filter_column")
+    with col2:
+        operator = st.selectbox("Operator", list(FILTER_OPERATORS), key=f"{run_id}_filter_operator",
+                                disabled=filter_column == NO_FILTER)
+    with col3:
+        value = st.text_input("Value", key=f"{run_id}_filter_value",
+                              disabled=filter_column == NO_FILTER or operator in VALUELESS_OPERATORS)
+    with col4:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                 key=f"{run_id}_page_size")
+    with col5:
+        sort_by = st.selectbox("Sort by", [ROW_COLUMN] + sortable, key=f"{run_id}_sort_by")
+        descending = st.toggle("Largest first", key=f"{run_id}_descending")
+
+    filters = []
+    if filter_column != NO_FILTER and (operator in VALUELESS_OPERATORS or value != ""):
+        filters.append((filter_column, operator, value))
+
+    try:
+        _, total = query_results(run_id, filters, page_size=1)
+    except ValueError as e:
+        st.warning(str(e))
+        return
+
+    pages = max(-(-total // page_size), 1)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"{run_id}_page_{pages}")
+    page_df, total = query_results(
+        run_id, filters, sort_by=None if sort_by == ROW_COLUMN and not descending else sort_by,
+        descending=descending, page=page - 1, page_size=page_size,
+    )
+
+    first = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Rows {first:,}–{(page - 1) * page_size + len(page_df):,} of {total:,}")
+    st.dataframe(page_df, hide_index=True, use_container_width=True)
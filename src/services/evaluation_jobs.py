@@ -0,0 +1,274 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from services.database_service import setup_database, DB_BACKEND
+from services.metric_scheduler import run_metrics
+from services.model_comparison import compare_models
+from tracing import start_trace, report_trace, span
+from services.results_store import store_results
+
+
+# Number of evaluation jobs that run at the same time
+EVALUATION_WORKERS = 2
+
+# Rows computed between two progress updates of a metric
+EVALUATION_CHUNK_SIZE = 50
+
+# Finished jobs kept in memory so reruns and other sessions can render them
+MAX_FINISHED_JOBS = 16
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+FINISHED_STATES = (DONE, CANCELLED, FAILED)
+
+
+class EvaluationJob:
+    def __init__(self, job_key, uploaded_df, metric_names, dataset_id=None, backend=DB_BACKEND, models=None):
+        """
+        Holds the state of one background evaluation.
+
+        Parameters:
+            job_key (tuple): Identifies jobs that would produce the same results.
+            uploaded_df (pd.DataFrame): The DataFrame containing SQL queries.
+            metric_names (tuple): Metric types to compute, in display order.
+            dataset_id (str): Identifier of the dataset used to reuse results of its previous run.
+            backend (str): Database backend the queries are executed on.
+            models (dict): Model name -> its column, for a model comparison. The progress,
+                aggregates and errors are then kept per model.
+        """
+        self.job_id = uuid.uuid4().hex
+        self.job_key = job_key
+        self.uploaded_df = uploaded_df
+        self.metric_names = tuple(metric_names)
+        self.dataset_id = dataset_id
+        self.backend = backend
+        self.models = dict(models) if models is not None else None
+
+        self.status = QUEUED
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+        # Per metric: (rows done, total rows), latest aggregates, error and final per-row results
+        self.progress = {name: (0, len(uploaded_df)) for name in self.metric_names}
+        self.summaries = {}
+        self.metric_errors = {}
+        self.per_row_results = {}
+        if self.models is not None:
+            # The same per model; per-row results are not kept for comparisons
+            self.progress = {model: dict(self.progress) for model in self.models}
+            self.summaries = {model: {} for model in self.models}
+            self.metric_errors = {model: {} for model in self.models}
+
+        # Golden-side values computed and reused across the models of a comparison
+        self.golden_stats = None
+
+        # Where the time went, once the job has finished
+        self.trace_path = None
+        self.trace_summary = None
+
+        # Key of the per-row results in the results store, once they are stored
+        self.results_run_id = None
+
+    def update_progress(self, metric_name, rows_done, total_rows, summary):
+        with self.lock:
+            self.progress[metric_name] = (rows_done, total_rows)
+            if summary is not None:
+                self.summaries[metric_name] = summary
+
+    def update_model_progress(self, model, metric_name, rows_done, total_rows, summary):
+        with self.lock:
+            self.progress[model][metric_name] = (rows_done, total_rows)
+            if summary is not None:
+                self.summaries[model][metric_name] = summary
+
+    def snapshot(self):
+        """
+        Returns a consistent copy of the job state for rendering.
+
+        Returns:
+            dict: Status, per-metric progress, partial or final aggregates and errors.
+        """
+        def copy(values):
+            # Comparisons keep one dictionary per model
+            return {key: dict(value) if self.models is not None else value for key, value in values.items()}
+
+        with self.lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "error": self.error,
+                "metric_names": self.metric_names,
+                "models": self.models,
+                "progress": copy(self.progress),
+                "summaries": copy(self.summaries),
+                "metric_errors": copy(self.metric_errors),
+                "golden_stats": self.golden_stats,
+                "elapsed": (self.finished_at or time.time()) - self.submitted_at,
+                "trace_path": self.trace_path,
+                "trace_summary": self.trace_summary,
+                "results_run_id": self.results_run_id,
+            }
+
+    def run(self):
+        """
+        Computes the metrics in chunks through the metric scheduler, publishing
+        aggregates after each chunk.
+        """
+        with self.lock:
+            if self.cancel_event.is_set():
+                self.status = CANCELLED
+                self.finished_at = time.time()
+                return
+            self.status = RUNNING
+
+        if self.models is not None:
+            self._run_comparison()
+            return
+
+        with start_trace(f"evaluation_{self.dataset_id or self.job_id}") as trace:
+            try:
+                results, errors = run_metrics(
+                    self.uploaded_df,
+                    self.metric_names,
+                    self.dataset_id,
+                    setup_database(self.backend),
+                    chunk_size=EVALUATION_CHUNK_SIZE,
+                    progress_callback=self.update_progress,
+                    cancel_event=self.cancel_event,
+                )
+
+                with self.lock:
+                    for metric_name, (per_row, summary) in results.items():
+                        self.per_row_results[metric_name] = per_row
+                        self.summaries[metric_name] = summary
+                    self.metric_errors.update(errors)
+
+                # Kept in SQLite for the paginated per-row view
+                try:
+                    with span("store per-row results"):
+                        store_results(self.job_id, self.uploaded_df,
+                                      {name: per_row for name, (per_row, _) in results.items()})
+                    results_run_id = self.job_id
+                except Exception as e:
+                    print(f"Could not store the per-row results: {e}")
+                    results_run_id = None
+                status, error = (CANCELLED if self.cancel_event.is_set() else DONE), None
+            except Exception as e:
+                status, error, results_run_id = FAILED, str(e), None
+
+        self._finish(trace, status, error, results_run_id)
+
+    def _run_comparison(self):
+        """
+        Evaluates every model of a comparison, publishing each model's
+        aggregates after each chunk.
+        """
+        with start_trace(f"comparison_{self.dataset_id or self.job_id}") as trace:
+            try:
+                results, errors, golden_stats = compare_models(
+                    self.uploaded_df,
+                    self.models,
+                    self.dataset_id,
+                    setup_database(self.backend),
+                    self.metric_names,
+                    chunk_size=EVALUATION_CHUNK_SIZE,
+                    progress_callback=self.update_model_progress,
+                    cancel_event=self.cancel_event,
+                )
+
+                with self.lock:
+                    for model, model_results in results.items():
+                        for metric_name, (_, summary) in model_results.items():
+                            self.summaries[model][metric_name] = summary
+                        self.metric_errors[model].update(errors.get(model, {}))
+                    self.golden_stats = golden_stats
+                status, error = (CANCELLED if self.cancel_event.is_set() else DONE), None
+            except Exception as e:
+                status, error = FAILED, str(e)
+
+        self._finish(trace, status, error, None)
+
+    def _finish(self, trace, status, error, results_run_id):
+        # The status is published with the trace, so a finished job always has its report
+        trace_path, trace_summary = report_trace(trace)
+        with self.lock:
+            self.status, self.error = status, error
+            self.trace_path, self.trace_summary = trace_path, trace_summary
+            self.results_run_id = results_run_id
+            self.finished_at = time.time()
+            # The input is no longer needed once the job has finished
+            self.uploaded_df = None
+
+
+class EvaluationJobManager:
+    def __init__(self, max_workers: int = EVALUATION_WORKERS):
+        """
+        Runs evaluation jobs on a shared worker pool.
+
+        Parameters:
+            max_workers (int): Number of jobs that run at the same time.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evaluation")
+        self.jobs = {}
+        self.jobs_by_key = {}
+        self.lock = threading.Lock()
+
+    def submit(self, job_key, uploaded_df, metric_names, dataset_id=None, restart=False, backend=DB_BACKEND,
+               models=None):
+        """
+        Submits an evaluation, or returns the existing job for the same key.
+
+        Parameters:
+            job_key (tuple): Identifies jobs that would produce the same results.
+            uploaded_df (pd.DataFrame): The DataFrame containing SQL queries.
+            metric_names (tuple): Metric types to compute, in display order.
+            dataset_id (str): Identifier of the dataset used to reuse results of its previous run.
+            restart (bool): Submit a new job even if one exists for the key.
+            backend (str): Database backend the queries are executed on.
+            models (dict): Model name -> its column, to compare several models.
+
+        Returns:
+            str: Job id.
+        """
+        with self.lock:
+            existing = self.jobs.get(self.jobs_by_key.get(job_key))
+            if existing is not None and not restart:
+                return existing.job_id
+
+            job = EvaluationJob(job_key, uploaded_df, metric_names, dataset_id, backend, models)
+            self.jobs[job.job_id] = job
+            self.jobs_by_key[job_key] = job.job_id
+            self._evict_finished_jobs()
+
+        self.executor.submit(job.run)
+        return job.job_id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+
+    def _evict_finished_jobs(self):
+        finished = [job for job in self.jobs.values() if job.status in FINISHED_STATES]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job.job_id]
+            if self.jobs_by_key.get(job.job_key) == job.job_id:
+                del self.jobs_by_key[job.job_key]
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager():
+    """
+    Returns the job manager shared by every session of the app.
+    """
+    return EvaluationJobManager()
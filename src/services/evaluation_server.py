@@ -0,0 +1,506 @@
+# HTTP service that scores SQL through the metric pipelines, for CI jobs and
+# other services.
+#
+# Run from src/ with:
+#     python -m services.evaluation_server [--host 127.0.0.1] [--port 8502] [--backend sqlite]
+#
+# Endpoints:
+#     POST /evaluate  {"rows": [{"generated_sql": ..., "golden_sql": ..., "database_schema": ...}, ...],
+#                      "metrics": ["halstead", "performance", ...]}
+#                     A single row may be sent as {"row": {...}} or as the body itself. Without
+#                     "metrics", every metric the columns allow is computed.
+#                     Returns the per-row results of every metric, their summaries and the
+#                     errors of the metrics that failed.
+#     GET  /metrics   The registered metrics with their resource class and required columns.
+#     GET  /stats     Throughput, latency and queue depth.
+#     GET  /health
+#
+# Rows sent at the same time by different requests are grouped into micro-batches for
+# the DB and LLM metrics: each of their batchers waits up to BATCH_WAIT_MS for more rows
+# (at most MAX_BATCH_ROWS) and computes them in one call, on as many workers as the
+# metric scheduler gives the resource class. CPU metrics run in the request's thread.
+import os
+import math
+import time
+import json
+import queue
+import argparse
+import datetime
+import threading
+import collections
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+
+from database.backends import create_db_manager, BACKENDS
+from metrics.aggregators import StreamingAggregate
+from services.database_service import (
+    DB_NAME, DB_EXECUTION_MODE, DB_CONNECTION_PROFILE, DB_PROFILE_OVERRIDES, DB_POOL_SIZE, DB_BACKEND,
+)
+from services.metric_registry import METRIC_REGISTRY, select_metrics, DB, LLM
+from services.metric_scheduler import RESOURCE_WORKERS
+
+
+DEFAULT_HOST = os.getenv("EVALUATION_SERVER_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("EVALUATION_SERVER_PORT", 8502))
+
+# How long a batcher waits for more rows after the first one arrives
+BATCH_WAIT_MS = int(os.getenv("BATCH_WAIT_MS", 20))
+
+# Rows computed by one call of a metric
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", 256))
+
+# Largest request accepted, in rows and in bytes
+MAX_REQUEST_ROWS = 10_000
+MAX_REQUEST_BYTES = 50 * 1024 * 1024
+
+# Longest a request waits for its batched metrics
+REQUEST_TIMEOUT_SECONDS = 600
+
+# Resource classes whose rows are batched across requests
+BATCHED_RESOURCES = (DB, LLM)
+
+# Period the recent throughput in /stats is computed over
+STATS_WINDOW_SECONDS = 60
+
+
+def _json_safe(value):
+    """
+    Converts metric output to values json can write: NaN and infinities
+    become null, numpy and pandas values become Python ones.
+    """
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, np.ndarray, pd.Series)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+class _PendingRows:
+    def __init__(self, df):
+        self.df = df
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, spec, db_manager, workers: int = 1, max_batch_rows: int = MAX_BATCH_ROWS,
+                 batch_wait_ms: int = BATCH_WAIT_MS):
+        """
+        Groups the rows submitted for one metric by concurrent requests and
+        computes them in batches.
+
+        Parameters:
+            spec (MetricSpec): The metric.
+            db_manager (DatabaseManager): The database manager used by execution-based metrics.
+            workers (int): Batches computed at the same time.
+            max_batch_rows (int): Rows per batch; a larger submission is computed on its own.
+            batch_wait_ms (int): How long to wait for more rows after the first one.
+        """
+        self.spec = spec
+        self.db_manager = db_manager
+        self.max_batch_rows = max_batch_rows
+        self.batch_wait = batch_wait_ms / 1000
+        self.queue = queue.Queue()
+
+        self.lock = threading.Lock()
+        self.queued_rows = 0
+        self.batches = 0
+        self.rows = 0
+        self.submissions = 0
+        self.busy_seconds = 0.0
+        self.batch_sizes = StreamingAggregate()
+        self.queue_wait = StreamingAggregate()
+
+        self.threads = [
+            threading.Thread(target=self._run, name=f"batcher-{spec.name}-{index}", daemon=True)
+            for index in range(max(workers, 1))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, df):
+        """
+        Queues rows for the next batch.
+
+        Parameters:
+            df (pd.DataFrame): Rows with the metric's required columns.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the per-row results, aligned with df.
+        """
+        pending = _PendingRows(df.reset_index(drop=True))
+        with self.lock:
+            self.queued_rows += len(df)
+            self.submissions += 1
+        self.queue.put(pending)
+        return pending.future
+
+    def _collect(self, first):
+        batch, rows = [first], len(first.df)
+        deadline = time.perf_counter() + self.batch_wait
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                self.queue.put(None)
+                break
+            batch.append(pending)
+            rows += len(pending.df)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                # Leave the stop signal for the other workers
+                self.queue.put(None)
+                return
+            self._compute(self._collect(first))
+
+    def _compute(self, batch):
+        started = time.perf_counter()
+        sizes = [len(pending.df) for pending in batch]
+        with self.lock:
+            self.queued_rows -= sum(sizes)
+            for pending in batch:
+                self.queue_wait.add((started - pending.queued_at) * 1000)
+
+        try:
+            batch_df = pd.concat([pending.df for pending in batch], ignore_index=True)
+            results = self.spec.compute_rows(batch_df, self.db_manager).reset_index(drop=True)
+            offset = 0
+            for pending, size in zip(batch, sizes):
+                pending.future.set_result(results.iloc[offset:offset + size].reset_index(drop=True))
+                offset += size
+        except Exception as e:
+            print(f"Error computing a {self.spec.name} batch of {sum(sizes)} rows: {e}")
+            for pending in batch:
+                pending.future.set_exception(e)
+
+        with self.lock:
+            self.batches += 1
+            self.rows += sum(sizes)
+            self.busy_seconds += time.perf_counter() - started
+            self.batch_sizes.add(sum(sizes))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "resource": self.spec.resource,
+                "queued_rows": self.queued_rows,
+                "queued_submissions": self.queue.qsize(),
+                "submissions": self.submissions,
+                "rows": self.rows,
+                "batches": self.batches,
+                "mean_batch_rows": self.batch_sizes.mean if self.batches else None,
+                "max_batch_rows": self.batch_sizes.max if self.batches else None,
+                "busy_seconds": self.busy_seconds,
+                "queue_wait_ms": self.queue_wait.percentiles() if self.queue_wait.count else None,
+            }
+
+    def close(self):
+        self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+class EvaluationService:
+    def __init__(self, db_manager, max_batch_rows: int = MAX_BATCH_ROWS, batch_wait_ms: int = BATCH_WAIT_MS):
+        """
+        Computes metrics for the rows of HTTP requests.
+
+        Parameters:
+            db_manager (DatabaseManager): The database manager used by execution-based metrics.
+            max_batch_rows (int): Rows per micro-batch.
+            batch_wait_ms (int): How long a micro-batch waits for more rows.
+        """
+        self.db_manager = db_manager
+        self.batchers = {
+            name: MicroBatcher(spec, db_manager, RESOURCE_WORKERS[spec.resource], max_batch_rows, batch_wait_ms)
+            for name, spec in METRIC_REGISTRY.items() if spec.resource in BATCHED_RESOURCES
+        }
+
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.rows = 0
+        self.latency = StreamingAggregate()
+        # (finish time, rows) of the requests of the last STATS_WINDOW_SECONDS
+        self.recent = collections.deque()
+
+    def evaluate(self, rows, metric_names=None):
+        """
+        Computes metrics for a list of rows.
+
+        Parameters:
+            rows (list): Dictionaries with generated_sql and, for some metrics, golden_sql and database_schema.
+            metric_names (list): Metrics to compute. Every metric the columns allow if None.
+
+        Returns:
+            dict: metrics, per-row results, summaries and per-metric errors.
+
+        Raises:
+            ValueError: If the request is malformed.
+        """
+        if not rows:
+            raise ValueError("The request has no rows.")
+        if len(rows) > MAX_REQUEST_ROWS:
+            raise ValueError(f"At most {MAX_REQUEST_ROWS} rows are accepted per request.")
+        if not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Every row must be an object.")
+        df = pd.DataFrame(rows)
+
+        if metric_names is None:
+            metric_names = select_metrics(df.columns)
+        unknown = [name for name in metric_names if name not in METRIC_REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown metrics {unknown}. Expected some of {list(METRIC_REGISTRY)}.")
+        for name in metric_names:
+            missing = set(METRIC_REGISTRY[name].required_columns) - set(df.columns)
+            if missing:
+                raise ValueError(f"Metric '{name}' needs the columns {sorted(missing)}.")
+        if not metric_names:
+            raise ValueError("No metric can be computed from the columns of the rows.")
+
+        started = time.perf_counter()
+        with self.lock:
+            self.in_flight += 1
+        try:
+            per_row, errors = self._compute(df, metric_names)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        results = [{"row": index} for index in range(len(df))]
+        summaries = {}
+        for name, rows_of_metric in per_row.items():
+            for index, record in enumerate(rows_of_metric.to_dict("records")):
+                results[index][name] = record
+            try:
+                summaries[name] = METRIC_REGISTRY[name].summarize(rows_of_metric)
+            except Exception as e:
+                errors[name] = f"Summary failed: {e}"
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.requests += 1
+            self.rows += len(df)
+            self.latency.add(elapsed * 1000)
+            self.recent.append((time.time(), len(df)))
+
+        return _json_safe({
+            "metrics": list(metric_names),
+            "results": results,
+            "summaries": summaries,
+            "errors": errors,
+            "elapsed_seconds": elapsed,
+        })
+
+    def _compute(self, df, metric_names):
+        # Batched metrics are queued first, so they run while the CPU metrics are computed here
+        futures = {
+            name: self.batchers[name].submit(df[list(METRIC_REGISTRY[name].required_columns)])
+            for name in metric_names if name in self.batchers
+        }
+
+        per_row, errors = {}, {}
+        for name in metric_names:
+            if name in futures:
+                continue
+            spec = METRIC_REGISTRY[name]
+            try:
+                per_row[name] = spec.compute_rows(df[list(spec.required_columns)], self.db_manager).reset_index(drop=True)
+            except Exception as e:
+                print(f"Error computing {name}: {e}")
+                errors[name] = str(e)
+
+        deadline = time.perf_counter() + REQUEST_TIMEOUT_SECONDS
+        for name, future in futures.items():
+            try:
+                per_row[name] = future.result(timeout=max(deadline - time.perf_counter(), 0))
+            except Exception as e:
+                errors[name] = str(e) or type(e).__name__
+
+        # Results in the requested order
+        return {name: per_row[name] for name in metric_names if name in per_row}, errors
+
+    def record_failure(self):
+        with self.lock:
+            self.failed_requests += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Request and row counts, throughput overall and over the last
+            STATS_WINDOW_SECONDS, latency percentiles, queue depth per batched metric
+            and the state of the connection pool.
+        """
+        now = time.time()
+        with self.lock:
+            while self.recent and self.recent[0][0] < now - STATS_WINDOW_SECONDS:
+                self.recent.popleft()
+            uptime = now - self.started_at
+            service = {
+                "uptime_seconds": uptime,
+                "requests": self.requests,
+                "failed_requests": self.failed_requests,
+                "in_flight_requests": self.in_flight,
+                "rows": self.rows,
+                "rows_per_second": self.rows / uptime if uptime else 0.0,
+                "recent_rows_per_second": sum(rows for _, rows in self.recent) / min(uptime, STATS_WINDOW_SECONDS)
+                if uptime else 0.0,
+                "latency_ms": self.latency.percentiles() if self.latency.count else None,
+            }
+        batchers = {name: batcher.stats() for name, batcher in self.batchers.items()}
+        service["queued_rows"] = sum(stats["queued_rows"] for stats in batchers.values())
+        service["batchers"] = batchers
+        pool = getattr(self.db_manager, "pool", None)
+        if pool is not None and hasattr(pool, "stats"):
+            service["connection_pool"] = pool.stats()
+        return _json_safe(service)
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+
+
+class EvaluationRequestHandler(BaseHTTPRequestHandler):
+    server_version = "TextToSQLEvaluation/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            raise ValueError(f"The request body is larger than {MAX_REQUEST_BYTES} bytes.")
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"The request body is not valid JSON: {e}")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.service.stats())
+        elif self.path == "/metrics":
+            self._send_json(200, {
+                name: {"resource": spec.resource, "required_columns": list(spec.required_columns)}
+                for name, spec in METRIC_REGISTRY.items()
+            })
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "database_connected": bool(self.service.db_manager.is_connected)})
+        else:
+            self._send_json(404, {"error": f"Unknown path '{self.path}'."})
+
+    def do_POST(self):
+        if self.path != "/evaluate":
+            self._send_json(404, {"error": f"Unknown path '{self.path}'."})
+            return
+        try:
+            body = self._read_json()
+            if not isinstance(body, dict):
+                raise ValueError("The request body must be a JSON object.")
+            if "rows" in body:
+                rows = body["rows"]
+            elif "row" in body:
+                rows = [body["row"]]
+            else:
+                rows = [{key: value for key, value in body.items() if key != "metrics"}]
+            if not isinstance(rows, list):
+                raise ValueError("'rows' must be a list of objects.")
+            metric_names = body.get("metrics")
+            if metric_names is not None and not isinstance(metric_names, list):
+                raise ValueError("'metrics' must be a list of metric names.")
+            response = self.service.evaluate(rows, metric_names)
+        except ValueError as e:
+            self.service.record_failure()
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.service.record_failure()
+            print(f"Error evaluating a request: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, response)
+
+    def log_message(self, format, *args):
+        # One line per request, without the default stderr formatting
+        print(f"{self.address_string()} {format % args}")
+
+
+def create_server(service, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    Creates the HTTP server of an evaluation service; each request is handled on its own thread.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving.
+    """
+    server = ThreadingHTTPServer((host, port), EvaluationRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves the metric pipelines over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--db", default=DB_NAME, help="SQLite database file")
+    parser.add_argument("--backend", default=DB_BACKEND, choices=BACKENDS, help="Database backend")
+    parser.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS, help="Rows per micro-batch")
+    parser.add_argument("--batch-wait-ms", type=int, default=BATCH_WAIT_MS,
+                        help="How long a micro-batch waits for more rows")
+    args = parser.parse_args()
+
+    db_manager = create_db_manager(
+        args.db, args.backend, execution_mode=DB_EXECUTION_MODE, profile=DB_CONNECTION_PROFILE,
+        pool_size=DB_POOL_SIZE, **DB_PROFILE_OVERRIDES
+    )
+    if db_manager.connect() is None:
+        raise SystemExit(f"Could not connect to '{args.db}'.")
+
+    service = EvaluationService(db_manager, args.max_batch_rows, args.batch_wait_ms)
+    server = create_server(service, args.host, args.port)
+    print(f"Evaluation service listening on http://{args.host}:{args.port} "
+          f"(POST /evaluate, GET /stats, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
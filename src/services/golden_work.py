@@ -0,0 +1,145 @@
+# Golden-side work shared by the evaluations of several models on the same questions.
+#
+# Inside share_golden_work(), golden_work() computes every (kind, key) once: the
+# golden query results, the entities extracted from the golden queries and the
+# parsed database schema are reused by every model, including models evaluated
+# at the same time on other threads (a thread asking for a value being computed
+# waits for it). The shared work follows the calling context into the metric
+# scheduler's executors, like the tracing spans.
+#
+# When the evaluations are registered as consumers (see SharedGoldenWork.consumer),
+# a value is released once every unfinished consumer has used it, so the
+# shared values do not pile up for the whole comparison.
+#
+# Outside share_golden_work(), golden_work() just computes the value.
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+
+_current_work = contextvars.ContextVar("shared_golden_work", default=None)
+_current_consumer = contextvars.ContextVar("golden_work_consumer", default=None)
+
+
+class SharedGoldenWork:
+    def __init__(self, consumers=()):
+        """
+        Values computed once for all the evaluations of a comparison.
+
+        Parameters:
+            consumers (iterable): Names of the evaluations sharing the values, e.g. the models.
+                Registered up front, so a value is not released before the last of them starts.
+        """
+        # (kind, key) -> Future of the value
+        self.values = {}
+        # (kind, key) -> consumers that have used the value
+        self.users = {}
+        # Consumers that have not finished yet
+        self.consumers = set(consumers)
+        self.lock = threading.Lock()
+        self.computed = 0
+        self.reused = 0
+        self.released = 0
+
+    @contextmanager
+    def consumer(self, name):
+        """
+        Runs the enclosed block (e.g. one model's evaluation) as a consumer.
+        Values are released once every unfinished consumer has used them; when
+        the block ends, it no longer holds back the release of any value.
+
+        Parameters:
+            name (str): One of the consumers given to the constructor.
+        """
+        token = _current_consumer.set(name)
+        try:
+            yield
+        finally:
+            _current_consumer.reset(token)
+            with self.lock:
+                self.consumers.discard(name)
+                for value_key in list(self.users):
+                    self._release_if_used(value_key)
+
+    def _release_if_used(self, value_key):
+        # Values still being computed are kept, so waiting callers get them
+        if self.consumers <= self.users[value_key] and self.values[value_key].done():
+            del self.values[value_key]
+            del self.users[value_key]
+            self.released += 1
+
+    def get_or_compute(self, kind, key, compute):
+        """
+        Returns the value of (kind, key), computing it only for the first caller.
+
+        Parameters:
+            kind (str): What the value is, e.g. "golden result".
+            key: Identifies the value within its kind, e.g. the golden SQL.
+            compute (function): Computes the value; its exception is raised to every caller.
+        """
+        value_key = (kind, key)
+        with self.lock:
+            future = self.values.get(value_key)
+            owner = future is None
+            if owner:
+                future = self.values[value_key] = Future()
+                self.users[value_key] = set()
+                self.computed += 1
+            else:
+                self.reused += 1
+            consumer = _current_consumer.get()
+            if consumer is not None:
+                self.users[value_key].add(consumer)
+
+        if owner:
+            try:
+                future.set_result(compute())
+            except Exception as e:
+                future.set_exception(e)
+        value = future.result()
+
+        if consumer is not None:
+            with self.lock:
+                if self.values.get(value_key) is future:
+                    self._release_if_used(value_key)
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {"computed": self.computed, "reused": self.reused, "released": self.released}
+
+
+@contextmanager
+def share_golden_work(consumers=()):
+    """
+    Shares golden-side work between the evaluations run in the enclosed block.
+
+    Parameters:
+        consumers (iterable): Names of the evaluations, each run inside SharedGoldenWork.consumer.
+            Without consumers, the values are kept until the block ends.
+
+    Yields:
+        SharedGoldenWork: The shared values.
+    """
+    work = SharedGoldenWork(consumers)
+    token = _current_work.set(work)
+    try:
+        yield work
+    finally:
+        _current_work.reset(token)
+
+
+def golden_work(kind, key, compute):
+    """
+    Computes a golden-side value, or reuses it when work is shared.
+
+    Parameters:
+        kind (str): What the value is, e.g. "golden result".
+        key: Identifies the value within its kind; must be hashable.
+        compute (function): Computes the value.
+    """
+    work = _current_work.get()
+    if work is None:
+        return compute()
+    return work.get_or_compute(kind, key, compute)
@@ -0,0 +1,185 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+from metrics.aggregators import merge_aggregates
+from services.metric_registry import get_metric
+from tracing import span, CACHE
+
+# Directory where per-row results of previous runs are kept
+EVAL_CACHE_DIR = ".eval_cache"
+
+# Bump when the layout or the meaning of the stored results changes
+CACHE_VERSION = 6
+
+ROW_HASH_COLUMN = "row_hash"
+
+
+def compute_row_hashes(df, input_columns):
+    """
+    Hashes the metric inputs of every row in a DataFrame.
+
+    Parameters:
+        df (pd.DataFrame): The DataFrame containing SQL queries.
+        input_columns (list): Columns whose values feed the metric.
+
+    Returns:
+        pd.Series: SHA-256 hex digest per row, aligned with df.
+    """
+    def hash_row(values):
+        joined = "\x1f".join("" if pd.isna(value) else str(value) for value in values)
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+    rows = df[input_columns].itertuples(index=False, name=None)
+    return pd.Series([hash_row(values) for values in rows], index=df.index, dtype=object)
+
+
+def _cache_path(dataset_id, metric_name, config_key=None):
+    dataset_key = hashlib.sha1(str(dataset_id).encode("utf-8")).hexdigest()[:16]
+    metric_key = f"{metric_name}.{config_key}" if config_key else metric_name
+    return os.path.join(EVAL_CACHE_DIR, dataset_key, f"{metric_key}.v{CACHE_VERSION}.pkl")
+
+
+def load_cached_results(dataset_id, metric_name, config_key=None):
+    """
+    Loads the per-row results stored by the previous run of a dataset.
+
+    Parameters:
+        dataset_id (str): Identifier of the dataset (e.g. the uploaded file name).
+        metric_name (str): Name of the metric.
+        config_key (str): Hash of the metric's configuration (MetricSpec.config_key).
+
+    Returns:
+        pd.DataFrame: Stored results indexed by row hash, or None if nothing is stored.
+    """
+    path = _cache_path(dataset_id, metric_name, config_key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"Ignoring unreadable cached results '{path}': {e}")
+        return None
+
+
+def store_cached_results(dataset_id, metric_name, results, config_key=None):
+    """
+    Stores per-row results so the next run of the dataset can reuse them.
+
+    Parameters:
+        dataset_id (str): Identifier of the dataset (e.g. the uploaded file name).
+        metric_name (str): Name of the metric.
+        results (pd.DataFrame): Per-row results indexed by row hash.
+        config_key (str): Hash of the metric's configuration (MetricSpec.config_key).
+    """
+    path = _cache_path(dataset_id, metric_name, config_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    results.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _available_rows(cached, row_hashes):
+    """Returns the stored results for the rows of row_hashes that have been computed."""
+    available = row_hashes[row_hashes.isin(cached.index)]
+    if available.empty:
+        return pd.DataFrame(index=available.index)
+    per_row = cached.loc[available.tolist()]
+    per_row.index = available.index
+    return per_row
+
+
+def evaluate_metric_incrementally(metric_name, df, dataset_id=None, db_manager=None,
+                                  chunk_size=None, progress_callback=None, cancel_event=None):
+    """
+    Computes a metric for the rows that are new or changed since the previous
+    run of the same dataset and merges them with the stored results. The
+    summary is kept as a running aggregate: each chunk is aggregated once and
+    merged, instead of summarizing every row again.
+
+    Parameters:
+        metric_name (str): Name of a metric in the metric registry.
+        df (pd.DataFrame): The DataFrame containing SQL queries.
+        dataset_id (str): Identifier of the dataset. If None, every row is computed and nothing is stored.
+        db_manager (DatabaseManager): The database manager used by execution-based metrics.
+        chunk_size (int): Number of pending rows computed at a time. All at once if None.
+        progress_callback (function): Called as progress_callback(rows_done, total_rows, partial_summary)
+            before the first chunk and after every chunk.
+        cancel_event (threading.Event): Stops computing further chunks once set.
+
+    Returns:
+        tuple: (Per-row results aligned with df, dictionary of aggregate metrics).
+        If cancelled, only the rows computed so far are returned.
+    """
+    metric = get_metric(metric_name)
+    # Results computed with other settings or on another database are not reused
+    config_key = metric.config_key(db_manager) if dataset_id is not None else None
+    with span(f"{metric_name}: hash rows", CACHE):
+        row_hashes = compute_row_hashes(df, list(metric.required_columns))
+    # Identical input rows are computed once but count as often as they appear
+    hash_counts = row_hashes.value_counts()
+
+    with span(f"{metric_name}: load cached results", CACHE):
+        cached = load_cached_results(dataset_id, metric_name, config_key) if dataset_id is not None else None
+    if cached is None:
+        cached = pd.DataFrame()
+    cached = cached[~cached.index.duplicated(keep="last")]
+
+    reused = row_hashes.isin(cached.index)
+    pending = ~reused & ~row_hashes.duplicated()
+    pending_df = df.loc[pending].reset_index(drop=True)
+    pending_hashes = row_hashes[pending].tolist()
+
+    # Only the stored rows of the current run are kept, so the store does not grow without bound
+    reused_results = cached.loc[pd.unique(row_hashes[reused])]
+    del cached
+
+    print(f"{metric_name}: computing {len(pending_df)} of {len(df)} rows, "
+          f"{int(reused.sum())} reused from the previous run")
+
+    def aggregate(results):
+        weights = hash_counts.reindex(results.index).to_numpy()
+        return metric.aggregate(results.iloc[np.repeat(np.arange(len(results)), weights)])
+
+    aggregates = aggregate(reused_results) if not reused_results.empty else None
+    rows_done = int(reused.sum())
+
+    def report_progress():
+        if progress_callback is None:
+            return
+        progress_callback(rows_done, len(df), metric.finalize(aggregates) if aggregates is not None else None)
+
+    report_progress()
+
+    new_chunks = []
+    chunk_size = chunk_size or max(len(pending_df), 1)
+    for start in range(0, len(pending_df), chunk_size):
+        if cancel_event is not None and cancel_event.is_set():
+            print(f"{metric_name}: cancelled after {start} of {len(pending_df)} rows")
+            break
+        chunk_df = pending_df.iloc[start:start + chunk_size].reset_index(drop=True)
+        with span(f"{metric_name}: compute rows", rows=len(chunk_df)):
+            new_results = metric.compute_rows(chunk_df, db_manager).reset_index(drop=True)
+        new_results.index = pd.Index(pending_hashes[start:start + chunk_size], name=ROW_HASH_COLUMN)
+        new_chunks.append(new_results)
+
+        with span(f"{metric_name}: merge aggregates"):
+            aggregates = merge_aggregates(aggregates, aggregate(new_results))
+        rows_done += int(hash_counts.reindex(new_results.index).sum())
+        report_progress()
+
+    # Concatenated once, rather than after every chunk
+    frames = [frame for frame in [reused_results] + new_chunks if not frame.empty]
+    results = pd.concat(frames) if len(frames) > 1 else (frames[0] if frames else reused_results)
+
+    # Rows finished before a cancellation are stored too, so they are not recomputed next time
+    if dataset_id is not None:
+        with span(f"{metric_name}: store cached results", CACHE):
+            store_cached_results(dataset_id, metric_name, results, config_key)
+
+    per_row = _available_rows(results, row_hashes)
+    if per_row.empty or aggregates is None:
+        return per_row, {}
+    with span(f"{metric_name}: summarize"):
+        return per_row, metric.finalize(aggregates)
@@ -0,0 +1,19 @@
+import streamlit as st
+from metrics.entity_recognition import WxAI_Agent
+from metrics.sql_semantic_equivalence import WxAI_LLM
+
+
+@st.cache_resource(show_spinner=False)
+def get_entity_agent():
+    """
+    Returns the Watsonx agent used for entity recognition, created once per process.
+    """
+    return WxAI_Agent()
+
+
+@st.cache_resource(show_spinner=False)
+def get_equivalence_llm():
+    """
+    Returns the Watsonx LLM used for SQL semantic equivalence, created once per process.
+    """
+    return WxAI_LLM()
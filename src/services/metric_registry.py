@@ -0,0 +1,287 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+from database.backends import VM_STEP_INTERVAL
+from metrics.query_utilization import (
+    calculate_and_store_metrics, PERFORMANCE_METRIC_COLUMNS, EXECUTION_SKIPPED_COLUMN,
+    TIMING_TRIALS, TIMING_WARMUP_RUNS, TIMING_CACHE_MODE, COST_THRESHOLD,
+)
+from metrics.halstead_scores import compute_and_store_halstead_metrics
+from metrics.check_sql_injection import (
+    detect_sql_injection_and_store_metrics, count_sql_injection_patterns, summarize_pattern_counts,
+)
+from metrics.data_retrieval_accuracy import (
+    compute_and_return_retrieval_accuracy, RETRIEVAL_SCORE_COLUMNS, RETRIEVAL_SUMMARY_NAMES,
+    RETRIEVAL_COMPARISON, FLOAT_DECIMALS,
+)
+from metrics.entity_recognition import evaluate_entities_from_sql, ENTITY_SCORE_COLUMNS
+from metrics.index_advisor import (
+    advise_indexes, aggregate_index_advice, finalize_index_advice,
+    load_schema, RETIME_WITH_SUGGESTED_INDEXES, RETIME_TRIALS, MAX_INDEX_COLUMNS,
+)
+from metrics.aggregators import aggregate_columns, summarize_aggregates
+from services.llm_service import get_entity_agent, get_equivalence_llm
+from services.golden_work import golden_work
+
+
+# Resource classes; the scheduler runs each class on its own executor
+CPU, DB, LLM = "cpu", "db", "llm"
+
+
+# Bars of the execution time histogram in the performance summary
+EXECUTION_TIME_HISTOGRAM_BINS = 20
+
+
+class MetricSpec:
+    def __init__(self, name, required_columns, resource, compute_rows, aggregate, finalize, depends_on=(),
+                 config=None):
+        """
+        Describes a metric so it can be selected and scheduled from the uploaded columns.
+
+        Parameters:
+            name (str): Metric type, also used by display_metrics_by_type.
+            required_columns (tuple): Columns the metric reads; their values are hashed per row.
+            resource (str): Resource class the metric is bound by (cpu, db or llm).
+            compute_rows (function): compute_rows(df, db_manager) -> per-row results aligned with df.
+            aggregate (function): aggregate(per_row) -> partial aggregates of some rows, which
+                merge_aggregates combines across chunks without keeping the rows.
+            finalize (function): finalize(aggregates) -> dictionary of aggregate metrics.
+            depends_on (tuple): Names of metrics that must finish first.
+            config (function): config(db_manager) -> dictionary of the settings and the database
+                the per-row results depend on, or None if they only depend on the row.
+        """
+        self.name = name
+        self.required_columns = tuple(required_columns)
+        self.resource = resource
+        self.compute_rows = compute_rows
+        self.aggregate = aggregate
+        self.finalize = finalize
+        self.depends_on = tuple(depends_on)
+        self.config = config
+
+    def config_key(self, db_manager=None):
+        """
+        Returns:
+            str: Hash of the metric's configuration, so stored results are only reused
+                under the same configuration, or None if the metric has none.
+        """
+        if self.config is None:
+            return None
+        config = json.dumps(self.config(db_manager), sort_keys=True, default=str)
+        return hashlib.sha1(config.encode("utf-8")).hexdigest()[:16]
+
+    def summarize(self, per_row):
+        """
+        Returns:
+            dict: The aggregate metrics of per-row results computed at once.
+        """
+        return self.finalize(self.aggregate(per_row))
+
+
+# Registered metrics in display order
+METRIC_REGISTRY = {}
+
+
+def register_metric(spec):
+    """
+    Adds a metric to the registry.
+
+    Parameters:
+        spec (MetricSpec): The metric to register.
+    """
+    if spec.resource not in (CPU, DB, LLM):
+        raise ValueError(f"Unknown resource class '{spec.resource}' for metric '{spec.name}'.")
+    METRIC_REGISTRY[spec.name] = spec
+
+
+def get_metric(name):
+    return METRIC_REGISTRY[name]
+
+
+def select_metrics(columns):
+    """
+    Selects every registered metric whose required columns are present.
+
+    Parameters:
+        columns (iterable): Columns of the uploaded DataFrame.
+
+    Returns:
+        tuple: Metric names in display order.
+    """
+    columns = set(columns)
+    return tuple(name for name, spec in METRIC_REGISTRY.items() if set(spec.required_columns) <= columns)
+
+
+def _new_columns(df, updated_df):
+    """Returns only the columns a metric function added to df."""
+    added = [column for column in updated_df.columns if column not in df.columns]
+    return updated_df[added]
+
+
+def _sql_injection_rows(df, db_manager):
+    updated_df, _ = detect_sql_injection_and_store_metrics(df)
+    return _new_columns(df, updated_df)
+
+
+def _sql_injection_aggregate(rows):
+    return {"Patterns": count_sql_injection_patterns(rows["Patterns"])}
+
+
+def _sql_injection_summary(aggregates):
+    return summarize_pattern_counts(aggregates["Patterns"])
+
+
+def _halstead_rows(df, db_manager):
+    updated_df, _ = compute_and_store_halstead_metrics(df)
+    return _new_columns(df, updated_df)
+
+
+def _halstead_aggregate(rows):
+    return aggregate_columns(rows, list(rows.columns))
+
+
+def _database_config(db_manager):
+    return db_manager.fingerprint if db_manager is not None else None
+
+
+def _performance_config(db_manager):
+    return {
+        "trials": TIMING_TRIALS,
+        "warmup_runs": TIMING_WARMUP_RUNS,
+        "cache_mode": TIMING_CACHE_MODE,
+        "cost_threshold": COST_THRESHOLD,
+        "vm_step_interval": VM_STEP_INTERVAL,
+        "database": _database_config(db_manager),
+    }
+
+
+def _performance_rows(df, db_manager):
+    updated_df, _ = calculate_and_store_metrics(df.copy(), db_manager)
+    return _new_columns(df, updated_df)
+
+
+def _performance_aggregate(rows):
+    columns = PERFORMANCE_METRIC_COLUMNS + ["Estimated Cost"]
+    if "Std Time (s)" in rows.columns:
+        columns.append("Std Time (s)")
+    # Distribution of the per-query times, from the repeated trials if they were run
+    time_column = "Median Time (s)" if "Median Time (s)" in rows.columns else "Execution Time (s)"
+    return {
+        "columns": aggregate_columns(rows, columns),
+        "times": aggregate_columns(rows, [time_column]),
+        "skipped": int(rows[EXECUTION_SKIPPED_COLUMN].fillna(False).astype(bool).sum()),
+    }
+
+
+def _performance_summary(aggregates):
+    summary = summarize_aggregates(
+        aggregates["columns"],
+        names={"Estimated Cost": "Average Estimated Cost", "Std Time (s)": "Average Trial Std (s)"},
+    )
+    summary["Queries Skipped (Estimated Cost)"] = aggregates["skipped"]
+
+    times = next(iter(aggregates["times"].values()))
+    summary["Median Execution Time (s)"] = times.percentile(50)
+    summary["P95 Execution Time (s)"] = times.percentile(95)
+    summary["Std Execution Time (s)"] = times.std
+    # Built from the sketch bins, so the summary does not hold one value per query
+    counts, edges = times.histogram(EXECUTION_TIME_HISTOGRAM_BINS)
+    summary["Execution Time Histogram (s)"] = {"Queries": counts.tolist(), "Edges": edges.tolist()}
+    return summary
+
+
+def _index_advisor_config(db_manager):
+    return {
+        "retime": RETIME_WITH_SUGGESTED_INDEXES,
+        "retime_trials": RETIME_TRIALS,
+        "max_index_columns": MAX_INDEX_COLUMNS,
+        "database": _database_config(db_manager),
+    }
+
+
+def _index_advisor_rows(df, db_manager):
+    # Read once per database when several models are compared
+    plan_manager = db_manager.plan_manager
+    schema = golden_work("schema", os.path.abspath(plan_manager.db_name), lambda: load_schema(plan_manager))
+    return advise_indexes(df, db_manager, schema=schema)
+
+
+def _entity_rows(df, db_manager):
+    updated_df, _ = evaluate_entities_from_sql(df.copy(), agent=get_entity_agent())
+    return _new_columns(df, updated_df)
+
+
+def _entity_aggregate(rows):
+    return aggregate_columns(rows, ENTITY_SCORE_COLUMNS)
+
+
+def _entity_summary(aggregates):
+    return summarize_aggregates(aggregates, empty_value=0)
+
+
+def _retrieval_config(db_manager):
+    return {
+        "comparison": RETRIEVAL_COMPARISON,
+        "float_decimals": FLOAT_DECIMALS,
+        "database": _database_config(db_manager),
+    }
+
+
+def _retrieval_rows(df, db_manager):
+    data, _ = compute_and_return_retrieval_accuracy(
+        db_manager, df['generated_sql'].tolist(), df['golden_sql'].tolist()
+    )
+    return data
+
+
+def _retrieval_aggregate(rows):
+    return aggregate_columns(rows, RETRIEVAL_SCORE_COLUMNS)
+
+
+def _retrieval_summary(aggregates):
+    return summarize_aggregates(aggregates, names=RETRIEVAL_SUMMARY_NAMES, empty_value=0)
+
+
+def _equivalence_rows(df, db_manager):
+    scores = get_equivalence_llm().compute_equivalence_scores(df)
+    return pd.DataFrame({"SQL Equivalence Score": scores})
+
+
+def _equivalence_aggregate(rows):
+    return aggregate_columns(rows, ["SQL Equivalence Score"])
+
+
+def _equivalence_summary(aggregates):
+    return summarize_aggregates(
+        aggregates, names={"SQL Equivalence Score": "Average SQL Equivalence Score"}, empty_value=0,
+    )
+
+
+register_metric(MetricSpec(
+    "entity_evaluation", ("generated_sql", "golden_sql"), LLM, _entity_rows, _entity_aggregate, _entity_summary
+))
+register_metric(MetricSpec(
+    "halstead", ("generated_sql",), CPU, _halstead_rows, _halstead_aggregate, summarize_aggregates
+))
+register_metric(MetricSpec(
+    "sql_equivalence", ("generated_sql", "golden_sql", "database_schema"), LLM,
+    _equivalence_rows, _equivalence_aggregate, _equivalence_summary
+))
+register_metric(MetricSpec(
+    "sql_injection", ("generated_sql",), CPU, _sql_injection_rows, _sql_injection_aggregate, _sql_injection_summary
+))
+register_metric(MetricSpec(
+    "retrieval_accuracy", ("generated_sql", "golden_sql"), DB, _retrieval_rows, _retrieval_aggregate, _retrieval_summary,
+    config=_retrieval_config,
+))
+register_metric(MetricSpec(
+    "performance", ("generated_sql",), DB, _performance_rows, _performance_aggregate, _performance_summary,
+    config=_performance_config,
+))
+register_metric(MetricSpec(
+    "index_advisor", ("generated_sql",), DB, _index_advisor_rows, aggregate_index_advice, finalize_index_advice,
+    config=_index_advisor_config,
+))
@@ -0,0 +1,141 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from services.metric_registry import get_metric, CPU, DB, LLM
+from services.incremental_evaluation import evaluate_metric_incrementally
+from tracing import span, submit_traced, METRIC
+
+
+# Number of metrics of each resource class that may run at the same time.
+# DB metrics check out their own pooled connection, so they run in parallel
+# in every execution mode.
+RESOURCE_WORKERS = {
+    CPU: max((os.cpu_count() or 2) // 2, 1),
+    DB: 2,
+    LLM: 4,
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(resource):
+    """
+    Returns the process-wide executor for a resource class, so concurrent
+    evaluations share the same limits.
+
+    Parameters:
+        resource (str): Resource class (cpu, db or llm).
+
+    Returns:
+        ThreadPoolExecutor: Executor for the resource class.
+    """
+    with _executors_lock:
+        if resource not in _executors:
+            _executors[resource] = ThreadPoolExecutor(
+                max_workers=RESOURCE_WORKERS[resource], thread_name_prefix=f"metric-{resource}"
+            )
+        return _executors[resource]
+
+
+def build_metric_graph(metric_names):
+    """
+    Builds the dependency graph of the selected metrics.
+
+    Parameters:
+        metric_names (tuple): Names of the metrics to run.
+
+    Returns:
+        dict: Metric name -> set of metric names it waits for.
+    """
+    graph = {}
+    for name in metric_names:
+        missing = [dep for dep in get_metric(name).depends_on if dep not in metric_names]
+        if missing:
+            raise ValueError(f"Metric '{name}' depends on {missing}, which are not selected.")
+        graph[name] = set(get_metric(name).depends_on)
+
+    # Reject cycles up front so the scheduler can never stall
+    remaining = {name: set(deps) for name, deps in graph.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Metric dependencies form a cycle: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return graph
+
+
+def run_metrics(uploaded_df, metric_names, dataset_id=None, db_manager=None,
+                chunk_size=None, progress_callback=None, cancel_event=None):
+    """
+    Runs the selected metrics, starting each one as soon as its dependencies
+    have finished, on the executor of its resource class.
+
+    Parameters:
+        uploaded_df (pd.DataFrame): The DataFrame containing SQL queries.
+        metric_names (tuple): Names of the metrics to run.
+        dataset_id (str): Identifier of the dataset used to reuse results of its previous run.
+        db_manager (DatabaseManager): The database manager used by execution-based metrics.
+        chunk_size (int): Number of rows computed between progress updates.
+        progress_callback (function): Called as progress_callback(metric_name, rows_done, total_rows, partial_summary).
+        cancel_event (threading.Event): Stops scheduling and computing once set.
+
+    Returns:
+        tuple: (metric name -> (per-row results, aggregate metrics), metric name -> error message)
+    """
+    graph = build_metric_graph(metric_names)
+    results, errors = {}, {}
+    running = {}
+
+    def run_one(name):
+        print(f"{name} is running...")
+        callback = None
+        if progress_callback is not None:
+            callback = lambda done, total, partial: progress_callback(name, done, total, partial)
+        with span(name, METRIC):
+            return evaluate_metric_incrementally(
+                name, uploaded_df, dataset_id, db_manager,
+                chunk_size=chunk_size, progress_callback=callback, cancel_event=cancel_event,
+            )
+
+    def submit_ready():
+        for name in list(graph):
+            if graph[name] or name in running:
+                continue
+            del graph[name]
+            running[name] = submit_traced(get_executor(get_metric(name).resource), run_one, name)
+
+    def finish(name):
+        # Dependents of a failed metric are skipped rather than run on missing input
+        for other, deps in list(graph.items()):
+            if name in deps:
+                if name in errors:
+                    errors[other] = f"Skipped because '{name}' failed."
+                    del graph[other]
+                    finish(other)
+                else:
+                    deps.discard(name)
+
+    submit_ready()
+    while running:
+        done, _ = wait(list(running.values()), return_when=FIRST_COMPLETED)
+        for name, future in list(running.items()):
+            if future not in done:
+                continue
+            del running[name]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Error computing {name}: {e}")
+                errors[name] = str(e)
+            finish(name)
+
+        if cancel_event is None or not cancel_event.is_set():
+            submit_ready()
+
+    return results, errors
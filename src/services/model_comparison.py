@@ -0,0 +1,123 @@
+import numbers
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from services.metric_registry import select_metrics
+from services.metric_scheduler import run_metrics
+from services.golden_work import share_golden_work
+from tracing import span, submit_traced, STAGE
+
+
+# Columns holding the queries of each model: generated_sql_<model>
+MODEL_COLUMN_PREFIX = "generated_sql_"
+
+
+def detect_models(columns):
+    """
+    Finds the model columns of an uploaded file.
+
+    Parameters:
+        columns (iterable): Columns of the uploaded DataFrame.
+
+    Returns:
+        dict: Model name -> its generated_sql_<model> column, in file order.
+    """
+    return {
+        column[len(MODEL_COLUMN_PREFIX):]: column
+        for column in columns
+        if column.startswith(MODEL_COLUMN_PREFIX) and len(column) > len(MODEL_COLUMN_PREFIX)
+    }
+
+
+def model_frame(uploaded_df, model_column):
+    """
+    Builds the dataset of one model: its queries as generated_sql, next to the
+    shared golden_sql and database_schema columns.
+
+    Returns:
+        pd.DataFrame: The model's dataset, indexed like uploaded_df.
+    """
+    shared = [column for column in ("golden_sql", "database_schema") if column in uploaded_df.columns]
+    df = uploaded_df[shared].copy()
+    df.insert(0, "generated_sql", uploaded_df[model_column])
+    return df
+
+
+def compare_models(uploaded_df, models, dataset_id=None, db_manager=None, metric_names=None,
+                   chunk_size=None, progress_callback=None, cancel_event=None):
+    """
+    Evaluates every model of a comparison in parallel. Golden-side work (golden
+    query results, golden entities, the parsed schema) is done once and shared
+    by all models; each model's metrics run on the shared resource executors,
+    so the per-resource limits hold across models.
+
+    Parameters:
+        uploaded_df (pd.DataFrame): The DataFrame with golden_sql and the generated_sql_<model> columns.
+        models (dict): Model name -> its column, as returned by detect_models.
+        dataset_id (str): Identifier of the dataset used to reuse results of its previous run.
+        db_manager (DatabaseManager): The database manager used by execution-based metrics.
+        metric_names (tuple): Metric types to compute. Defaults to every metric the columns allow.
+        chunk_size (int): Number of rows computed between progress updates.
+        progress_callback (function): Called as progress_callback(model, metric_name, rows_done, total_rows,
+            partial_summary).
+        cancel_event (threading.Event): Stops every model's evaluation once set.
+
+    Returns:
+        tuple: (model -> (metric name -> (per-row results, aggregate metrics)),
+                model -> (metric name -> error message), golden work statistics)
+    """
+    frames = {model: model_frame(uploaded_df, column) for model, column in models.items()}
+    if metric_names is None:
+        metric_names = select_metrics(next(iter(frames.values())).columns) if frames else ()
+
+    def evaluate(model):
+        # Each model keeps its own stored per-row results
+        model_dataset_id = f"{dataset_id}#{model}" if dataset_id is not None else None
+        callback = None
+        if progress_callback is not None:
+            callback = lambda *progress: progress_callback(model, *progress)
+        with span(f"model {model}", STAGE), work.consumer(model):
+            return run_metrics(frames[model], tuple(metric_names), model_dataset_id, db_manager,
+                               chunk_size=chunk_size, progress_callback=callback, cancel_event=cancel_event)
+
+    results, errors = {}, {}
+    with share_golden_work(consumers=models) as work, ThreadPoolExecutor(
+        max_workers=max(len(models), 1), thread_name_prefix="comparison"
+    ) as executor:
+        futures = {model: submit_traced(executor, evaluate, model) for model in models}
+        for model, future in futures.items():
+            try:
+                results[model], errors[model] = future.result()
+            except Exception as e:
+                print(f"Error evaluating model {model}: {e}")
+                results[model], errors[model] = {}, {name: str(e) for name in metric_names}
+
+    return results, errors, work.stats()
+
+
+def comparison_table(summaries, metric_names):
+    """
+    Lays out the numeric aggregate metrics of every model side by side.
+
+    Parameters:
+        summaries (dict): Model -> (metric name -> aggregate metrics).
+        metric_names (tuple): Metric types, in display order.
+
+    Returns:
+        pd.DataFrame: Metric and Measure columns, then one column per model.
+    """
+    models = list(summaries)
+    rows = {}
+    for metric_name in metric_names:
+        for model in models:
+            if metric_name not in summaries[model]:
+                continue
+            summary = summaries[model][metric_name]
+            for measure, value in summary.items():
+                # Percentiles, distributions and lists of suggestions stay in the per-model sections
+                if isinstance(value, bool) or not isinstance(value, numbers.Number):
+                    continue
+                row = rows.setdefault((metric_name, measure), {"Metric": metric_name, "Measure": measure})
+                row[model] = value
+    return pd.DataFrame(list(rows.values()), columns=["Metric", "Measure"] + models)
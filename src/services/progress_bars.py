@@ -1,19 +1,30 @@
 import streamlit as st
 
-def display_metric_with_custom_progress_bar(metric_name, value, lower_threshold, upper_threshold):
+
+def _scaled(value, lower_threshold, upper_threshold):
+    """Position of value between the thresholds, in percent."""
+    if upper_threshold == lower_threshold:
+        return 0
+    scaled_value = ((value - lower_threshold) / (upper_threshold - lower_threshold)) * 100
+    return min(max(scaled_value, 0), 100)
+
+
+def custom_progress_bar_html(metric_name, value, lower_threshold, upper_threshold):
     """
-    Display a progress bar for SQL injection metrics.
+    Builds the progress bar of an SQL injection pattern.
 
     Parameters:
         metric_name (str): Name of the SQL injection pattern.
         value (float): Count of occurrences.
         lower_threshold (float): Minimum expected occurrences.
         upper_threshold (float): Maximum expected occurrences.
+
+    Returns:
+        str: The HTML of the bar.
     """
-    scaled_value = (value / upper_threshold) * 100
-    scaled_value = min(max(scaled_value, 0), 100)
+    scaled_value = min(max((value / upper_threshold) * 100, 0), 100) if upper_threshold else 0
 
-    progress_bar_html = f"""
+    return f"""
     <div style="margin-bottom: 10px; max-width: 400px;">
         <strong>{metric_name}: {value}</strong>
         <div style="position: relative; height: 10px; background: #e0e0e0; border-radius: 5px; width: 80%;">
@@ -26,12 +37,11 @@ def display_metric_with_custom_progress_bar(metric_name, value, lower_threshold,
         </div>
     </div>
     """
-    st.markdown(progress_bar_html, unsafe_allow_html=True)
 
 
-def display_metric_with_benchmark_progress_bar(metric_name, value, lower_threshold, upper_threshold, benchmark, color, width="80%"):
+def benchmark_progress_bar_html(metric_name, value, lower_threshold, upper_threshold, benchmark, color, width="80%"):
     """
-    Display a progress bar for metrics with a benchmark threshold.
+    Builds the progress bar of a metric with a benchmark threshold.
 
     Parameters:
         metric_name (str): Name of the metric.
@@ -41,11 +51,13 @@ def display_metric_with_benchmark_progress_bar(metric_name, value, lower_thresho
         benchmark (float): Benchmark threshold for coloring logic.
         color (str): Color category (green/red based on benchmark check).
         width (str): Width of the progress bar (default: 80%).
+
+    Returns:
+        str: The HTML of the bar.
     """
-    scaled_value = (value / upper_threshold) * 100
-    scaled_value = min(max(scaled_value, 0), 100)
+    scaled_value = min(max((value / upper_threshold) * 100, 0), 100) if upper_threshold else 0
 
-    progress_bar_html = f"""
+    return f"""
     <div style="margin-bottom: 10px; max-width: 400px;">
         <strong>{metric_name}: {value:.2f}</strong>
         <div style="position: relative; height: 10px; background: #e0e0e0; border-radius: 5px; width: {width};">
@@ -58,11 +70,11 @@ def display_metric_with_benchmark_progress_bar(metric_name, value, lower_thresho
         </div>
     </div>
     """
-    st.markdown(progress_bar_html, unsafe_allow_html=True)
 
-def display_simple_progress_bar(metric_name, value, lower_threshold, upper_threshold, width="80%"):
+
+def simple_progress_bar_html(metric_name, value, lower_threshold, upper_threshold, width="80%"):
     """
-    Display a simple, neutral progress bar for performance metrics.
+    Builds a simple, neutral progress bar for performance metrics.
 
     Parameters:
         metric_name (str): Name of the metric.
@@ -70,13 +82,14 @@ def display_simple_progress_bar(metric_name, value, lower_threshold, upper_thres
         lower_threshold (float): Lower threshold for the metric.
         upper_threshold (float): Upper threshold for the metric.
         width (str): Width of the progress bar (default: 80%).
+
+    Returns:
+        str: The HTML of the bar.
     """
-    # Scale value between 0% and 100%
-    scaled_value = ((value - lower_threshold) / (upper_threshold - lower_threshold)) * 100
-    scaled_value = min(max(scaled_value, 0), 100)
+    scaled_value = _scaled(value, lower_threshold, upper_threshold)
 
     # Use a distinct color (e.g., a light blue) for the performance bar fill
-    progress_bar_html = f"""
+    return f"""
     <div style="margin-bottom: 10px; max-width: 400px;">
         <strong>{metric_name}: {value:.2f}</strong>
         <div style="position: relative; height: 10px; background: #e0e0e0; border-radius: 5px; width: {width};">
@@ -89,4 +102,69 @@ def display_simple_progress_bar(metric_name, value, lower_threshold, upper_thres
         </div>
     </div>
     """
-    st.markdown(progress_bar_html, unsafe_allow_html=True)
+
+
+def display_progress_bar_grid(bars, columns=2):
+    """
+    Displays the progress bars of a section as a single HTML block laid out
+    in a grid, instead of one Streamlit element per bar.
+
+    Parameters:
+        bars (list): HTML of the bars, in display order.
+        columns (int): Number of grid columns.
+    """
+    if not bars:
+        return
+    # One line of HTML: blank or indented lines would end the HTML block in Markdown
+    cells = "".join(line.strip() for bar in bars for line in bar.splitlines())
+    st.markdown(
+        f'<div style="display: grid; grid-template-columns: repeat({columns}, minmax(0, 1fr)); column-gap: 1rem;">'
+        f'{cells}</div>',
+        unsafe_allow_html=True,
+    )
+
+
+def display_metric_with_custom_progress_bar(metric_name, value, lower_threshold, upper_threshold):
+    """
+    Display a progress bar for SQL injection metrics.
+
+    Parameters:
+        metric_name (str): Name of the SQL injection pattern.
+        value (float): Count of occurrences.
+        lower_threshold (float): Minimum expected occurrences.
+        upper_threshold (float): Maximum expected occurrences.
+    """
+    st.markdown(custom_progress_bar_html(metric_name, value, lower_threshold, upper_threshold), unsafe_allow_html=True)
+
+
+def display_metric_with_benchmark_progress_bar(metric_name, value, lower_threshold, upper_threshold, benchmark, color, width="80%"):
+    """
+    Display a progress bar for metrics with a benchmark threshold.
+
+    Parameters:
+        metric_name (str): Name of the metric.
+        value (float): Current value of the metric.
+        lower_threshold (float): Lower threshold for the metric.
+        upper_threshold (float): Upper threshold for the metric.
+        benchmark (float): Benchmark threshold for coloring logic.
+        color (str): Color category (green/red based on benchmark check).
+        width (str): Width of the progress bar (default: 80%).
+    """
+    st.markdown(
+        benchmark_progress_bar_html(metric_name, value, lower_threshold, upper_threshold, benchmark, color, width),
+        unsafe_allow_html=True,
+    )
+
+
+def display_simple_progress_bar(metric_name, value, lower_threshold, upper_threshold, width="80%"):
+    """
+    Display a simple, neutral progress bar for performance metrics.
+
+    Parameters:
+        metric_name (str): Name of the metric.
+        value (float): Current value of the metric.
+        lower_threshold (float): Lower threshold for the metric.
+        upper_threshold (float): Upper threshold for the metric.
+        width (str): Width of the progress bar (default: 80%).
+    """
+    st.markdown(simple_progress_bar_html(metric_name, value, lower_threshold, upper_threshold, width), unsafe_allow_html=True)
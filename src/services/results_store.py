@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+
+# SQLite file, next to the per-row cache, holding the combined per-row results of
+# recent runs, so the UI pages, filters and sorts them with SQL instead of sending whole DataFrames
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", os.path.join(".eval_cache", "results.db"))
+
+# Runs whose results are kept; older ones are dropped
+MAX_STORED_RUNS = 16
+
+# Input columns stored next to the metric results (the schema is too large to be useful per row)
+INPUT_COLUMNS = ["generated_sql", "golden_sql"]
+
+ROW_COLUMN = "Row"
+
+DEFAULT_PAGE_SIZE = 50
+
+# Filter operator -> SQL condition on a column
+FILTER_OPERATORS = {
+    "=": "{column} = ?",
+    "≠": "{column} != ?",
+    "<": "{column} < ?",
+    "≤": "{column} <= ?",
+    ">": "{column} > ?",
+    "≥": "{column} >= ?",
+    "contains": "{column} LIKE ? ESCAPE '\\'",
+    "is empty": "{column} IS NULL",
+    "is not empty": "{column} IS NOT NULL",
+}
+VALUELESS_OPERATORS = ("is empty", "is not empty")
+
+_RUNS_TABLE = "result_runs"
+
+
+def _connect(path=None):
+    path = path or RESULTS_DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {_RUNS_TABLE} "
+        "(run_id TEXT PRIMARY KEY, table_name TEXT NOT NULL, rows INTEGER, created_at REAL)"
+    )
+    return conn
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _table_name(run_id):
+    return f"results_{''.join(c for c in str(run_id) if c.isalnum())}"
+
+
+def _storable(series):
+    """
+    Converts a result column to values SQLite stores: lists and dictionaries
+    as JSON text, numbers and booleans as they are, anything else as text.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(int)
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    numeric = pd.to_numeric(series, errors="coerce")
+    if series.notna().any() and numeric.notna().sum() == series.notna().sum():
+        return numeric
+
+    def convert(value):
+        if isinstance(value, (list, tuple, set, dict, np.ndarray)):
+            return json.dumps(list(value) if isinstance(value, (set, np.ndarray)) else value, default=str)
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return None
+        return str(value)
+
+    return series.map(convert)
+
+
+def combine_results(uploaded_df, per_row_results):
+    """
+    Joins the per-row results of every metric with the input queries.
+
+    Parameters:
+        uploaded_df (pd.DataFrame): The DataFrame containing SQL queries.
+        per_row_results (dict): Metric name -> per-row results indexed like uploaded_df
+            (rows that were not computed are missing).
+
+    Returns:
+        pd.DataFrame: One row per input row; metric columns are named "<metric>: <column>".
+    """
+    combined = pd.DataFrame({ROW_COLUMN: np.arange(len(uploaded_df))}, index=uploaded_df.index)
+    for column in INPUT_COLUMNS:
+        if column in uploaded_df.columns:
+            combined[column] = uploaded_df[column]
+
+    for metric_name, per_row in per_row_results.items():
+        if per_row is None or per_row.empty:
+            continue
+        renamed = per_row.rename(columns=lambda column: f"{metric_name}: {column}")
+        combined = combined.join(renamed, how="left")
+
+    return pd.DataFrame({column: _storable(combined[column]) for column in combined.columns}).reset_index(drop=True)
+
+
+def store_results(run_id, uploaded_df, per_row_results, path=None):
+    """
+    Stores the combined per-row results of a run, replacing earlier results of
+    the same run, and drops the oldest runs beyond MAX_STORED_RUNS.
+
+    Parameters:
+        run_id (str): Identifier of the run (e.g. the job id).
+        uploaded_df (pd.DataFrame): The DataFrame containing SQL queries.
+        per_row_results (dict): Metric name -> per-row results indexed like uploaded_df.
+        path (str): SQLite file, RESULTS_DB_PATH if None.
+
+    Returns:
+        int: Number of rows stored.
+    """
+    combined = combine_results(uploaded_df, per_row_results)
+    table = _table_name(run_id)
+
+    conn = _connect(path)
+    try:
+        with conn:
+            combined.to_sql(table, conn, if_exists="replace", index=False, chunksize=10_000)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {_RUNS_TABLE} (run_id, table_name, rows, created_at) VALUES (?, ?, ?, ?)",
+                (str(run_id), table, len(combined), time.time()),
+            )
+            stale = conn.execute(
+                f"SELECT run_id, table_name FROM {_RUNS_TABLE} ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (MAX_STORED_RUNS,),
+            ).fetchall()
+            for stale_run, stale_table in stale:
+                conn.execute(f"DROP TABLE IF EXISTS {_quote(stale_table)}")
+                conn.execute(f"DELETE FROM {_RUNS_TABLE} WHERE run_id = ?", (stale_run,))
+    finally:
+        conn.close()
+    return len(combined)
+
+
+def _run_table(conn, run_id):
+    row = conn.execute(f"SELECT table_name FROM {_RUNS_TABLE} WHERE run_id = ?", (str(run_id),)).fetchone()
+    return row[0] if row else None
+
+
+def result_columns(run_id, path=None):
+    """
+    Returns:
+        dict: Column -> True if it holds numbers, for the stored results of a run
+        (empty if nothing is stored).
+    """
+    conn = _connect(path)
+    try:
+        table = _run_table(conn, run_id)
+        if table is None:
+            return {}
+        return {
+            name: declared_type.upper() in ("INTEGER", "REAL", "NUMERIC")
+            for _, name, declared_type, *_ in conn.execute(f"PRAGMA table_info({_quote(table)})")
+        }
+    finally:
+        conn.close()
+
+
+def query_results(run_id, filters=(), sort_by=None, descending=False, page=0, page_size=DEFAULT_PAGE_SIZE, path=None):
+    """
+    Reads one page of the stored results of a run, filtered and sorted in SQLite.
+
+    Parameters:
+        run_id (str): Identifier of the run.
+        filters (iterable): (column, operator, value) conditions, combined with AND;
+            operator is one of FILTER_OPERATORS.
+        sort_by (str): Column to sort by; the row order if None. Empty values come last.
+        descending (bool): Sort from the largest value.
+        page (int): Page number, from 0.
+        page_size (int): Rows per page.
+        path (str): SQLite file, RESULTS_DB_PATH if None.
+
+    Returns:
+        tuple: (pd.DataFrame of the page, number of rows matching the filters)
+
+    Raises:
+        KeyError: If the run has no stored results.
+        ValueError: If a filter or the sort column is invalid.
+    """
+    columns = result_columns(run_id, path)
+    if not columns:
+        raise KeyError(f"No stored results for run '{run_id}'.")
+
+    conditions, parameters = [], []
+    for column, operator, value in filters:
+        if column not in columns:
+            raise ValueError(f"Unknown column '{column}'.")
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}'. Expected one of {list(FILTER_OPERATORS)}.")
+        conditions.append(FILTER_OPERATORS[operator].format(column=_quote(column)))
+        if operator in VALUELESS_OPERATORS:
+            continue
+        if operator == "contains":
+            escaped = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            parameters.append(f"%{escaped}%")
+        elif columns[column]:
+            try:
+                parameters.append(float(value))
+            except (TypeError, ValueError):
+                raise ValueError(f"'{column}' holds numbers; '{value}' is not one.")
+        else:
+            parameters.append(str(value))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if sort_by is not None and sort_by not in columns:
+        raise ValueError(f"Unknown column '{sort_by}'.")
+    order = f" ORDER BY {_quote(ROW_COLUMN)}"
+    if sort_by is not None:
+        direction = "DESC" if descending else "ASC"
+        order = f" ORDER BY {_quote(sort_by)} IS NULL, {_quote(sort_by)} {direction}, {_quote(ROW_COLUMN)}"
+
+    conn = _connect(path)
+    try:
+        table = _quote(_run_table(conn, run_id))
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", parameters).fetchone()[0]
+        page_df = pd.read_sql_query(
+            f"SELECT * FROM {table}{where}{order} LIMIT ? OFFSET ?", conn,
+            params=parameters + [int(page_size), int(page) * int(page_size)],
+        )
+    finally:
+        conn.close()
+    return page_df, total
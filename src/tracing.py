@@ -0,0 +1,243 @@
+# Timing spans for evaluation runs.
+#
+# Code marks its stages with span(); while a trace is active in the calling
+# context (start_trace), every span is recorded with its thread, duration and
+# self time (duration minus the spans nested in it). Finished traces are
+# written in the Chrome trace event format, which chrome://tracing and
+# https://ui.perfetto.dev open, and summarized as a "where did the time go" table.
+#
+# Without an active trace, span() does nothing.
+import os
+import json
+import time
+import datetime
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+# Folder the trace files are written to
+TRACE_DIR = os.getenv("TRACE_DIR", ".traces")
+
+# Set EVALUATION_TRACING=0 to turn tracing off
+TRACING_ENABLED = os.getenv("EVALUATION_TRACING", "1") != "0"
+
+# Events kept for the trace file; later spans still count in the summary
+MAX_TRACE_EVENTS = 200_000
+
+# Span categories
+STAGE, METRIC, DB, LLM, CACHE = "stage", "metric", "db", "llm", "cache"
+
+# Characters of a query kept in the arguments of a span
+MAX_ARGUMENT_LENGTH = 200
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    def __init__(self, name: str):
+        """
+        Collects the spans of one run.
+
+        Parameters:
+            name (str): Name of the run, used for the trace file.
+        """
+        self.name = name
+        self.started_at = datetime.datetime.now()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.pid = os.getpid()
+
+        self.events = []
+        self.dropped_events = 0
+        # (category, name) -> [calls, total ns, self ns, max ns]
+        self.totals = {}
+        self.thread_names = {}
+        self.lock = threading.Lock()
+
+        # Per thread: stack of the open spans' child durations, to compute self time
+        self.open_spans = threading.local()
+
+    def _stack(self):
+        stack = getattr(self.open_spans, "stack", None)
+        if stack is None:
+            stack = self.open_spans.stack = []
+        return stack
+
+    def record(self, name, category, start_ns, end_ns, child_ns, args):
+        duration = end_ns - start_ns
+        thread = threading.current_thread()
+        with self.lock:
+            self.thread_names.setdefault(thread.ident, thread.name)
+            totals = self.totals.setdefault((category, name), [0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += duration - child_ns
+            totals[3] = max(totals[3], duration)
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append({
+                    "name": name, "cat": category, "ph": "X", "pid": self.pid, "tid": thread.ident,
+                    "ts": (start_ns - self.start_ns) / 1000, "dur": duration / 1000, "args": args,
+                })
+            else:
+                self.dropped_events += 1
+
+    def finish(self):
+        self.end_ns = self.end_ns or time.perf_counter_ns()
+
+    @property
+    def wall_seconds(self):
+        return ((self.end_ns or time.perf_counter_ns()) - self.start_ns) / 1e9
+
+    def export(self, path: str = None):
+        """
+        Writes the trace in the Chrome trace event format.
+
+        Parameters:
+            path (str): Trace file, TRACE_DIR/<time>_<name>.json if None.
+
+        Returns:
+            str: The path written.
+        """
+        if path is None:
+            safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.name)[:80]
+            path = os.path.join(TRACE_DIR, f"{self.started_at:%Y%m%d-%H%M%S}_{safe_name}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with self.lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self.thread_names.items()
+            ]
+            trace = {
+                "traceEvents": metadata + list(self.events),
+                "displayTimeUnit": "ms",
+                "otherData": {"run": self.name, "started_at": self.started_at.isoformat(timespec="seconds"),
+                              "wall_seconds": self.wall_seconds, "dropped_events": self.dropped_events},
+            }
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+    def summary(self):
+        """
+        Builds the "where did the time go" table: per stage, the calls, the
+        total and self time and the share of the run's wall time. Self time
+        excludes nested spans, so it adds up to the time spent across threads.
+
+        Returns:
+            pd.DataFrame: One row per (category, stage), largest self time first.
+        """
+        wall = max(self.wall_seconds, 1e-9)
+        with self.lock:
+            rows = [
+                {
+                    "Category": category,
+                    "Stage": name,
+                    "Calls": calls,
+                    "Total (s)": total / 1e9,
+                    "Self (s)": self_ns / 1e9,
+                    "Mean (ms)": total / calls / 1e6,
+                    "Max (ms)": longest / 1e6,
+                    "Self % of Wall Time": 100 * self_ns / 1e9 / wall,
+                }
+                for (category, name), (calls, total, self_ns, longest) in self.totals.items()
+            ]
+        columns = ["Category", "Stage", "Calls", "Total (s)", "Self (s)", "Mean (ms)", "Max (ms)", "Self % of Wall Time"]
+        return pd.DataFrame(rows, columns=columns).sort_values("Self (s)", ascending=False).reset_index(drop=True)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, category: str = STAGE, **args):
+    """
+    Times the enclosed block as a span of the active trace.
+
+    Parameters:
+        name (str): Stage name; spans with the same name are summed in the summary.
+        category (str): One of STAGE, METRIC, DB, LLM, CACHE.
+        args: Extra values stored with the event (strings are shortened).
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    stack = trace._stack()
+    stack.append(0)
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end_ns = time.perf_counter_ns()
+        child_ns = stack.pop()
+        if stack:
+            stack[-1] += end_ns - start_ns
+        args = {key: value[:MAX_ARGUMENT_LENGTH] if isinstance(value, str) else value for key, value in args.items()}
+        trace.record(name, category, start_ns, end_ns, child_ns, args)
+
+
+@contextmanager
+def start_trace(name: str):
+    """
+    Makes a new trace active in the calling context for the enclosed block.
+
+    Parameters:
+        name (str): Name of the run.
+
+    Yields:
+        Trace: The trace, or None if tracing is turned off.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+
+
+def submit_traced(executor, function, *args, **kwargs):
+    """
+    Submits a function to an executor so it runs in the caller's context,
+    keeping its spans in the caller's trace.
+
+    Returns:
+        concurrent.futures.Future: The submitted task.
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
+
+
+def report_trace(trace):
+    """
+    Writes a finished trace to TRACE_DIR and prints its summary.
+
+    Parameters:
+        trace (Trace): The finished trace, or None.
+
+    Returns:
+        tuple: (trace file path, summary DataFrame), or (None, None) without a trace.
+    """
+    if trace is None:
+        return None, None
+    summary = trace.summary()
+    try:
+        path = trace.export()
+    except OSError as e:
+        print(f"Could not write the trace file: {e}")
+        path = None
+
+    with pd.option_context("display.width", 160, "display.max_rows", 50, "display.float_format", "{:.3f}".format):
+        print(f"\nWhere did the time go ({trace.name}, {trace.wall_seconds:.2f}s wall time):")
+        print(summary.head(20).to_string(index=False))
+    if path:
+        print(f"Trace written to {path} (open it in chrome://tracing or https://ui.perfetto.dev)")
+    return path, summary
@@ -0,0 +1,144 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics.aggregators import (
+    QuantileSketch, StreamingAggregate, aggregate_columns, merge_aggregates, summarize_aggregates,
+    SKETCH_RELATIVE_ACCURACY, PERCENTILES_KEY,
+)
+
+
+def _values(size=20_000, seed=7):
+    rng = np.random.default_rng(seed)
+    # Heavy tail, zeros and negative values, as execution times and score differences have
+    return np.concatenate([rng.lognormal(0, 2, size), np.zeros(100), -rng.exponential(3, size // 10)])
+
+
+def _exact_quantile(values, q):
+    # Nearest rank, as the sketch
+    ordered = np.sort(values)
+    return ordered[max(math.ceil(q * len(ordered)), 1) - 1]
+
+
+@pytest.mark.parametrize("q", [0.01, 0.1, 0.5, 0.9, 0.95, 0.99, 0.999])
+def test_quantile_within_relative_accuracy(q):
+    values = _values()
+    sketch = QuantileSketch()
+    sketch.update(values)
+    exact = _exact_quantile(values, q)
+    assert abs(sketch.quantile(q) - exact) <= SKETCH_RELATIVE_ACCURACY * abs(exact) + 1e-12
+
+
+def test_extremes_are_exact():
+    values = _values()
+    sketch = QuantileSketch()
+    sketch.update(values)
+    assert sketch.quantile(0) == values.min()
+    assert sketch.quantile(1) == values.max()
+
+
+def test_sketch_merge_equals_single_sketch():
+    values = _values()
+    whole = QuantileSketch()
+    whole.update(values)
+    merged = QuantileSketch()
+    for chunk in np.array_split(values, 7):
+        part = QuantileSketch()
+        part.update(chunk)
+        merged.merge(part)
+    assert merged.count == whole.count
+    assert merged.positive == whole.positive and merged.negative == whole.negative
+    assert merged.zero_count == whole.zero_count
+    for q in (0.05, 0.5, 0.95, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+def test_sketches_of_different_accuracy_do_not_merge():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_empty_sketch():
+    sketch = QuantileSketch()
+    sketch.update([None, float("nan"), float("inf")])
+    assert sketch.count == 0
+    assert math.isnan(sketch.quantile(0.5))
+    counts, edges = sketch.histogram()
+    assert counts.size == 0 and edges.size == 0
+
+
+def test_histogram_counts_every_value():
+    values = _values()
+    sketch = QuantileSketch()
+    sketch.update(values)
+    counts, edges = sketch.histogram(20)
+    assert counts.sum() == len(values)
+    assert len(edges) == 21
+    assert edges[0] == values.min() and edges[-1] == values.max()
+
+
+def test_streaming_aggregate_matches_pandas():
+    values = _values()
+    aggregate = StreamingAggregate().update(values)
+    series = pd.Series(values)
+    assert aggregate.count == len(values)
+    assert aggregate.mean == pytest.approx(series.mean())
+    assert aggregate.std == pytest.approx(series.std())
+    assert aggregate.min == series.min() and aggregate.max == series.max()
+
+
+def test_streaming_aggregate_merge_equals_single_pass():
+    values = _values()
+    whole = StreamingAggregate().update(values)
+    merged = StreamingAggregate()
+    for chunk in np.array_split(values, 13):
+        merged.merge(StreamingAggregate().update(chunk))
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean)
+    assert merged.variance == pytest.approx(whole.variance)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    assert merged.percentiles() == whole.percentiles()
+
+
+def test_empty_streaming_aggregate():
+    aggregate = StreamingAggregate().update([None, np.nan])
+    assert aggregate.count == 0
+    assert math.isnan(aggregate.to_dict()["mean"])
+    assert aggregate.std == 0.0
+    assert math.isnan(aggregate.percentile(50))
+    # Merging an empty aggregate changes nothing
+    filled = StreamingAggregate().update([1.0, 2.0])
+    filled.merge(aggregate)
+    assert filled.count == 2 and filled.mean == 1.5
+
+
+def test_merged_chunk_summaries_equal_whole_summary():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"score": rng.random(1_000), "time": rng.lognormal(size=1_000)})
+    df.loc[::17, "score"] = None
+    whole = summarize_aggregates(aggregate_columns(df, ["score", "time"]))
+
+    parts = [aggregate_columns(df.iloc[start:start + 120], ["score", "time"]) for start in range(0, len(df), 120)]
+    merged = summarize_aggregates(merge_aggregates(*parts))
+    assert merged["score"] == pytest.approx(whole["score"])
+    assert merged["time"] == pytest.approx(whole["time"])
+    assert merged[PERCENTILES_KEY] == whole[PERCENTILES_KEY]
+
+
+def test_merge_aggregates_adds_counts_and_leaves_parts_unchanged():
+    first = {"Patterns": {"union": 2}, "skipped": 1, "time": StreamingAggregate().update([1.0])}
+    second = {"Patterns": {"union": 1, "tautology": 4}, "skipped": 2, "time": StreamingAggregate().update([3.0])}
+    merged = merge_aggregates(None, first, second)
+    assert merged["Patterns"] == {"union": 3, "tautology": 4}
+    assert merged["skipped"] == 3
+    assert merged["time"].count == 2 and merged["time"].mean == 2.0
+    assert first["Patterns"] == {"union": 2} and first["time"].count == 1
+
+
+def test_summary_of_empty_column():
+    summary = summarize_aggregates(aggregate_columns(pd.DataFrame({"score": [None, None]}), ["score", "missing"]),
+                                   empty_value=0)
+    assert summary["score"] == 0 and summary["missing"] == 0
+    assert summary[PERCENTILES_KEY] == {}
@@ -0,0 +1,85 @@
+import random
+import sqlite3
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from database.backends import create_db_manager, SQLITE_BACKEND, DUCKDB_BACKEND
+from database.load_tables_views import TABLES_VIEWS
+from database.synthetic_workload import generate_workload, CURRENT
+from metrics.data_retrieval_accuracy import compute_and_return_retrieval_accuracy, has_outer_order_by
+
+
+def _populate(path, employees=300, seed=3):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    for query in TABLES_VIEWS:
+        conn.execute(query)
+    departments = [(f"d{number:03d}", f"Department {number}") for number in range(1, 10)]
+    conn.executemany("INSERT INTO departments VALUES (?, ?)", departments)
+    for emp_no in range(10001, 10001 + employees):
+        year = rng.randint(1985, 2000)
+        conn.execute("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?)", (
+            emp_no, f"{year - 30}-01-01", f"First{emp_no % 37}", rng.choice(["Facello", "Simmel", "Bamford"]),
+            rng.choice("MF"), f"{year}-{rng.randint(1, 12):02d}-01",
+        ))
+        to_date = CURRENT if rng.random() < 0.7 else "1999-01-01"
+        conn.execute("INSERT INTO dept_emp VALUES (?, ?, ?, ?)",
+                     (emp_no, rng.choice(departments)[0], f"{year}-01-01", to_date))
+        conn.execute("INSERT INTO titles VALUES (?, ?, ?, ?)",
+                     (emp_no, rng.choice(["Staff", "Engineer", "Manager"]), f"{year}-01-01", to_date))
+        for offset in range(3):
+            conn.execute("INSERT INTO salaries VALUES (?, ?, ?, ?)", (
+                emp_no, rng.randrange(40000, 130000, 1000), f"{year + offset}-01-01",
+                CURRENT if offset == 2 else f"{year + offset + 1}-01-01",
+            ))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def managers(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("backends") / "employees.db")
+    _populate(path)
+    managers = {backend: create_db_manager(path, backend) for backend in (SQLITE_BACKEND, DUCKDB_BACKEND)}
+    for manager in managers.values():
+        assert manager.connect() is not None
+    yield managers
+    for manager in managers.values():
+        manager.close_connection()
+
+
+def _runs_on(manager, query):
+    return manager.execute_query_columnar(query) is not None
+
+
+def test_identical_queries_score_the_same_on_both_backends(managers):
+    workload = generate_workload(300, wrong_rate=0, expensive_rate=0, injection_rate=0, seed=11)
+    golden = list(dict.fromkeys(workload["golden_sql"]))
+    # SQLite dialect DuckDB rejects (e.g. strftime on text dates) is out of scope here
+    golden = [query for query in golden if _runs_on(managers[DUCKDB_BACKEND], query)]
+    assert any(not has_outer_order_by(query) for query in golden)
+
+    scores = {
+        backend: compute_and_return_retrieval_accuracy(manager, golden, golden)[0]
+        for backend, manager in managers.items()
+    }
+    assert scores[SQLITE_BACKEND].equals(scores[DUCKDB_BACKEND])
+    assert (scores[DUCKDB_BACKEND]["rows_precision"] == 1.0).all()
+
+
+def test_unordered_results_match_in_any_order(managers):
+    golden = f"SELECT emp_no, salary FROM salaries WHERE to_date = '{CURRENT}'"
+    generated = golden + " ORDER BY salary DESC"
+    for manager in managers.values():
+        data, _ = compute_and_return_retrieval_accuracy(manager, [generated], [golden])
+        assert data.loc[0, "rows_recall"] == 1.0
+
+
+def test_ordered_golden_query_keeps_the_order(managers):
+    golden = "SELECT emp_no FROM employees ORDER BY emp_no"
+    generated = "SELECT emp_no FROM employees ORDER BY emp_no DESC"
+    for manager in managers.values():
+        data, _ = compute_and_return_retrieval_accuracy(manager, [generated], [golden])
+        assert data.loc[0, "rows_recall"] < 1.0
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pyarrow as pa
+import pytest
+
+from database.columnar import fetch_arrow_table
+from metrics.data_retrieval_accuracy import compare_result_tables, RETRIEVAL_SCORE_COLUMNS
+
+
+def _fetch(query, batch_size=2):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(
+        "CREATE TABLE t (a, b); "
+        "INSERT INTO t VALUES (1, NULL), (2, NULL), (3, 'x'), (4, 2.5), (5, 9007199254740993);"
+    )
+    try:
+        return fetch_arrow_table(conn.execute(query), batch_size)
+    finally:
+        conn.close()
+
+
+def _scores(value):
+    return dict.fromkeys(RETRIEVAL_SCORE_COLUMNS, value)
+
+
+def test_fetch_keeps_column_names_and_types():
+    table = _fetch("SELECT a AS id, a * 1.5 AS half FROM t")
+    assert table.column_names == ["id", "half"]
+    assert pa.types.is_integer(table.schema.field("id").type)
+    assert pa.types.is_floating(table.schema.field("half").type)
+    assert table.column("id").to_pylist() == [1, 2, 3, 4, 5]
+
+
+def test_fetch_column_whose_type_changes_across_batches():
+    # NULLs, then text, then a float, then an integer: one batch each way
+    table = _fetch("SELECT b FROM t", batch_size=2)
+    assert table.num_rows == 5
+    assert table.column("b").to_pylist() == [None, None, "x", "2.5", "9007199254740993"]
+
+
+def test_fetch_integer_then_float_batches_are_promoted():
+    table = _fetch("SELECT CASE WHEN a < 3 THEN a ELSE a + 0.5 END AS v FROM t", batch_size=2)
+    assert pa.types.is_floating(table.schema.field("v").type)
+    assert table.column("v").to_pylist() == [1.0, 2.0, 3.5, 4.5, 5.5]
+
+
+def test_fetch_empty_result():
+    table = _fetch("SELECT a, b FROM t WHERE a > 10")
+    assert table.num_rows == 0
+    assert table.column_names == ["a", "b"]
+
+
+def test_identical_results_match():
+    table = _fetch("SELECT a, b FROM t")
+    assert compare_result_tables(table, table) == _scores(1.0)
+
+
+def test_integers_beyond_float_precision():
+    generated = pa.table({"v": [9007199254740993]})
+    assert compare_result_tables(generated, pa.table({"v": [9007199254740993]})) == _scores(1.0)
+    assert compare_result_tables(generated, pa.table({"v": [9007199254740992]})) == _scores(0.0)
+
+
+def test_integer_and_float_columns_compare_as_numbers():
+    generated = pa.table({"v": pa.array([1, 2, 3], type=pa.int32())})
+    golden = pa.table({"v": [1.0, 2.0000000001, 4.0]})
+    scores = compare_result_tables(generated, golden)
+    assert scores["rows_precision"] == pytest.approx(2 / 3)
+    assert scores["column_precision"] == 0.0
+
+
+def test_mixed_types_compare_as_strings():
+    generated = pa.table({"v": ["1", "a"]})
+    golden = pa.table({"v": [1, 2]})
+    scores = compare_result_tables(generated, golden)
+    assert scores["rows_precision"] == 0.5
+    assert scores["rows_recall"] == 0.5
+
+
+def test_nulls_equal_nulls():
+    generated = pa.table({"v": pa.array([None, None], type=pa.null())})
+    golden = pa.table({"v": pa.array([None, 2], type=pa.int64())})
+    scores = compare_result_tables(generated, golden)
+    assert scores["rows_precision"] == 0.5
+    assert scores["column_precision"] == 0.0
+
+
+def test_column_names_are_ignored():
+    generated = pa.table({"x": [1, 2]})
+    golden = pa.table({"y": [1, 2]})
+    assert compare_result_tables(generated, golden) == _scores(1.0)
+
+
+def test_empty_results():
+    empty_one = pa.table({"v": pa.array([], type=pa.null())})
+    empty_two = pa.table({"v": pa.array([], type=pa.null()), "w": pa.array([], type=pa.null())})
+    assert compare_result_tables(empty_one, empty_one) == _scores(1.0)
+    assert compare_result_tables(empty_one, empty_two) == _scores(0.0)
+    assert compare_result_tables(empty_one, pa.table({"v": [1]})) == _scores(0.0)
+
+
+def test_extra_rows_lower_precision_only():
+    generated = pa.table({"v": [1, 2, 3, 4]})
+    golden = pa.table({"v": [1, 2]})
+    scores = compare_result_tables(generated, golden)
+    assert scores["rows_precision"] == 0.5
+    assert scores["rows_recall"] == 1.0
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("langchain_ibm")
+
+from metrics.entity_recognition import _f1_scores
+
+
+def test_entities_returned_as_lists_and_dicts_are_scored():
+    generated = pd.Series([
+        [["salary", ">", 100000], {"column": "emp_no"}],
+        [{"column": "dept_no"}],
+        [],
+    ])
+    golden = pd.Series([
+        [{"column": "emp_no"}, ["salary", ">", 100000]],
+        [{"column": "dept_name"}],
+        [["salary", ">", 100000]],
+    ])
+    assert _f1_scores(generated, golden).tolist() == [1.0, 0.0, 0.0]
+
+
+def test_entities_returned_as_strings_are_scored():
+    generated = pd.Series([["emp_no", "salary", "salary"], ["dept_no"]])
+    golden = pd.Series([["salary"], ["dept_no"]])
+    scores = _f1_scores(generated, golden)
+    assert scores[0] == pytest.approx(2 / 3)
+    assert scores[1] == 1.0
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("langchain_ibm")
+
+from services.evaluation_server import MicroBatcher, EvaluationService
+from services.metric_registry import MetricSpec, DB
+
+
+def _batcher(compute_rows, max_batch_rows):
+    spec = MetricSpec("double", ("x",), DB, compute_rows, lambda rows: {}, lambda aggregates: {})
+    # Batches close when they are full, long before the wait ends
+    return MicroBatcher(spec, None, max_batch_rows=max_batch_rows, batch_wait_ms=10_000)
+
+
+def test_batch_results_are_split_back_to_each_submission():
+    batch_sizes = []
+
+    def double(df, db_manager):
+        batch_sizes.append(len(df))
+        return pd.DataFrame({"doubled": df["x"] * 2})
+
+    batcher = _batcher(double, max_batch_rows=5)
+    try:
+        first = batcher.submit(pd.DataFrame({"x": [1, 2]}, index=[7, 8]))
+        second = batcher.submit(pd.DataFrame({"x": [3, 4, 5]}))
+        assert first.result(timeout=5)["doubled"].tolist() == [2, 4]
+        assert second.result(timeout=5)["doubled"].tolist() == [6, 8, 10]
+        assert first.result().index.tolist() == [0, 1]
+    finally:
+        batcher.close()
+    assert batch_sizes == [5]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_failing_batch_fails_every_submission_in_it():
+    def fail(df, db_manager):
+        raise RuntimeError("database is locked")
+
+    batcher = _batcher(fail, max_batch_rows=4)
+    try:
+        futures = [batcher.submit(pd.DataFrame({"x": [1, 2]})) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="database is locked"):
+                future.result(timeout=5)
+    finally:
+        batcher.close()
+    assert batcher.stats()["batches"] == 1
+
+
+@pytest.fixture
+def service():
+    service = EvaluationService(None)
+    yield service
+    service.close()
+
+
+def test_unknown_metrics_are_rejected(service):
+    with pytest.raises(ValueError, match="Unknown metrics"):
+        service.evaluate([{"generated_sql": "SELECT 1"}], ["halstead", "row_count"])
+
+
+def test_missing_columns_are_rejected(service):
+    with pytest.raises(ValueError, match="golden_sql"):
+        service.evaluate([{"generated_sql": "SELECT 1"}], ["retrieval_accuracy"])
@@ -0,0 +1,41 @@
+from services.golden_work import share_golden_work, golden_work
+
+
+def test_value_released_once_every_consumer_used_it():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "rows"
+
+    with share_golden_work(consumers=("a", "b")) as work:
+        with work.consumer("a"):
+            assert golden_work("golden result", "q1", compute) == "rows"
+        # Kept for b, which has not used it yet
+        assert ("golden result", "q1") in work.values
+        with work.consumer("b"):
+            assert golden_work("golden result", "q1", compute) == "rows"
+        assert work.values == {}
+
+    assert len(calls) == 1
+    assert work.stats() == {"computed": 1, "reused": 1, "released": 1}
+
+
+def test_finished_consumer_does_not_hold_values():
+    with share_golden_work(consumers=("a", "b")) as work:
+        with work.consumer("a"):
+            golden_work("golden result", "q1", lambda: 1)
+        with work.consumer("b"):
+            # b never asks for q1, so q1 is released when b finishes
+            golden_work("golden result", "q2", lambda: 2)
+            assert ("golden result", "q1") in work.values
+        assert work.values == {}
+
+
+def test_without_consumers_values_are_kept_until_the_block_ends():
+    calls = []
+    with share_golden_work() as work:
+        for _ in range(3):
+            golden_work("schema", 1, lambda: calls.append(1))
+        assert ("schema", 1) in work.values
+    assert len(calls) == 1
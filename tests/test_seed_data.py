@@ -0,0 +1,30 @@
+import pyarrow as pa
+
+from database.seed_data import SeedWriter, declared_column_types, iter_seed_tables
+
+
+def _read(seed_dir):
+    return {
+        table_name: (columns, [row for rows in row_batches for row in rows])
+        for table_name, columns, row_batches in iter_seed_tables(seed_dir)
+    }
+
+
+def test_declared_types_of_nullable_column():
+    assert declared_column_types()["titles"]["to_date"] == pa.string()
+    assert declared_column_types()["salaries"]["salary"] == pa.int64()
+
+
+def test_column_null_in_first_batch(tmp_path):
+    writer = SeedWriter(str(tmp_path), batch_size=2)
+    writer.write_rows("titles", ("emp_no", "to_date"), [(1, None), (2, None), (3, "9999-01-01")])
+    writer.close()
+    assert _read(str(tmp_path))["titles"][1] == [(1, None), (2, None), (3, "9999-01-01")]
+
+
+def test_undeclared_table_split_across_calls(tmp_path):
+    writer = SeedWriter(str(tmp_path), batch_size=2, column_types={})
+    writer.write_rows("other", ("a", "b"), [(1, None), (2, None)])
+    writer.write_rows("other", ("a", "b"), [(3, "x")])
+    writer.close()
+    assert _read(str(tmp_path))["other"] == (("a", "b"), [(1, None), (2, None), (3, "x")])